@@ -0,0 +1,196 @@
+"""
+Random Knights and Knaves islands with a unique solution.
+
+A random role assignment is drawn first and every statement is generated against it, so a statement
+is true exactly when its speaker is a Knight. Statements use the whole grammar of statements.py:
+role atoms, "and", "or", "either ... or ... but not both", "it is not true that ..." and
+"exactly K of ... are knights". Every speaker says one statement, then statements are added until the
+hidden assignment is the only consistent one.
+
+Uniqueness is checked incrementally with the SAT backend: the hidden assignment is blocked once, so
+the formula stays satisfiable exactly while some other assignment fits the statements. Each model found
+names the characters whose role is still open, and the next statement is about one of them. Learnt
+clauses stay valid as statements are only ever added.
+
+Usage: python generate.py 50 [--count 1000] [--seed 1] [--format jsonl|ttl|nt] [-o puzzles.jsonl]
+       python generate.py 200 --count 10 --format ttl -o islands/    (one file per island)
+       python generate.py 200 --count 1000 --format store -o islands.db    (puzzle store, see store.py)
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from rdflib import Graph, Literal, Namespace, OWL, RDF
+
+from sat import SatSolver, add_statement
+from statements import ROLE_PHRASES, compile_statement, roles_to_combination
+
+NS = Namespace("http://example.org/")
+
+SELF_PHRASES = [phrase for phrase in ROLE_PHRASES if phrase.startswith("am ")]
+OTHER_PHRASES = [phrase for phrase in ROLE_PHRASES if not phrase.startswith("am ")]
+# form -> weight
+FORMS = {"atom": 3, "and": 2, "or": 2, "xor": 2, "exactly": 2, "not": 1}
+# attempts to draw a statement with the right truth value before negating one
+ATTEMPTS = 3
+
+
+def character_names(count):
+    return ["P" + str(i + 1) for i in range(count)]
+
+
+def _subject(target, speaker, names):
+    return "I" if target == speaker else names[target]
+
+
+def _atom(rng, target, speaker, names):
+    phrases = SELF_PHRASES if target == speaker else OTHER_PHRASES
+    return _subject(target, speaker, names) + " " + rng.choice(phrases)
+
+
+def random_text(rng, speaker, names, focus=None):
+    """ Text of a random statement by `speaker`, about `focus` when given """
+    form = rng.choices(list(FORMS), weights=list(FORMS.values()))[0]
+    size = {"atom": 1, "exactly": rng.randint(2, 4)}.get(form, 2)
+    targets = rng.sample(range(len(names)), min(size, len(names)))
+    if focus is not None and focus not in targets:
+        targets[0] = focus
+    rng.shuffle(targets)
+    atoms = [_atom(rng, target, speaker, names) for target in targets]
+    if form == "atom" or len(atoms) == 1:
+        return atoms[0]
+    if form == "and":
+        return " and ".join(atoms)
+    if form == "or":
+        return " or ".join(atoms)
+    if form == "xor":
+        return "either " + " or ".join(atoms) + " but not both"
+    if form == "not":
+        return "it is not true that " + " and ".join(atoms)
+    amount = rng.randint(0, len(targets))
+    subjects = [_subject(target, speaker, names) for target in targets]
+    role = rng.choice(["knight", "knave"])
+    return (f"exactly {amount} of {', '.join(subjects[:-1])} and {subjects[-1]} "
+            + (f"is a {role}" if amount == 1 else f"are {role}s"))
+
+
+def random_statement(rng, speaker, names, roles, index_map, focus=None):
+    """ (text, predicate) of a statement by `speaker` that is true exactly when the speaker is a Knight """
+    knight = bool(roles >> speaker & 1)
+    for _ in range(ATTEMPTS):
+        text = random_text(rng, speaker, names, focus)
+        predicate = compile_statement(text, NS[names[speaker]], index_map, NS)
+        if predicate.evaluate(roles) == knight:
+            return text, predicate
+    text = "it is not true that " + text
+    return text, compile_statement(text, NS[names[speaker]], index_map, NS)
+
+
+def generate(count, seed=None, extra=0):
+    """
+    Island of `count` speakers with a unique consistent role assignment.
+    `extra` redundant statements are added after uniqueness is reached.
+    Returns {"characters": [...], "statements": [[speaker, text], ...], "solution": ["Knight", ...]}.
+    """
+    rng = random.Random(seed)
+    names = character_names(count)
+    index_map = {NS[name]: i for i, name in enumerate(names)}
+    roles = rng.getrandbits(count)
+
+    cnf = SatSolver(count)
+    statements = []
+
+    def say(speaker, focus=None):
+        text, predicate = random_statement(rng, speaker, names, roles, index_map, focus)
+        statements.append([names[speaker], text])
+        return add_statement(cnf, speaker, predicate)
+
+    for speaker in range(count):
+        say(speaker)
+    # every other assignment must now contradict some statement
+    satisfiable = cnf.add_clause([-(i + 1) if roles >> i & 1 else i + 1 for i in range(count)])
+    while satisfiable:
+        model = cnf.solve()
+        if model is None:
+            break
+        undecided = [i for i in range(count) if model[i + 1] != bool(roles >> i & 1)]
+        satisfiable = say(rng.randrange(count), rng.choice(undecided))
+    for _ in range(extra):
+        say(rng.randrange(count))
+    return {"characters": names, "statements": statements,
+            "solution": list(roles_to_combination(roles, count))}
+
+
+def to_graph(puzzle):
+    """ RDF graph in the shape of rdf_graph.py: (graph, ns, character URIRefs) """
+    g = Graph()
+    g.add((NS.Knight, RDF.type, OWL.Class))
+    g.add((NS.Knave, RDF.type, OWL.Class))
+    characters = [NS[name] for name in puzzle["characters"]]
+    for character in characters:
+        g.add((character, RDF.type, OWL.NamedIndividual))
+    for speaker, text in puzzle["statements"]:
+        g.add((NS[speaker], NS.says, Literal(text)))
+    return g, NS, characters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Knights and Knaves islands with a unique solution")
+    parser.add_argument("speakers", type=int)
+    parser.add_argument("--count", type=int, default=1, help="islands to generate, seeds seed, seed+1, ...")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--extra", type=int, default=0, help="redundant statements added to each island")
+    parser.add_argument("--format", choices=["jsonl", "ttl", "nt", "store"], default="jsonl",
+                        help="JSON lines, RDF graphs in the rdf_graph.py shape, or named graphs in a puzzle store")
+    parser.add_argument("-o", "--output", help="output file (jsonl, store) or directory (ttl, nt); stdout by default")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+    if args.format == "store":
+        from store import PuzzleStore
+
+        if not args.output:
+            parser.error("--format store needs --output")
+        start = time.perf_counter()
+        islands = (generate(args.speakers, seed + i, args.extra) for i in range(args.count))
+        with PuzzleStore(args.output) as store:
+            store.put_many((f"island-{args.speakers}-{seed + i}", to_graph(puzzle)[0])
+                           for i, puzzle in enumerate(islands))
+        print(f"{args.count} islands stored in {args.output} in {time.perf_counter() - start:.2f} s",
+              file=sys.stderr)
+        return
+    per_file = args.format != "jsonl" and args.output
+    if per_file:
+        os.makedirs(args.output, exist_ok=True)
+    out = open(args.output, "w", encoding="utf-8") if args.output and not per_file else sys.stdout
+    start = time.perf_counter()
+    statements = 0
+    try:
+        for i in range(args.count):
+            puzzle = generate(args.speakers, seed + i, args.extra)
+            puzzle["id"] = f"island-{args.speakers}-{seed + i}"
+            statements += len(puzzle["statements"])
+            if args.format == "jsonl":
+                out.write(json.dumps(puzzle) + "\n")
+                continue
+            graph, ns, _ = to_graph(puzzle)
+            graph.bind("ns", ns)
+            text = graph.serialize(format="turtle" if args.format == "ttl" else "nt")
+            if per_file:
+                with open(os.path.join(args.output, f"{puzzle['id']}.{args.format}"), "w", encoding="utf-8") as file:
+                    file.write(text)
+            else:
+                out.write(text)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{args.count} islands, {statements / args.count:.1f} statements each, in {elapsed:.2f} s "
+          f"({args.count / elapsed:.1f} islands/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
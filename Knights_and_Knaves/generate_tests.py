@@ -0,0 +1,70 @@
+import unittest
+
+from generate import *
+from reasoning import compile_statements
+from sat import solve_sat
+from statements import Exactly, Not, Xor, combination_to_roles
+from vectorized import solve_vectorized
+
+NAMES = character_names(4)
+INDEX_MAP = {NS[name]: i for i, name in enumerate(NAMES)}
+
+
+def compile_text(text, speaker="P1"):
+    return compile_statement(text, NS[speaker], INDEX_MAP, NS)
+
+
+class GrammarTests(unittest.TestCase):
+    def test_either_or_but_not_both(self):
+        predicate = compile_text("either P2 is a knight or P3 is a knight but not both")
+        self.assertIsInstance(predicate, Xor)
+        self.assertEqual([predicate.evaluate(roles) for roles in (0, 2, 4, 6)], [False, True, True, False])
+
+    def test_exactly(self):
+        predicate = compile_text("exactly 2 of I, P2 and P4 are knaves")
+        self.assertIsInstance(predicate, Exactly)
+        self.assertEqual(predicate.indices, [0, 1, 3])
+        self.assertTrue(predicate.evaluate(0b1000))
+        self.assertFalse(predicate.evaluate(0))
+        self.assertTrue(compile_text("exactly 1 of P2 and P3 is a knight").evaluate(0b0010))
+
+    def test_not_and_capitalized_keywords(self):
+        predicate = compile_text("It is not true that P2 lies and I am a knave")
+        self.assertIsInstance(predicate, Not)
+        self.assertTrue(predicate.evaluate(0b0001))
+        self.assertFalse(predicate.evaluate(0b0000))
+
+    def test_every_form_encodes_like_it_evaluates(self):
+        rng = random.Random(6)
+        for _ in range(200):
+            speaker = rng.randrange(4)
+            text = random_text(rng, speaker, NAMES)
+            compiled = [(speaker, [compile_text(text, NAMES[speaker])])]
+            expected = solve_vectorized(compiled, 4)[0]
+            self.assertEqual(sorted(solve_sat(compiled, 4, all_models=True)), expected, text)
+
+
+class GenerateTests(unittest.TestCase):
+    def test_same_seed_gives_same_island(self):
+        self.assertEqual(generate(12, seed=3), generate(12, seed=3))
+
+    def test_small_islands_are_unique(self):
+        for seed in range(20):
+            puzzle = generate(8, seed)
+            graph, ns, characters = to_graph(puzzle)
+            compiled = compile_statements(graph, characters, ns)
+            self.assertEqual(solve_vectorized(compiled, 8)[0], [combination_to_roles(puzzle["solution"])])
+
+    def test_large_island_is_unique(self):
+        puzzle = generate(60, seed=1, extra=5)
+        graph, ns, characters = to_graph(puzzle)
+        compiled = compile_statements(graph, characters, ns)
+        self.assertEqual(solve_sat(compiled, 60, all_models=True, limit=2), [combination_to_roles(puzzle["solution"])])
+
+    def test_every_speaker_says_something(self):
+        puzzle = generate(10, seed=2)
+        self.assertEqual({speaker for speaker, _ in puzzle["statements"]}, set(puzzle["characters"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,31 +1,75 @@
-from rdf_graph import create_rdf_graph  
-from reasoning import is_consistent
-from itertools import product
+import argparse
+import os
+
+from rdf_graph import create_rdf_graph
+from reasoning import StatementIndex, is_consistent_roles
+from statements import roles_to_combination
 from rdflib import Namespace, URIRef
 
 def main():
-    # Create RDF graph
-    rdf_graph = create_rdf_graph()
+    parser = argparse.ArgumentParser(description="Solve the Knights and Knaves puzzle")
+    parser.add_argument("--engine", choices=["brute", "vectorized", "sat"], default="brute",
+                        help="brute - stop at the first consistent combination, "
+                             "vectorized - check every combination with NumPy and report all of them, "
+                             "sat - CDCL SAT solver, for puzzles with hundreds of characters")
+    parser.add_argument("--all", action="store_true",
+                        help="with --engine sat, enumerate every consistent combination")
+    parser.add_argument("--store", help="puzzle store (store.py) to open the puzzle from")
+    parser.add_argument("--puzzle", help="puzzle id in the store")
+    args = parser.parse_args()
+
+    if args.store:
+        from store import open_puzzle
+
+        if not args.puzzle:
+            parser.error("--store needs --puzzle")
+        if not os.path.exists(args.store):
+            parser.error(f"no puzzle store {args.store}")
+        # Open one stored puzzle, its characters are read from the graph
+        try:
+            rdf_graph, ns, characters = open_puzzle(args.store, args.puzzle)
+        except KeyError:
+            parser.error(f"no puzzle {args.puzzle!r} in {args.store}")
+        character_names = [character[len(ns):] for character in characters]
+    else:
+        # Create RDF graph
+        rdf_graph = create_rdf_graph()
+
+        # Define namespace
+        ns = Namespace("http://example.org/")
+
+        # Update character names for the new scenario
+        character_names = ["Justin", "Oberon", "Larry", "Xan", "Quentin", "Hillary"]
+        characters = [URIRef(ns[char_name]) for char_name in character_names]
+
+    # Compile statements from RDF graph once
+    compiled = StatementIndex(rdf_graph, characters, ns).compiled
 
-    # Define namespace
-    ns = Namespace("http://example.org/")
+    if args.engine == "vectorized":
+        from vectorized import solve_vectorized
 
-    # Update character names for the new scenario
-    character_names = ["Justin", "Oberon", "Larry", "Xan", "Quentin", "Hillary"]
-    characters = [URIRef(ns[char_name]) for char_name in character_names]
+        solutions, count = solve_vectorized(compiled, len(character_names))
+        for roles in solutions:
+            combination = roles_to_combination(roles, len(character_names))
+            print("Consistent combination found:", dict(zip(character_names, combination)))
+        print(f"{count} consistent combination(s), solution is {'unique' if count == 1 else 'not unique'}")
+        return
 
-    # Collect statements from RDF graph
-    statements_dict = {character: [] for character in characters}
-    for character in characters:
-        for _, _, statement in rdf_graph.triples((character, ns.says, None)):
-            statements_dict[character].append(str(statement))
+    if args.engine == "sat":
+        from sat import solve_sat
 
-    # Generate all possible combinations of characters being Knights or Knaves
-    possible_combinations = product(['Knight', 'Knave'], repeat=len(character_names))
+        solutions = solve_sat(compiled, len(character_names), all_models=args.all)
+        for roles in solutions:
+            combination = roles_to_combination(roles, len(character_names))
+            print("Consistent combination found:", dict(zip(character_names, combination)))
+        if args.all:
+            print(f"{len(solutions)} consistent combination(s)")
+        return
 
-    # Iterate through all possible combinations to find a consistent one
-    for combination in possible_combinations:
-        if is_consistent(combination, rdf_graph, characters, ns):
+    # Iterate through all role masks (bit i set - character i is a Knight) to find a consistent one
+    for roles in range(2 ** len(character_names)):
+        if is_consistent_roles(roles, compiled):
+            combination = roles_to_combination(roles, len(character_names))
             solution = dict(zip(character_names, combination))
             print("Consistent combination found:", solution)
             break
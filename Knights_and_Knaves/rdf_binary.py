@@ -0,0 +1,69 @@
+"""
+Binary Knights and Knaves islands (the format of shared/binary_graph.py) for solver workers: the solver
+tables are read straight from the memory-mapped file, without an rdflib Graph.
+
+Usage: python rdf_binary.py island.ttl island.pzg      (convert)
+       python rdf_binary.py island.pzg                  (solve, with --engine sat|vectorized|brute)
+"""
+import argparse
+import os
+import sys
+
+from rdflib import Graph, Namespace
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from binary_graph import as_table, dump
+
+
+def load_says_index(source, ns=None):
+    """
+    Solver tables of a binary Knights and Knaves graph (path, bytes or TripleTable):
+    (characters, compiled statements as in reasoning.compile_statements)
+    """
+    from reasoning import graph_characters
+    from statements import compile_statement
+
+    ns = ns or Namespace("http://example.org/")
+    table = as_table(source)
+    characters = graph_characters(table)
+    index_map = {character: i for i, character in enumerate(characters)}
+    compiled = [(i, []) for i in range(len(characters))]
+    # statement literals are read straight from the blob, grouped by speaker
+    for s, _, o in table.rows((None, ns.says, None)).tolist():
+        speaker = table.term(s)
+        compiled[index_map[speaker]][1].append(compile_statement(table.text(o), speaker, index_map, ns))
+    return characters, compiled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert an island graph to the binary form, or solve a binary one")
+    parser.add_argument("source", help="RDF file to convert, or .pzg file to solve")
+    parser.add_argument("target", nargs="?", help="binary file to write")
+    parser.add_argument("--engine", choices=["brute", "vectorized", "sat"], default="sat")
+    args = parser.parse_args()
+
+    if args.target:
+        dump(Graph().parse(args.source), args.target)
+        return
+
+    ns = Namespace("http://example.org/")
+    characters, compiled = load_says_index(args.source, ns)
+    count = len(characters)
+    if args.engine == "sat":
+        from sat import solve_sat
+        solutions = solve_sat(compiled, count, all_models=True, limit=2)
+    elif args.engine == "vectorized":
+        from vectorized import solve_vectorized
+        solutions = solve_vectorized(compiled, count)[0]
+    else:
+        from reasoning import is_consistent_roles
+        solutions = [roles for roles in range(2 ** count) if is_consistent_roles(roles, compiled)]
+    from statements import roles_to_combination
+    for roles in solutions[:1]:
+        combination = roles_to_combination(roles, count)
+        print("Consistent combination found:", dict(zip((character[len(ns):] for character in characters), combination)))
+    print(f"solution is {'unique' if len(solutions) == 1 else 'not unique' if solutions else 'missing'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import unittest
+
+from rdflib import Namespace
+
+from generate import generate, to_graph
+from rdf_binary import load_says_index
+from rdf_graph import create_rdf_graph
+from reasoning import compile_statements, graph_characters
+from sat import solve_sat
+# shared/, put on the path by rdf_binary
+from binary_graph import dumps, loads
+
+
+def tables(characters, compiled):
+    return characters, [(i, sorted(str(statement) for statement in statements)) for i, statements in compiled]
+
+
+class LoaderTests(unittest.TestCase):
+    def assertSameIndex(self, graph, ns):
+        characters = graph_characters(graph)
+        expected = tables(characters, compile_statements(graph, characters, ns))
+        self.assertEqual(tables(*load_says_index(dumps(graph), ns)), expected)
+
+    def test_says_index_matches_the_graph(self):
+        self.assertSameIndex(create_rdf_graph(), Namespace("http://example.org/"))
+        graph, ns, _ = to_graph(generate(40, seed=2))
+        self.assertSameIndex(graph, ns)
+
+    def test_generated_island_solves_from_the_table(self):
+        puzzle = generate(30, seed=3)
+        graph, ns, _ = to_graph(puzzle)
+        characters, compiled = load_says_index(loads(dumps(graph)), ns)
+        self.assertEqual([character[len(ns):] for character in characters], puzzle["characters"])
+        solutions = solve_sat(compiled, len(characters), all_models=True, limit=2)
+        self.assertEqual(len(solutions), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
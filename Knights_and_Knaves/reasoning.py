@@ -1,41 +1,87 @@
+import os
+import sys
 from itertools import product
-from rdflib import Graph, Namespace, URIRef
+from rdflib import Graph, Namespace, OWL, RDF, URIRef
 from rdf_graph  import create_rdf_graph
+from statements import compile_statement, combination_to_roles
 
-def is_consistent(combination, graph, characters, ns):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from graph_version import GraphCache, graph_version
+
+def graph_characters(graph):
+    """ NamedIndividuals of the graph in name order, numbered names naturally (P2 before P10) """
+    def key(character):
+        text = str(character)
+        stem = text.rstrip("0123456789")
+        return stem, int(text[len(stem):] or 0)
+    return sorted(graph.subjects(RDF.type, OWL.NamedIndividual), key=key)
+
+def compile_statements(graph, characters, ns):
     """
-    Check if the given combination of characters as knights or knaves is consistent with their statements.
+    Compile every statement in the graph once.
+    Returns a list of (speaker index, [predicate, ...]) pairs, usable with is_consistent_roles.
     """
+    index_map = {character: i for i, character in enumerate(characters)}
+    compiled = []
     for i, character in enumerate(characters):
-        role = combination[i]
-        statements = [str(o) for _, _, o in graph.triples((character, ns.says, None))]
+        statements = [compile_statement(str(o), character, index_map, ns)
+                      for _, _, o in graph.triples((character, ns.says, None))]
+        compiled.append((i, statements))
+    return compiled
+
+class StatementIndex:
+    """
+    One-time snapshot of the `says` relations of a graph: speaker index -> compiled statements,
+    in the form returned by compile_statements. Adding or removing triples through the graph
+    invalidates the snapshot, it is rebuilt on next access.
+    """
+    def __init__(self, graph, characters, ns, watch=True):
+        self.graph = graph
+        self.characters = list(characters)
+        self.ns = ns
+        self.watch = watch
+        self._compiled = None
+        self._version = None
+
+    @property
+    def compiled(self):
+        # the graph is not patched, a change is seen as a new graph_version on access
+        version = graph_version(self.graph) if self.watch else None
+        if self._compiled is None or version != self._version:
+            self._compiled = compile_statements(self.graph, self.characters, self.ns)
+            self._version = version
+        return self._compiled
+
+    def invalidate(self):
+        self._compiled = None
+
+_indexes = GraphCache()
+
+def statement_index(graph, characters, ns):
+    """ StatementIndex for the graph, shared by every call with the same characters """
+    key = (tuple(characters), str(ns))
+    return _indexes.get(graph, key, lambda: StatementIndex(graph, characters, ns))
+
+def is_consistent_roles(roles, compiled):
+    """
+    Check a role mask (bit i set - characters[i] is a Knight) against the compiled statements.
+    """
+    for i, statements in compiled:
+        knight = bool(roles >> i & 1)
         for statement in statements:
-            statement_is_true = evaluate_statement(character, statement, combination, characters, ns)
-            if (role == 'Knight' and not statement_is_true) or (role == 'Knave' and statement_is_true):
+            if statement.evaluate(roles) != knight:
                 return False
     return True
 
+def is_consistent(combination, graph, characters, ns):
+    """
+    Check if the given combination of characters as knights or knaves is consistent with their statements.
+    The graph is read once per (graph, characters) and cached in a StatementIndex.
+    """
+    compiled = statement_index(graph, characters, ns).compiled
+    return is_consistent_roles(combination_to_roles(combination), compiled)
+
 def evaluate_statement(character, statement, combination, characters, ns):
     index_map = {characters[i]: i for i in range(len(characters))}
-
-    # Parsing the statement
-    parts = statement.split()
-    target_name = parts[0]
-    if "always tells the truth" in statement:
-        target_character = URIRef(ns[target_name])
-        return combination[index_map[target_character]] == 'Knight'
-    elif "is a knave" in statement or "lies" in statement:
-        target_character = URIRef(ns[target_name])
-        return combination[index_map[target_character]] == 'Knave'
-    elif "is truthful" in statement:
-        target_character = URIRef(ns[target_name])
-        return combination[index_map[target_character]] == 'Knight'
-    elif "or I am a knave" in statement:
-        first_part, second_part = statement.split(" or ")
-        first_target_name, first_target_role = first_part.split()[0], 'Knight'
-        first_target_character = URIRef(ns[first_target_name])
-        first_condition = combination[index_map[first_target_character]] == first_target_role
-        second_condition = combination[index_map[character]] == 'Knave'
-        return first_condition or second_condition
-    else:
-        raise ValueError("Unknown statement: " + statement)
+    predicate = compile_statement(statement, character, index_map, ns)
+    return predicate.evaluate(combination_to_roles(combination))
@@ -0,0 +1,241 @@
+"""
+SAT backend for Knights and Knaves.
+
+Every statement is encoded as role(speaker) <-> statement in CNF (the same
+condition is_consistent checks) and solved with a small CDCL solver: two watched
+literals per clause, unit propagation, first-UIP clause learning with
+non-chronological backjumping, VSIDS-style variable activity and restarts.
+"""
+
+class SatSolver:
+    """ CDCL solver over DIMACS-style literals: variable v > 0, literal v or -v """
+    def __init__(self, var_count=0):
+        self.var_count = 0
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.watches = {}
+        self.clauses = []
+        self.learnts = []
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.unsat = False
+        self.var_inc = 1.0
+        self.var_decay = 0.95
+        self.conflicts = 0
+        self.restart_limit = 100
+        for _ in range(var_count):
+            self.new_var()
+
+    def new_var(self):
+        self.var_count += 1
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        self.watches[self.var_count] = []
+        self.watches[-self.var_count] = []
+        return self.var_count
+
+    def value(self, literal):
+        value = self.values[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def add_clause(self, literals):
+        """ Add a clause; returns False if the formula became unsatisfiable """
+        if self.unsat:
+            return False
+        if self.trail_lim:
+            self.backtrack(0)
+        clause = []
+        for literal in literals:
+            value = self.value(literal)
+            if value is True or -literal in clause:
+                return True  # satisfied at level 0 or tautology
+            if value is None and literal not in clause:
+                clause.append(literal)
+        if not clause:
+            self.unsat = True
+            return False
+        if len(clause) == 1:
+            self.enqueue(clause[0], None)
+            if self.propagate() is not None:
+                self.unsat = True
+                return False
+            return True
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+        return True
+
+    def enqueue(self, literal, reason):
+        var = abs(literal)
+        self.values[var] = literal > 0
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """ Unit propagation over watched literals; returns a conflicting clause or None """
+        while self.qhead < len(self.trail):
+            false_literal = -self.trail[self.qhead]
+            self.qhead += 1
+            watchers = self.watches[false_literal]
+            kept = []
+            for n, clause in enumerate(watchers):
+                # keep the falsified watch in clause[1]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if self.value(first) is True:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(first) is False:
+                        kept.extend(watchers[n + 1:])
+                        self.watches[false_literal] = kept
+                        return clause
+                    self.enqueue(first, clause)
+            self.watches[false_literal] = kept
+        return None
+
+    def analyze(self, conflict):
+        """ First-UIP conflict analysis; returns (learnt clause, backjump level) """
+        level = len(self.trail_lim)
+        learnt = [None]
+        seen = set()
+        counter = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in (clause if literal is None else clause[1:]):
+                var = abs(q)
+                if var not in seen and self.levels[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.levels[var] == level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            clause = self.reasons[abs(literal)]
+            counter -= 1
+            if counter == 0:
+                break
+        learnt[0] = -literal
+        if len(learnt) == 1:
+            return learnt, 0
+        # the literal with the highest level goes to the second watch
+        best = max(range(1, len(learnt)), key=lambda i: self.levels[abs(learnt[i])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, self.levels[abs(learnt[1])]
+
+    def bump(self, var):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.var_inc *= 1e-100
+
+    def backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            var = abs(literal)
+            self.phase[var] = literal > 0
+            self.values[var] = None
+            self.reasons[var] = None
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def pick_branch_var(self):
+        best = None
+        best_activity = -1.0
+        for var in range(1, self.var_count + 1):
+            if self.values[var] is None and self.activity[var] > best_activity:
+                best = var
+                best_activity = self.activity[var]
+        return best
+
+    def solve(self):
+        """ Returns a model as a list of booleans indexed by variable (index 0 unused), or None """
+        if self.unsat:
+            return None
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_lim:
+                    self.unsat = True
+                    return None
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.learnts.append(learnt)
+                    self.watches[learnt[0]].append(learnt)
+                    self.watches[learnt[1]].append(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.var_inc /= self.var_decay
+                continue
+            if self.conflicts >= self.restart_limit:
+                self.restart_limit = int(self.restart_limit * 1.5)
+                self.backtrack(0)
+                continue
+            var = self.pick_branch_var()
+            if var is None:
+                return list(self.values)
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(var if self.phase[var] else -var, None)
+
+
+def add_statement(cnf, speaker, statement):
+    """ Add role(speaker) <-> statement; returns False if the formula became unsatisfiable """
+    role = speaker + 1
+    literal = statement.to_cnf(cnf)
+    return cnf.add_clause([-role, literal]) and cnf.add_clause([role, -literal])
+
+def encode(compiled, count):
+    """ Build a SatSolver with role(speaker) <-> statement for every compiled statement """
+    cnf = SatSolver(count)
+    for i, statements in compiled:
+        for statement in statements:
+            add_statement(cnf, i, statement)
+    return cnf
+
+def solve_sat(compiled, count, all_models=False, limit=None):
+    """
+    Find consistent role masks with the SAT solver.
+    Returns the first one, or with all_models every one of them (at most `limit`),
+    found by adding a clause that blocks each model after it is found.
+    """
+    cnf = encode(compiled, count)
+    solutions = []
+    while limit is None or len(solutions) < limit:
+        model = cnf.solve()
+        if model is None:
+            break
+        roles = sum(1 << i for i in range(count) if model[i + 1])
+        solutions.append(roles)
+        if not all_models:
+            break
+        cnf.add_clause([-(i + 1) if model[i + 1] else i + 1 for i in range(count)])
+    return solutions
@@ -0,0 +1,76 @@
+import random
+import unittest
+
+from rdflib import Namespace
+
+from rdf_graph import create_rdf_graph
+from reasoning import compile_statements
+from sat import *
+from vectorized import solve_vectorized
+from vectorized_tests import brute_force, random_island
+
+
+class SatSolverTests(unittest.TestCase):
+    def test_model_satisfies_every_clause(self):
+        rng = random.Random(3)
+        for _ in range(20):
+            cnf = SatSolver(12)
+            clauses = [[rng.choice([1, -1]) * rng.randint(1, 12) for _ in range(3)] for _ in range(40)]
+            for clause in clauses:
+                cnf.add_clause(clause)
+            model = cnf.solve()
+            satisfiable = any(all(any((literal > 0) == bool(assignment >> (abs(literal) - 1) & 1)
+                                      for literal in clause) for clause in clauses)
+                              for assignment in range(1 << 12))
+            self.assertEqual(model is not None, satisfiable)
+            if model is not None:
+                for clause in clauses:
+                    self.assertTrue(any(model[abs(literal)] == (literal > 0) for literal in clause))
+
+    def test_contradicting_units_are_unsatisfiable(self):
+        cnf = SatSolver(1)
+        self.assertTrue(cnf.add_clause([1]))
+        self.assertFalse(cnf.add_clause([-1]))
+        self.assertIsNone(cnf.solve())
+
+    def test_empty_clause_is_unsatisfiable(self):
+        cnf = SatSolver(2)
+        self.assertFalse(cnf.add_clause([]))
+        self.assertIsNone(cnf.solve())
+
+
+class SolveSatTests(unittest.TestCase):
+    def test_original_puzzle(self):
+        ns = Namespace("http://example.org/")
+        characters = [ns[name] for name in ["Justin", "Oberon", "Larry", "Xan", "Quentin", "Hillary"]]
+        compiled = compile_statements(create_rdf_graph(), characters, ns)
+        self.assertEqual(solve_sat(compiled, 6, all_models=True), brute_force(compiled, 6))
+
+    def test_all_models_match_brute_and_vectorized_engines(self):
+        rng = random.Random(4)
+        for _ in range(40):
+            count = rng.randint(2, 9)
+            compiled = random_island(rng, count, rng.randint(1, 2 * count))
+            expected = brute_force(compiled, count)
+            self.assertEqual(sorted(solve_sat(compiled, count, all_models=True)), expected)
+            self.assertEqual(solve_vectorized(compiled, count)[0], expected)
+
+    def test_first_model_is_consistent(self):
+        rng = random.Random(5)
+        for _ in range(20):
+            compiled = random_island(rng, 8, 6)
+            expected = brute_force(compiled, 8)
+            found = solve_sat(compiled, 8)
+            self.assertEqual(len(found), min(1, len(expected)))
+            self.assertTrue(set(found) <= set(expected))
+
+    def test_limit_caps_the_models(self):
+        compiled = [(i, []) for i in range(4)]
+        self.assertEqual(len(solve_sat(compiled, 4, all_models=True)), 16)
+        solutions = solve_sat(compiled, 4, all_models=True, limit=5)
+        self.assertEqual(len(solutions), 5)
+        self.assertEqual(len(set(solutions)), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,271 @@
+"""
+Compiled form of the statements the islanders make.
+
+A statement literal such as "Quentin is a knight or I am a knave" is parsed once
+into a small predicate tree that is evaluated against a role mask: an integer
+where bit i is set when characters[i] is a Knight and clear when it is a Knave.
+Every predicate can also be evaluated over a NumPy array of role masks at once
+(evaluate_array), which returns a boolean array, or encoded into CNF (to_cnf),
+where variable i + 1 stands for "characters[i] is a Knight".
+
+Grammar, from the outermost form in:
+  it is not true that STATEMENT
+  either CONJUNCTION or CONJUNCTION but not both
+  exactly K of NAME, NAME and NAME are knights / knaves   (exactly 1 of ... is a knight / knave)
+  CONJUNCTION or CONJUNCTION ...
+  ATOM and ATOM ...
+  ATOM - "SUBJECT PHRASE" with a phrase from ROLE_PHRASES, SUBJECT is a name or I (the speaker)
+"""
+
+import re
+from functools import reduce
+from operator import and_, or_, xor
+
+# Phrases that follow the subject of an atom, mapped to the role they assert
+# (True - knight, False - knave)
+ROLE_PHRASES = {
+    "is a knight": True,
+    "am a knight": True,
+    "always tells the truth": True,
+    "is truthful": True,
+    "tells the truth": True,
+    "is a knave": False,
+    "am a knave": False,
+    "always lies": False,
+    "lies": False,
+    "is not a knight": False,
+    "am not a knight": False,
+    "is not a knave": True,
+    "am not a knave": True,
+}
+
+
+class Role:
+    """ Atom 'X is a knight' (knight=True) or 'X is a knave' (knight=False) """
+    def __init__(self, index, knight):
+        self.index = index
+        self.knight = knight
+
+    def evaluate(self, roles):
+        return bool(roles >> self.index & 1) == self.knight
+
+    def evaluate_array(self, roles):
+        return (roles >> self.index & 1) == int(self.knight)
+
+    def to_cnf(self, cnf):
+        return self.index + 1 if self.knight else -(self.index + 1)
+
+    def __str__(self):
+        return f"#{self.index} is {'knight' if self.knight else 'knave'}"
+
+
+class Not:
+    def __init__(self, operand):
+        self.operand = operand
+
+    def evaluate(self, roles):
+        return not self.operand.evaluate(roles)
+
+    def evaluate_array(self, roles):
+        return ~self.operand.evaluate_array(roles)
+
+    def to_cnf(self, cnf):
+        return -self.operand.to_cnf(cnf)
+
+    def __str__(self):
+        return f"not ({self.operand})"
+
+
+class And:
+    def __init__(self, operands):
+        self.operands = operands
+
+    def evaluate(self, roles):
+        return all(operand.evaluate(roles) for operand in self.operands)
+
+    def evaluate_array(self, roles):
+        return reduce(and_, (operand.evaluate_array(roles) for operand in self.operands))
+
+    def to_cnf(self, cnf):
+        # Tseitin: result <-> operand_1 and ... and operand_k
+        literals = [operand.to_cnf(cnf) for operand in self.operands]
+        result = cnf.new_var()
+        for literal in literals:
+            cnf.add_clause([-result, literal])
+        cnf.add_clause([result] + [-literal for literal in literals])
+        return result
+
+    def __str__(self):
+        return " and ".join(f"({operand})" for operand in self.operands)
+
+
+class Or:
+    def __init__(self, operands):
+        self.operands = operands
+
+    def evaluate(self, roles):
+        return any(operand.evaluate(roles) for operand in self.operands)
+
+    def evaluate_array(self, roles):
+        return reduce(or_, (operand.evaluate_array(roles) for operand in self.operands))
+
+    def to_cnf(self, cnf):
+        # Tseitin: result <-> operand_1 or ... or operand_k
+        literals = [operand.to_cnf(cnf) for operand in self.operands]
+        result = cnf.new_var()
+        for literal in literals:
+            cnf.add_clause([result, -literal])
+        cnf.add_clause([-result] + literals)
+        return result
+
+    def __str__(self):
+        return " or ".join(f"({operand})" for operand in self.operands)
+
+
+class Xor:
+    """ True when an odd number of operands are true ("either A or B but not both" for two) """
+    def __init__(self, operands):
+        self.operands = operands
+
+    def evaluate(self, roles):
+        return sum(operand.evaluate(roles) for operand in self.operands) % 2 == 1
+
+    def evaluate_array(self, roles):
+        return reduce(xor, (operand.evaluate_array(roles) for operand in self.operands))
+
+    def to_cnf(self, cnf):
+        # Tseitin, pairwise: result <-> left xor right
+        literals = [operand.to_cnf(cnf) for operand in self.operands]
+        result = literals[0]
+        for literal in literals[1:]:
+            left, result = result, cnf.new_var()
+            cnf.add_clause([-result, left, literal])
+            cnf.add_clause([-result, -left, -literal])
+            cnf.add_clause([result, -left, literal])
+            cnf.add_clause([result, left, -literal])
+        return result
+
+    def __str__(self):
+        return " xor ".join(f"({operand})" for operand in self.operands)
+
+
+class Exactly:
+    """ Exactly `amount` of the characters `indices` are Knights (knight=True) or Knaves (knight=False) """
+    def __init__(self, indices, amount, knight=True):
+        self.indices = indices
+        self.amount = amount
+        self.knight = knight
+
+    def evaluate(self, roles):
+        knights = sum(roles >> i & 1 for i in self.indices)
+        return (knights if self.knight else len(self.indices) - knights) == self.amount
+
+    def evaluate_array(self, roles):
+        # the same arithmetic works element-wise on an array of role masks
+        return self.evaluate(roles)
+
+    def to_cnf(self, cnf):
+        # Sequential counter: at_least[c] <-> at least c of the literals seen so far are true,
+        # result <-> at_least[amount] and not at_least[amount + 1]
+        literals = [i + 1 if self.knight else -(i + 1) for i in self.indices]
+        true = cnf.new_var()
+        cnf.add_clause([true])
+        at_least = [true] + [-true] * (self.amount + 1)
+        for literal in literals:
+            counts = [true]
+            for c in range(1, self.amount + 2):
+                carried = _and_literals(cnf, [at_least[c - 1], literal])
+                counts.append(_or_literals(cnf, [at_least[c], carried]))
+            at_least = counts
+        return _and_literals(cnf, [at_least[self.amount], -at_least[self.amount + 1]])
+
+    def __str__(self):
+        role = "knights" if self.knight else "knaves"
+        return f"exactly {self.amount} of {', '.join('#' + str(i) for i in self.indices)} are {role}"
+
+
+def _and_literals(cnf, literals):
+    result = cnf.new_var()
+    for literal in literals:
+        cnf.add_clause([-result, literal])
+    cnf.add_clause([result] + [-literal for literal in literals])
+    return result
+
+
+def _or_literals(cnf, literals):
+    result = cnf.new_var()
+    for literal in literals:
+        cnf.add_clause([result, -literal])
+    cnf.add_clause([-result] + literals)
+    return result
+
+
+NOT_PREFIX = "it is not true that "
+EITHER_PREFIX = "either "
+EITHER_SUFFIX = " but not both"
+EXACTLY = re.compile(r"exactly (\d+) of (.+) (?:is a|are) (knight|knave)s?$")
+
+
+def compile_statement(statement, speaker, index_map, ns):
+    """
+    Parse a statement made by `speaker` into a predicate tree.
+    `index_map` maps character URIRefs to their bit in the role mask.
+    """
+    return _compile(statement.strip(), statement, speaker, index_map, ns)
+
+
+def _compile(text, statement, speaker, index_map, ns):
+    # keywords may start the sentence with a capital letter
+    lowered = text[:1].lower() + text[1:]
+    if lowered.startswith(NOT_PREFIX):
+        return Not(_compile(text[len(NOT_PREFIX):], statement, speaker, index_map, ns))
+    if lowered.startswith(EITHER_PREFIX) and lowered.endswith(EITHER_SUFFIX):
+        inner = text[len(EITHER_PREFIX):-len(EITHER_SUFFIX)].rstrip(",")
+        operands = [_compile_conjunction(part, statement, speaker, index_map, ns) for part in inner.split(" or ")]
+        if len(operands) < 2:
+            raise ValueError("Unknown statement: " + statement)
+        return Xor(operands)
+    match = EXACTLY.match(lowered)
+    if match:
+        amount, names, role = match.groups()
+        names = text[match.start(2):match.end(2)].replace(" and ", ", ").split(", ")
+        indices = [_character_index(name.strip(), statement, speaker, index_map, ns) for name in names]
+        return Exactly(indices, int(amount), role == "knight")
+    disjuncts = [_compile_conjunction(part, statement, speaker, index_map, ns)
+                 for part in text.split(" or ")]
+    return disjuncts[0] if len(disjuncts) == 1 else Or(disjuncts)
+
+
+def _compile_conjunction(text, statement, speaker, index_map, ns):
+    conjuncts = [_compile_atom(part, statement, speaker, index_map, ns)
+                 for part in text.split(" and ")]
+    return conjuncts[0] if len(conjuncts) == 1 else And(conjuncts)
+
+
+def _compile_atom(text, statement, speaker, index_map, ns):
+    parts = text.strip().split(maxsplit=1)
+    if len(parts) != 2 or parts[1] not in ROLE_PHRASES:
+        raise ValueError("Unknown statement: " + statement)
+    subject, phrase = parts
+    return Role(_character_index(subject, statement, speaker, index_map, ns), ROLE_PHRASES[phrase])
+
+
+def _character_index(name, statement, speaker, index_map, ns):
+    target_character = speaker if name == "I" else ns[name]
+    if target_character not in index_map:
+        raise ValueError("Unknown character in statement: " + statement)
+    return index_map[target_character]
+
+
+def combination_to_roles(combination):
+    """ ('Knight', 'Knave', ...) -> role mask """
+    roles = 0
+    for i, role in enumerate(combination):
+        if role == 'Knight':
+            roles |= 1 << i
+    return roles
+
+
+def roles_to_combination(roles, count):
+    """ role mask -> ('Knight', 'Knave', ...) """
+    return tuple('Knight' if roles >> i & 1 else 'Knave' for i in range(count))
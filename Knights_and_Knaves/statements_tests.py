@@ -0,0 +1,101 @@
+import pickle
+import unittest
+from itertools import product
+
+import numpy as np
+from rdflib import Literal, Namespace
+
+from rdf_graph import create_rdf_graph
+from reasoning import StatementIndex, compile_statements, is_consistent, is_consistent_roles, statement_index
+from statements import *
+
+NS = Namespace("http://example.org/")
+NAMES = ["Justin", "Oberon", "Larry", "Xan", "Quentin", "Hillary"]
+CHARACTERS = [NS[name] for name in NAMES]
+INDEX_MAP = {character: i for i, character in enumerate(CHARACTERS)}
+
+
+def compile_text(text, speaker="Larry"):
+    return compile_statement(text, NS[speaker], INDEX_MAP, NS)
+
+
+class CompileTests(unittest.TestCase):
+    def test_atom_phrases(self):
+        for phrase, knight in ROLE_PHRASES.items():
+            subject = "I" if phrase.startswith("am ") else "Xan"
+            predicate = compile_text(subject + " " + phrase)
+            self.assertIsInstance(predicate, Role)
+            self.assertEqual(predicate.index, 2 if subject == "I" else 3)
+            self.assertEqual(predicate.knight, knight)
+
+    def test_or_binds_looser_than_and(self):
+        predicate = compile_text("Justin is a knight and Xan lies or I am a knave")
+        self.assertIsInstance(predicate, Or)
+        self.assertIsInstance(predicate.operands[0], And)
+        self.assertIsInstance(predicate.operands[1], Role)
+
+    def test_evaluate_on_role_masks(self):
+        predicate = compile_text("Quentin is a knight or I am a knave")
+        self.assertTrue(predicate.evaluate(1 << 4 | 1 << 2))
+        self.assertTrue(predicate.evaluate(0))
+        self.assertFalse(predicate.evaluate(1 << 2))
+
+    def test_unknown_character_and_phrase_are_errors(self):
+        with self.assertRaises(ValueError):
+            compile_text("Bob is a knight")
+        with self.assertRaises(ValueError):
+            compile_text("Xan is a dragon")
+
+    def test_evaluate_array_matches_evaluate(self):
+        roles = np.arange(1 << len(NAMES), dtype=np.int64)
+        for text in ["Justin is a knave", "Quentin is a knight or I am a knave",
+                     "Oberon lies and Hillary is truthful", "it is not true that Xan lies"]:
+            predicate = compile_text(text)
+            expected = [predicate.evaluate(int(r)) for r in roles]
+            self.assertEqual(list(predicate.evaluate_array(roles)), expected)
+
+    def test_roles_round_trip(self):
+        for combination in product(["Knight", "Knave"], repeat=3):
+            self.assertEqual(roles_to_combination(combination_to_roles(combination), 3), combination)
+
+
+class ConsistencyTests(unittest.TestCase):
+    def test_original_puzzle_has_one_consistent_combination(self):
+        graph = create_rdf_graph()
+        compiled = compile_statements(graph, CHARACTERS, NS)
+        solutions = [roles for roles in range(1 << len(NAMES)) if is_consistent_roles(roles, compiled)]
+        self.assertEqual(len(solutions), 1)
+        self.assertTrue(is_consistent(roles_to_combination(solutions[0], len(NAMES)), graph, CHARACTERS, NS))
+
+    def test_changes_to_the_graph_invalidate_every_index(self):
+        graph = create_rdf_graph()
+        combination = ("Knight",) * len(NAMES)
+        self.assertFalse(is_consistent(combination, graph, CHARACTERS, NS))
+        other = StatementIndex(graph, CHARACTERS, NS)
+        self.assertEqual(sum(map(len, dict(other.compiled).values())), 7)
+        graph.remove((None, NS.says, None))
+        self.assertTrue(is_consistent(combination, graph, CHARACTERS, NS))
+        self.assertEqual(other.compiled, [(i, []) for i in range(len(NAMES))])
+
+    def test_replacing_a_statement_invalidates_the_index(self):
+        graph = create_rdf_graph()
+        index = statement_index(graph, CHARACTERS, NS)
+        before = index.compiled
+        graph.remove((NS.Larry, NS.says, Literal("Justin is a knave")))
+        graph.add((NS.Larry, NS.says, Literal("Xan is a knave")))
+        self.assertEqual(len(graph), len(create_rdf_graph()))
+        self.assertNotEqual(index.compiled, before)
+        self.assertIs(statement_index(graph, CHARACTERS, NS), statement_index(graph, CHARACTERS, NS))
+
+    def test_indexed_graph_is_not_patched_and_pickles(self):
+        graph = create_rdf_graph()
+        self.assertFalse(is_consistent(("Knight",) * len(NAMES), graph, CHARACTERS, NS))
+        self.assertEqual(vars(graph).keys(), vars(create_rdf_graph()).keys())
+        copy = pickle.loads(pickle.dumps(graph))
+        self.assertEqual(set(copy), set(graph))
+        copy.remove((None, NS.says, None))
+        self.assertTrue(is_consistent(("Knight",) * len(NAMES), copy, CHARACTERS, NS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+"""
+Knights and Knaves islands in the puzzle store, shared/puzzle_store.py: one named graph per island
+in an SQLite file.
+
+Usage: python store.py islands.db import islands/*.ttl     (puzzle id - file name without extension)
+       python store.py islands.db list
+       python store.py islands.db export island-50-1 [--format turtle]
+"""
+import os
+import sys
+
+from rdflib import Namespace
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from puzzle_store import PuzzleStore, graph_identifier, main
+
+
+def open_puzzle(path, puzzle_id, ns=None):
+    """
+    Knights and Knaves puzzle from the store: (graph, ns, characters).
+    Characters are the NamedIndividuals of the graph, in name order.
+    """
+    from reasoning import graph_characters
+
+    ns = ns or Namespace("http://example.org/")
+    with PuzzleStore(path) as store:
+        graph = store.get(puzzle_id)
+    return graph, ns, graph_characters(graph)
+
+
+if __name__ == "__main__":
+    main()
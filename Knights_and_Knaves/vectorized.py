@@ -0,0 +1,29 @@
+import numpy as np
+
+# Largest number of role masks evaluated in one NumPy pass (2^24 masks ~ 128 MB of int64)
+CHUNK_BITS = 24
+
+def consistent_mask_array(roles, compiled):
+    """
+    Evaluate the compiled statements over an array of role masks.
+    Returns a boolean array, True where the role mask is consistent.
+    """
+    consistent = np.ones(roles.shape, dtype=bool)
+    for i, statements in compiled:
+        knight = (roles >> i & 1) == 1
+        for statement in statements:
+            consistent &= statement.evaluate_array(roles) == knight
+    return consistent
+
+def solve_vectorized(compiled, count, chunk_bits=CHUNK_BITS):
+    """
+    Check all 2^count role masks, at most 2^chunk_bits of them at a time.
+    Returns (list of consistent role masks, number of consistent role masks).
+    """
+    total = 1 << count
+    chunk = 1 << min(count, chunk_bits)
+    solutions = []
+    for start in range(0, total, chunk):
+        roles = np.arange(start, min(start + chunk, total), dtype=np.int64)
+        solutions.extend(int(r) for r in roles[consistent_mask_array(roles, compiled)])
+    return solutions, len(solutions)
@@ -0,0 +1,44 @@
+import random
+import unittest
+
+from generate import NS, character_names, random_text
+from reasoning import is_consistent_roles
+from statements import compile_statement
+from vectorized import solve_vectorized
+
+
+def random_island(rng, count, statements):
+    """ Compiled statements of `statements` random sayings on an island of `count` speakers """
+    names = character_names(count)
+    index_map = {NS[name]: i for i, name in enumerate(names)}
+    compiled = [(i, []) for i in range(count)]
+    for _ in range(statements):
+        speaker = rng.randrange(count)
+        text = random_text(rng, speaker, names)
+        compiled[speaker][1].append(compile_statement(text, NS[names[speaker]], index_map, NS))
+    return compiled
+
+
+def brute_force(compiled, count):
+    return [roles for roles in range(1 << count) if is_consistent_roles(roles, compiled)]
+
+
+class VectorizedTests(unittest.TestCase):
+    def test_matches_brute_force_on_random_islands(self):
+        rng = random.Random(1)
+        for _ in range(30):
+            count = rng.randint(2, 9)
+            compiled = random_island(rng, count, rng.randint(1, count))
+            expected = brute_force(compiled, count)
+            self.assertEqual(solve_vectorized(compiled, count), (expected, len(expected)))
+
+    def test_chunks_give_the_same_solutions(self):
+        compiled = random_island(random.Random(2), 10, 6)
+        self.assertEqual(solve_vectorized(compiled, 10, chunk_bits=3), solve_vectorized(compiled, 10))
+
+    def test_no_statements_allow_everything(self):
+        self.assertEqual(solve_vectorized([(0, []), (1, [])], 2), ([0, 1, 2, 3], 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
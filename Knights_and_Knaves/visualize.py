@@ -0,0 +1,87 @@
+"""
+Knowledge graph visualization.
+
+networkx, matplotlib and pyvis are imported only inside the rendering functions,
+so the solver (which imports rdf_graph) does not pay for them.
+
+Usage: python visualize.py [--png knowledge_graph.png] [--html rdf_graph.html] [--show]
+"""
+import argparse
+
+from rdf_graph import create_rdf_graph
+
+
+def label(node):
+    """ Short label for a graph node: local name for URIs, text for literals """
+    return str(node).rsplit("/", 1)[-1].rsplit("#", 1)[-1]
+
+
+def to_networkx(rdf_graph):
+    import networkx as nx
+
+    G = nx.Graph()
+
+    # Add nodes (individuals)
+    for subj, _, _ in rdf_graph:
+        G.add_node(subj)
+
+    # Add edges (relations)
+    for subj, pred, obj in rdf_graph:
+        G.add_edge(subj, obj, label=label(pred))
+
+    return G
+
+
+def render_png(rdf_graph, path="knowledge_graph.png", show=False):
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    G = to_networkx(rdf_graph)
+
+    # Define positions for nodes using a layout algorithm (e.g., spring_layout)
+    pos = nx.spring_layout(G)
+
+    # Draw the graph with labels and customize the style
+    plt.figure(figsize=(10, 10))
+    nx.draw(G, pos, labels={node: label(node) for node in G.nodes}, with_labels=True, node_color='skyblue',
+            node_size=1000, font_size=10, font_color='black', font_weight='bold', edge_color='gray', width=1)
+
+    plt.axis('off')
+    plt.title("Knowledge Graph Visualization")
+    if path:
+        plt.savefig(path)
+    if show:
+        plt.show()
+    plt.close()
+
+
+def render_html(rdf_graph, path="rdf_graph.html"):
+    from pyvis.network import Network
+
+    net = Network(directed=True)
+    for node in {node for subj, _, obj in rdf_graph for node in (subj, obj)}:
+        net.add_node(label(node), label=label(node))
+    for subj, pred, obj in rdf_graph:
+        net.add_edge(label(subj), label(obj), title=label(pred))
+    net.write_html(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the Knights and Knaves knowledge graph")
+    parser.add_argument("--png", default="knowledge_graph.png", help="PNG output path, empty to skip")
+    parser.add_argument("--html", default="rdf_graph.html", help="HTML output path, empty to skip")
+    parser.add_argument("--show", action="store_true", help="also open the matplotlib window")
+    args = parser.parse_args()
+
+    rdf_graph = create_rdf_graph()
+    if args.png or args.show:
+        render_png(rdf_graph, args.png, show=args.show)
+    if args.html:
+        render_html(rdf_graph, args.html)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,22 @@
+import json
+import time
+from collections import deque
+from operator import attrgetter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 class Attr:
     u""" Атрибут вместе с его значениями, например 'дом (зеленый, красный, синий)' """
+    __slots__ = ('name', 'order', 'ordered_values', 'values', '_hash')
+
     def __init__(self, name, order, values):
         self.name = name
         self.order = order
+        # хеши строятся только из целых чисел, поэтому остаются верными и после распаковки pickle в другом процессе
+        self._hash = hash(order)
         self.ordered_values = [AttrValue(self, idx, v) for (idx, v) in zip(range(len(values)), values)]
         self.values = {v.value: v for v in self.ordered_values }
 
@@ -15,8 +29,13 @@ class Attr:
     def __getattr__(self, name):
         u"""Вспомогательный метод, позволяет использовать форму 'attr.name', например 'дом.зеленый', возвращает 
         соответвующее значение атрибута"""
-        if name in self.values:
-            return self.values[name]
+        # values может еще не быть заполнено (например, при распаковке pickle)
+        try:
+            values = object.__getattribute__(self, 'values')
+        except AttributeError:
+            raise AttributeError(name)
+        if name in values:
+            return values[name]
         raise AttributeError(name)
 
     def __getitem__(self, name):
@@ -25,7 +44,7 @@ class Attr:
         return self.values[name]
 
     def __hash__(self):
-        return hash((self.name, self.order))
+        return self._hash
 
     def __str__(self):
         return self.name
@@ -34,22 +53,31 @@ class Attr:
         return str(self)
 
 class AttrValue:
-    u""" Значение атрибута, например 'синий дом' """
+    u""" Значение атрибута, например 'синий дом'. Значения создаются только атрибутом, по одному на каждое значение,
+    поэтому сравниваются по идентичности. Хранит таблицу интернированных отношений с другими значениями. """
+    __slots__ = ('attr', 'index', 'value', '_hash', 'relations')
+
     def __init__(self, attr, index, value):
         self.attr = attr
         self.index = index
         self.value = value
+        self._hash = hash((attr.order, index))
+        # другое значение -> Relation
+        self.relations = {}
+
+    def __getstate__(self):
+        # отношения не сохраняются, при распаковке они интернируются заново
+        return (self.attr, self.index, self.value, self._hash)
+
+    def __setstate__(self, state):
+        self.attr, self.index, self.value, self._hash = state
+        self.relations = {}
 
     def offset_value(self, offset):
         return self.attr.value_at(self.index + offset)
 
     def __hash__(self):
-        return hash((self.attr, self.value))
-
-    def __eq__(self, other):
-        if type(self) != type(other):
-            return False
-        return self.attr == other.attr and self.value == other.value
+        return self._hash
 
     def __str__(self):
         return str(self.attr) + ":" + str(self.value)
@@ -59,21 +87,36 @@ class AttrValue:
 
 class Relation:
     u"""Отношение между двумя значениями атрибутов, например 'синий дом, держит кошку'. Само по себе не содержит
-    признака отношений (совпадает/не совпадает), и используется для адресации. В таблице отношений служит адрресом."""
-    def __init__(self, atval1, atval2):
+    признака отношений (совпадает/не совпадает), и используется для адресации. В таблице отношений служит адрресом.
+    Отношения интернированы: Relation(a, b) всегда возвращает один и тот же объект (в том числе для Relation(b, a)),
+    поэтому сравниваются по идентичности, а хеш вычисляется один раз."""
+    __slots__ = ('atval1', 'atval2', '_hash')
+
+    def __new__(cls, atval1, atval2):
+        relation = atval1.relations.get(atval2)
+        if relation is not None:
+            return relation
         assert(atval1.attr != atval2.attr)
+        relation = super().__new__(cls)
         if atval1.attr.order < atval2.attr.order:
-            self.atval1 = atval1
-            self.atval2 = atval2
+            relation.atval1 = atval1
+            relation.atval2 = atval2
         else:
-            self.atval1 = atval2
-            self.atval2 = atval1
+            relation.atval1 = atval2
+            relation.atval2 = atval1
+        relation._hash = hash((relation.atval1._hash, relation.atval2._hash))
+        atval1.relations[atval2] = relation
+        atval2.relations[atval1] = relation
+        return relation
+
+    def __reduce__(self):
+        return (Relation, (self.atval1, self.atval2))
 
     def with_attr(self, attr):
         return self.atval1.attr == attr or self.atval2.attr == attr
 
     def with_atval(self, atval):
-        return self.atval1 == atval or self.atval2 == atval
+        return self.atval1 is atval or self.atval2 is atval
 
     def atval(self, attr):
         if self.atval1.attr == attr:
@@ -83,12 +126,7 @@ class Relation:
         return None
 
     def __hash__(self) -> int:
-        return hash((self.atval1, self.atval2))
-
-    def __eq__(self, other):
-        if type(self) != type(other):
-            return False
-        return self.atval1 == other.atval1 and self.atval2 == other.atval2
+        return self._hash
     
     def __str__(self):
         return str(self.atval1) + "<->" + str(self.atval2)
@@ -96,6 +134,9 @@ class Relation:
     def __repr__(self):
         return str(self)
 
+# номер знания в решателе, ключ порядка в rules_for
+_position = attrgetter('position')
+
 class Solver:
     u"""Основной класс для решения логических задач, содержит набор знаний в таблице отношений. Знания включены как 
     исходно заданные, так и выведенные в процессе рассуждений. """
@@ -104,14 +145,79 @@ class Solver:
         self.list = []
         self.attrs = attrs
         self.demonstrate = False
+        # трассировка вывода (см. Trace), по умолчанию выключена
+        self.trace = None
+        # отношение -> знания, которые читают его при выводе (см. watched у знаний)
+        self.watches = {}
+        # значение атрибута -> знания, которые могут сделать вывод по отношениям с ним (см. atvals у знаний),
+        # и знания, которые могут сделать вывод по любому отношению
+        self.index = {}
+        self.global_rules = []
+        # очередь отношений, вывод по которым мог измениться
+        self.queue = deque()
+        self.queued = set()
+        # все отношения таблицы, интернированные заранее
+        self.table = [Relation(atval1, atval2)
+                      for i in range(len(attrs)) for attr2 in attrs[i+1:]
+                      for atval1 in attrs[i].ordered_values for atval2 in attr2.ordered_values]
+        # (order1, order2) -> номер ревизии матрицы пары атрибутов, меняется с каждым изменением в ней и никогда
+        # не повторяется (в том числе после undo)
+        self.revisions = {}
+        self.clock = 0
+        # учет сущностей (см. track), по умолчанию выключен
+        self.tracker = None
+        self.pending = deque()
+        self.draining = False
 
     def add(self, rule):
         rule.solver = self
+        # номер знания в self.list, списки знаний - стеки, поэтому номер не меняется, пока знание в решателе
+        rule.position = len(self.list)
 
         self.list.append(rule)
+        for relation in rule.watched():
+            self.watches.setdefault(relation, []).append(rule)
+        atvals = rule.atvals()
+        if atvals is None:
+            self.global_rules.append(rule)
+        else:
+            for atval in atvals:
+                self.index.setdefault(atval, []).append(rule)
         if hasattr(rule, 'relation') and rule.relation != None:
             self.map[rule.relation] = rule
+            self.touch(rule.relation)
+            if self.tracker is not None:
+                self.pending.extend(self.tracker.add(rule))
+            # новое знание об отношении: пересмотреть отношения, вывод по которым читает это отношение
+            for watcher in self.watches.get(rule.relation, ()):
+                for relation in watcher.affected(rule.relation):
+                    self.enqueue(relation)
+        for relation in rule.candidates():
+            self.enqueue(relation)
+        # знания, выведенные учетом сущностей, добавляются здесь же, без глубокой рекурсии
+        if self.pending and not self.draining:
+            self.draining = True
+            while self.pending:
+                fact = self.pending.popleft()
+                if fact.relation not in self.map:
+                    self.add(fact)
+            self.draining = False
         return self
+
+    def track(self):
+        u"""Включает учет сущностей (EntityTracker): положительные знания сразу объединяют значения в сущности,
+        отрицательные - сразу разделяют сущности целиком, все следствия добавляются в таблицу при add"""
+        if self.tracker is None:
+            self.tracker = EntityTracker(self.attrs)
+            for rule in list(self.map.values()):
+                self.pending.extend(self.tracker.add(rule))
+            self.draining = True
+            while self.pending:
+                fact = self.pending.popleft()
+                if fact.relation not in self.map:
+                    self.add(fact)
+            self.draining = False
+        return self.tracker
     
     def get(self, relation):
         if relation not in self.map:
@@ -123,10 +229,95 @@ class Solver:
 
     def is_different(self, relation):
         return relation in self.map and isinstance(self.map[relation], Different)
-    
-    def solve(self):
-        while self.iter():
-            pass
+
+    def is_same_at(self, atval1, atval2):
+        return self.is_same(atval1.relations[atval2])
+
+    def is_different_at(self, atval1, atval2):
+        return self.is_different(atval1.relations[atval2])
+
+    def all_different_except(self, fixed, sliding):
+        u"""Отношения fixed со всеми значениями атрибута sliding, кроме самого sliding, - отрицательные"""
+        for slider in sliding.attr.ordered_values:
+            if slider == sliding:
+                continue
+            if not self.is_different_at(fixed, slider):
+                return False
+        return True
+
+    def pair(self, relation):
+        u"""Ключ матрицы пары атрибутов, к которой относится отношение"""
+        return (relation.atval1.attr.order, relation.atval2.attr.order)
+
+    def revision(self, relation):
+        return self.revisions.get(self.pair(relation), 0)
+
+    def touch(self, relation):
+        self.clock += 1
+        self.revisions[self.pair(relation)] = self.clock
+
+    def relation(self, atval1, atval2):
+        u"""Интернированное отношение из таблицы, без создания нового объекта"""
+        return atval1.relations[atval2]
+
+    def relations(self):
+        u"""Все отношения таблицы отношений"""
+        return iter(self.table)
+
+    def rules_for(self, relation):
+        u"""Знания, которые могут сделать вывод по отношению: общие и проиндексированные по обоим его значениям,
+        в порядке добавления, как в self.list, чтобы вывод приписывался тому же знанию, что и при переборе всех"""
+        rules = self.global_rules + self.index.get(relation.atval1, []) + self.index.get(relation.atval2, [])
+        # каждый список уже упорядочен по номеру, сортировка только сливает их
+        rules.sort(key=_position)
+        return rules
+
+    def enqueue(self, relation):
+        if relation not in self.map and relation not in self.queued:
+            self.queued.add(relation)
+            self.queue.append(relation)
+
+    def solve(self, search=False):
+        u"""Вывод до неподвижной точки; с search=True, если таблица осталась незаполненной, - поиск с возвратом,
+        знания остаются в состоянии первого найденного решения. Возвращает True, если таблица заполнена"""
+        for relation in self.relations():
+            self.enqueue(relation)
+        self.propagate()
+        if search and len(self.map) < len(self.table):
+            return next(self.search(), None) is not None
+        return len(self.map) == len(self.table)
+
+    def propagate(self):
+        u"""Вывод по очереди отношений: каждое новое знание ставит в очередь только те отношения, вывод по которым
+        читает это знание, поэтому объем работы пропорционален числу выведенных знаний, а не числу проходов по
+        всей таблице. Возвращает True, если выведено хоть одно новое знание"""
+        success = False
+        if self.trace is not None:
+            self.trace.begin_pass('propagate')
+        while self.queue:
+            relation = self.queue.popleft()
+            self.queued.discard(relation)
+            if relation in self.map:
+                continue
+            if self.infer(relation):
+                success = True
+        if self.trace is not None:
+            self.trace.end_pass()
+        return success
+
+    def infer(self, relation):
+        u"""Применение знаний к отношению до первого вывода. Возвращает True, если сделан вывод"""
+        if self.trace is not None:
+            return self.trace.infer(self, relation)
+        for rule in self.rules_for(relation):
+            result = rule.evaluate(relation)
+            if result == None:
+                continue
+            self.add(result)
+            if self.demonstrate:
+                print(result, "     <-  ", rule)
+            return True
+        return False
 
     def iter(self):
         u"""Одна итерация рассуждений:
@@ -134,30 +325,421 @@ class Solver:
           2. К ним применяются все известные на текущий момент знания с целью вывести дополнительные знания
           3. Если за время итерации появилось хоть одно новое знание, итерация считается успешной"""
         success = False
-        for i in range(len(self.attrs)):
-            attr1 = self.attrs[i]
-            for j in range(i+1, len(self.attrs)):
-                attr2 = self.attrs[j]
-                for atval1 in attr1.ordered_values:
-                    for atval2 in attr2.ordered_values:
-                        relation = Relation(atval1, atval2)
-                        if relation in self.map:
-                            continue
-                        for rule in self.list:
-                            result = rule.evaluate(relation)
-                            if result == None:
-                                continue
-                            success = True
-                            self.add(result)
-                            if self.demonstrate:
-                                print(result, "     <-  ", rule)
-                            break
+        if self.trace is not None:
+            self.trace.begin_pass('iter')
+        for relation in self.relations():
+            if relation in self.map:
+                continue
+            if self.infer(relation):
+                success = True
+        if self.trace is not None:
+            self.trace.end_pass()
 
         return success
 
+    def mark(self):
+        u"""Текущее состояние знаний, к нему можно вернуться через undo. Журналом служит список знаний list:
+        все, что добавлено после отметки, лежит в его конце"""
+        return (len(self.list), self.tracker.mark() if self.tracker is not None else 0)
+
+    def undo(self, mark):
+        u"""Откат знаний, добавленных после mark, без копирования таблицы отношений"""
+        length, tracker_mark = mark
+        while len(self.list) > length:
+            self.retract(self.list.pop())
+        if self.tracker is not None:
+            self.tracker.undo(tracker_mark)
+        self.queue.clear()
+        self.queued.clear()
+        self.pending.clear()
+
+    def retract(self, rule):
+        for relation in rule.watched():
+            self.watches[relation].pop()
+        atvals = rule.atvals()
+        if atvals is None:
+            self.global_rules.pop()
+        else:
+            for atval in atvals:
+                self.index[atval].pop()
+        if getattr(rule, 'relation', None) != None:
+            del self.map[rule.relation]
+            self.touch(rule.relation)
+
+    def examine(self):
+        u"""Проверка строк матриц пар атрибутов. Возвращает (consistent, relation):
+          consistent - False, если в какой-то строке все отношения отрицательные или больше одного положительного,
+            либо противоречие нашел учет сущностей или другое знание (метод consistent у знания)
+          relation - неизвестное отношение из строки с наименьшим числом неизвестных (None, если таблица заполнена)"""
+        if self.tracker is not None and self.tracker.contradiction is not None:
+            return (False, None)
+        for rule in self.list:
+            if hasattr(rule, 'consistent') and not rule.consistent():
+                return (False, None)
+        best = None
+        for fixed_attr in self.attrs:
+            for attr in self.attrs:
+                if attr == fixed_attr:
+                    continue
+                for fixed in fixed_attr.ordered_values:
+                    same = 0
+                    unknown = []
+                    for atval in attr.ordered_values:
+                        if self.is_same_at(fixed, atval):
+                            same += 1
+                        elif not self.is_different_at(fixed, atval):
+                            unknown.append(atval)
+                    if same > 1 or (same == 0 and not unknown):
+                        return (False, None)
+                    if same == 0 and (best is None or len(unknown) < len(best[1])):
+                        best = (fixed, unknown)
+        if best is None:
+            return (True, None)
+        fixed, unknown = best
+        return (True, fixed.relations[unknown[0]])
+
+    def verify(self):
+        u"""Проверка заполненной таблицы: положительные отношения образуют сущности (транзитивны),
+        и ни одно знание-правило не выводит ничего, противоречащего таблице"""
+        first = self.attrs[0]
+        for atval in first.ordered_values:
+            entity = [atval] + [next(other for other in attr.ordered_values if self.is_same_at(atval, other))
+                                for attr in self.attrs[1:]]
+            for i in range(1, len(entity)):
+                for j in range(i + 1, len(entity)):
+                    if not self.is_same_at(entity[i], entity[j]):
+                        return False
+        for rule in self.list:
+            if getattr(rule, 'relation', None) != None:
+                continue
+            for relation in self.relations():
+                result = rule.evaluate(relation)
+                if result != None and type(result) != type(self.map[relation]):
+                    return False
+        return True
+
+    def search(self, limit=None):
+        u"""Поиск с возвратом, когда правила больше ничего не выводят: выбирается неизвестное отношение из самой
+        ограниченной строки, сначала предполагается, что оно положительное, затем - что отрицательное, после
+        каждого предположения выполняется вывод. Противоречие - возврат, откат выполняется по журналу (undo).
+        Генератор, отдает решатель в состоянии очередного решения (не более limit решений)"""
+        self.propagate()
+        found = 0
+        for solution in self.branch():
+            yield solution
+            found += 1
+            if limit is not None and found >= limit:
+                return
+
+    def branch(self):
+        consistent, relation = self.examine()
+        if not consistent:
+            return
+        if relation is None:
+            if self.verify():
+                yield self
+            return
+        for fact in (Same(relation), Different(relation)):
+            mark = self.mark()
+            self.add(fact)
+            self.propagate()
+            yield from self.branch()
+            self.undo(mark)
+
+    def count_solutions(self, limit=None):
+        u"""Число решений (не более limit), знания после подсчета возвращаются в исходное состояние"""
+        mark = self.mark()
+        count = 0
+        for _ in self.search(limit):
+            count += 1
+        self.undo(mark)
+        return count
+
     def __contains__(self, relation):
         return relation in self.map
 
+class Trace:
+    u"""Трассировка вывода, включается через solver.trace = Trace(). Собирает:
+      - по проходам (iter или propagate): просмотрено отношений, вызовов evaluate, выведено знаний, время;
+      - по классам знаний: вызовов evaluate, выводов (доля выводов), суммарное время evaluate;
+      - с events=True - последовательность выводов (знание, откуда выведено, проход, время),
+        которую можно сохранить в JSON (to_json) или в формате Chrome trace (to_chrome_trace,
+        открывается в chrome://tracing и Perfetto)."""
+    def __init__(self, events=True):
+        self.events = [] if events else None
+        self.passes = []
+        # имя класса знания -> [вызовов evaluate, выводов, время]
+        self.rules = {}
+        self.start = time.perf_counter()
+        self.current = None
+
+    def begin_pass(self, kind):
+        self.current = {'pass': len(self.passes) + 1, 'kind': kind, 'relations': 0, 'evaluations': 0,
+                        'facts': 0, 'start': time.perf_counter() - self.start, 'time': 0.0}
+        self.passes.append(self.current)
+
+    def end_pass(self):
+        self.current['time'] = time.perf_counter() - self.start - self.current['start']
+        self.current = None
+
+    def infer(self, solver, relation):
+        u"""То же, что Solver.infer, с учетом каждого вызова evaluate"""
+        current = self.current
+        if current is not None:
+            current['relations'] += 1
+        for rule in solver.rules_for(relation):
+            name = type(rule).__name__
+            counters = self.rules.get(name)
+            if counters is None:
+                counters = self.rules[name] = [0, 0, 0.0]
+            begin = time.perf_counter()
+            result = rule.evaluate(relation)
+            elapsed = time.perf_counter() - begin
+            counters[0] += 1
+            counters[2] += elapsed
+            if current is not None:
+                current['evaluations'] += 1
+            if result == None:
+                continue
+            counters[1] += 1
+            if current is not None:
+                current['facts'] += 1
+            if self.events is not None:
+                self.events.append({'fact': str(result), 'rule': str(rule), 'class': name,
+                                    'pass': current['pass'] if current is not None else None,
+                                    'ts': begin - self.start, 'dur': elapsed})
+            solver.add(result)
+            if solver.demonstrate:
+                print(result, "     <-  ", rule)
+            return True
+        return False
+
+    def report(self):
+        u"""Сводка: проходы и статистика по классам знаний (по убыванию времени)"""
+        rules = [{'class': name, 'evaluations': evaluations, 'hits': hits,
+                  'hit_rate': hits / evaluations if evaluations else 0.0, 'time': elapsed}
+                 for name, (evaluations, hits, elapsed) in self.rules.items()]
+        rules.sort(key=lambda row: -row['time'])
+        return {'passes': self.passes, 'rules': rules}
+
+    def format_report(self):
+        lines = [f"{'pass':>4} {'kind':<10} {'relations':>9} {'evals':>9} {'facts':>6} {'ms':>8}"]
+        for row in self.passes:
+            lines.append(f"{row['pass']:>4} {row['kind']:<10} {row['relations']:>9} {row['evaluations']:>9} "
+                         f"{row['facts']:>6} {row['time'] * 1e3:>8.2f}")
+        lines.append("")
+        lines.append(f"{'rule':<14} {'evals':>9} {'hits':>7} {'rate':>6} {'ms':>8}")
+        for row in self.report()['rules']:
+            lines.append(f"{row['class']:<14} {row['evaluations']:>9} {row['hits']:>7} "
+                         f"{row['hit_rate']:>6.3f} {row['time'] * 1e3:>8.2f}")
+        return "\n".join(lines)
+
+    def to_json(self, path=None):
+        u"""Сводка и последовательность выводов в JSON; с path - записывается в файл"""
+        data = dict(self.report(), events=self.events or [])
+        if path is None:
+            return json.dumps(data, ensure_ascii=False)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+
+    def to_chrome_trace(self, path=None):
+        u"""Проходы и выводы в формате Chrome trace event (время в микросекундах)"""
+        events = [{'name': row['kind'] + " " + str(row['pass']), 'cat': 'pass', 'ph': 'X', 'pid': 0, 'tid': 0,
+                   'ts': row['start'] * 1e6, 'dur': row['time'] * 1e6,
+                   'args': {key: row[key] for key in ('relations', 'evaluations', 'facts')}}
+                  for row in self.passes]
+        events += [{'name': event['class'], 'cat': 'rule', 'ph': 'X', 'pid': 0, 'tid': 1,
+                    'ts': event['ts'] * 1e6, 'dur': event['dur'] * 1e6,
+                    'args': {'fact': event['fact'], 'rule': event['rule']}}
+                   for event in self.events or []]
+        data = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        if path is None:
+            return json.dumps(data, ensure_ascii=False)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+
+class EntityTracker:
+    u"""Учет сущностей: значения атрибутов, про которые известно, что они принадлежат одной сущности, объединяются
+    в классы (система непересекающихся множеств), а отрицательные знания хранятся между классами. Поэтому
+    транзитивные следствия (A=B, B=C -> A=C; A=B, B~C -> A~C) получаются сразу при добавлении знания, а не
+    по одному отношению за проход.
+    Объединение без сжатия путей, все изменения пишутся в журнал, поэтому их можно откатить (mark/undo).
+    Противоречие (два значения одного атрибута в одной сущности, или сущность, отличная от самой себя)
+    записывается в contradiction."""
+    def __init__(self, attrs):
+        self.parent = {}
+        self.size = {}
+        self.members = {}
+        # корень -> корни классов, про которые известно, что это другие сущности (могут быть устаревшие не-корни)
+        self.diffs = {}
+        for attr in attrs:
+            for atval in attr.ordered_values:
+                self.parent[atval] = atval
+                self.size[atval] = 1
+                self.members[atval] = [atval]
+                # значения одного атрибута - всегда разные сущности
+                self.diffs[atval] = {other for other in attr.ordered_values if other is not atval}
+        self.trail = []
+        self.contradiction = None
+
+    def find(self, atval):
+        while self.parent[atval] is not atval:
+            atval = self.parent[atval]
+        return atval
+
+    def same(self, atval1, atval2):
+        return self.find(atval1) is self.find(atval2)
+
+    def different(self, atval1, atval2):
+        return self.find(atval2) in self.diffs[self.find(atval1)]
+
+    def entity(self, atval):
+        u"""Все значения, принадлежащие той же сущности"""
+        return list(self.members[self.find(atval)])
+
+    def add(self, rule):
+        u"""Учесть знание, возвращает список выведенных из него знаний"""
+        facts = []
+        relation = rule.relation
+        if isinstance(rule, Same):
+            self.union(relation, facts)
+        elif isinstance(rule, Different):
+            self.separate(relation, self.find(relation.atval1), self.find(relation.atval2), facts)
+        return facts
+
+    def union(self, relation, facts):
+        x = self.find(relation.atval1)
+        y = self.find(relation.atval2)
+        if x is y:
+            return
+        if y in self.diffs[x] or any(u.attr == v.attr for u in self.members[x] for v in self.members[y]):
+            self.contradiction = relation
+            return
+        if self.size[x] > self.size[y]:
+            x, y = y, x
+        x_members = list(self.members[x])
+        y_members = list(self.members[y])
+        x_diffs = {self.find(w) for w in self.diffs[x]}
+        y_diffs = {self.find(w) for w in self.diffs[y]}
+
+        self.parent[x] = y
+        self.size[y] += self.size[x]
+        self.members[y].extend(x_members)
+        added = []
+        for z in x_diffs:
+            if z not in self.diffs[y]:
+                self.diffs[y].add(z)
+                added.append((y, z))
+            if y not in self.diffs[z]:
+                self.diffs[z].add(y)
+                added.append((z, y))
+        self.trail.append(('union', x, y, len(y_members), added))
+
+        for u in x_members:
+            for v in y_members:
+                facts.append(Same(Relation(u, v)))
+        for z in x_diffs - y_diffs:
+            self.differences(y_members, self.members[z], facts)
+        for z in y_diffs - x_diffs:
+            self.differences(x_members, self.members[z], facts)
+
+    def separate(self, relation, x, y, facts):
+        if x is y:
+            self.contradiction = relation
+            return
+        if y in self.diffs[x]:
+            return
+        self.diffs[x].add(y)
+        self.diffs[y].add(x)
+        self.trail.append(('separate', x, y))
+        self.differences(self.members[x], self.members[y], facts)
+
+    def differences(self, members1, members2, facts):
+        for u in members1:
+            for v in members2:
+                if u.attr != v.attr:
+                    facts.append(Different(Relation(u, v)))
+
+    def mark(self):
+        u"""Текущая позиция журнала, к ней можно вернуться через undo"""
+        return len(self.trail)
+
+    def undo(self, mark):
+        while len(self.trail) > mark:
+            entry = self.trail.pop()
+            if entry[0] == 'union':
+                _, x, y, y_size, added = entry
+                self.parent[x] = x
+                self.size[y] -= self.size[x]
+                del self.members[y][y_size:]
+                for owner, other in added:
+                    self.diffs[owner].discard(other)
+            else:
+                _, x, y = entry
+                self.diffs[x].discard(y)
+                self.diffs[y].discard(x)
+        self.contradiction = None
+
+# Состояния ячеек матриц MatrixSolver
+UNKNOWN = 0
+SAME = 1
+DIFFERENT = 2
+
+class MatrixSolver(Solver):
+    u"""Решатель с альтернативным хранилищем знаний: для каждой пары атрибутов - плотная матрица int8
+    (UNKNOWN/SAME/DIFFERENT), индексированная AttrValue.index. Запросы знаний не создают объектов Relation,
+    а проверка 'все значения строки, кроме одного, - отрицательные' выполняется одной векторной операцией.
+    Требует numpy."""
+    def __init__(self, attrs):
+        if np is None:
+            raise ImportError("MatrixSolver requires numpy")
+        super().__init__(attrs)
+        # matrices[order1][order2] - матрица пары атрибутов, для обратного порядка - транспонированное представление
+        self.matrices = {attr.order: {} for attr in attrs}
+        for i, attr1 in enumerate(attrs):
+            for attr2 in attrs[i+1:]:
+                matrix = np.zeros((len(attr1.ordered_values), len(attr2.ordered_values)), dtype=np.int8)
+                self.matrices[attr1.order][attr2.order] = matrix
+                self.matrices[attr2.order][attr1.order] = matrix.T
+
+    def add(self, rule):
+        relation = getattr(rule, 'relation', None)
+        if relation != None:
+            atval1 = relation.atval1
+            atval2 = relation.atval2
+            self.matrices[atval1.attr.order][atval2.attr.order][atval1.index, atval2.index] = \
+                SAME if isinstance(rule, Same) else DIFFERENT
+        return super().add(rule)
+
+    def retract(self, rule):
+        relation = getattr(rule, 'relation', None)
+        if relation != None:
+            self.matrices[relation.atval1.attr.order][relation.atval2.attr.order][
+                relation.atval1.index, relation.atval2.index] = UNKNOWN
+        super().retract(rule)
+
+    def state(self, atval1, atval2):
+        return self.matrices[atval1.attr.order][atval2.attr.order][atval1.index, atval2.index]
+
+    def is_same(self, relation):
+        return self.state(relation.atval1, relation.atval2) == SAME
+
+    def is_different(self, relation):
+        return self.state(relation.atval1, relation.atval2) == DIFFERENT
+
+    def is_same_at(self, atval1, atval2):
+        return self.state(atval1, atval2) == SAME
+
+    def is_different_at(self, atval1, atval2):
+        return self.state(atval1, atval2) == DIFFERENT
+
+    def all_different_except(self, fixed, sliding):
+        row = self.matrices[fixed.attr.order][sliding.attr.order][fixed.index]
+        different = np.count_nonzero(row == DIFFERENT)
+        if row[sliding.index] == DIFFERENT:
+            different -= 1
+        return different == len(row) - 1
+
 class Different:
     u"""Знание о том, что отношение между двумя значениями двух атрибутов - отрицательное. Например, 'англичанин не живет в
     зеленом доме'. Знание-маркер, не содержит обработки данных и не может само по себе вывести другое знание."""
@@ -168,6 +750,18 @@ class Different:
     def evaluate(self, relation):
         return None
 
+    def atvals(self):
+        return ()
+
+    def watched(self):
+        return ()
+
+    def affected(self, relation):
+        return ()
+
+    def candidates(self):
+        return ()
+
     def __str__(self):
         return "Different " + str(self.relation)
 
@@ -198,22 +792,59 @@ class Same:
             
         if relation.with_atval(a1):
             rel_a2 = relation.atval2 if relation.atval1 == a1 else relation.atval1
-            proxy_rel = Relation(a2, rel_a2)
-            if self.solver.is_same(proxy_rel):
+            if self.solver.is_same_at(a2, rel_a2):
                 return Same(relation)
-            if self.solver.is_different(proxy_rel):
+            if self.solver.is_different_at(a2, rel_a2):
                 return Different(relation)
         
         if relation.with_atval(a2):
             rel_a2 = relation.atval2 if relation.atval1 == a2 else relation.atval1
-            proxy_rel = Relation(a1, rel_a2)
-            if self.solver.is_same(proxy_rel):
+            if self.solver.is_same_at(a1, rel_a2):
                 return Same(relation)
-            if self.solver.is_different(proxy_rel):
+            if self.solver.is_different_at(a1, rel_a2):
                 return Different(relation)
 
         return None
 
+    def atvals(self):
+        u"""Вывод возможен только по отношениям с a1 или a2"""
+        return (self.relation.atval1, self.relation.atval2)
+
+    def watched(self):
+        u"""Отношения, которые читает вывод: (a1, X) - при выводе (a2, X), и наоборот"""
+        a1 = self.relation.atval1
+        a2 = self.relation.atval2
+        for attr in self.solver.attrs:
+            if attr == a1.attr or attr == a2.attr:
+                continue
+            for atval in attr.ordered_values:
+                yield Relation(a1, atval)
+                yield Relation(a2, atval)
+
+    def affected(self, relation):
+        u"""Отношения, вывод по которым читает relation"""
+        a1 = self.relation.atval1
+        a2 = self.relation.atval2
+        if relation.with_atval(a1):
+            other = relation.atval2 if relation.atval1 == a1 else relation.atval1
+            if other.attr != a2.attr:
+                yield Relation(a2, other)
+        if relation.with_atval(a2):
+            other = relation.atval2 if relation.atval1 == a2 else relation.atval1
+            if other.attr != a1.attr:
+                yield Relation(a1, other)
+
+    def candidates(self):
+        u"""Отношения, по которым знание может сделать вывод: все отношения с a1 или a2"""
+        a1 = self.relation.atval1
+        a2 = self.relation.atval2
+        for attr in self.solver.attrs:
+            for atval in attr.ordered_values:
+                if attr != a1.attr:
+                    yield Relation(a1, atval)
+                if attr != a2.attr:
+                    yield Relation(a2, atval)
+
     def __str__(self):
         return "Same " + str(self.relation)
     
@@ -235,12 +866,28 @@ class AtLeastOnce:
             return Same(relation)
 
     def check_all_filled(self, fixed: AttrValue, sliding: AttrValue):
-        for slider in sliding.attr.values.values():
-            if slider == sliding:
-                continue
-            if not self.solver.is_different(Relation(fixed, slider)):
-                return False
-        return True
+        return self.solver.all_different_except(fixed, sliding)
+
+    def atvals(self):
+        u"""Вывод возможен по любому отношению"""
+        return None
+
+    def watched(self):
+        return self.solver.relations()
+
+    def affected(self, relation):
+        u"""Вывод по (A, B) читает отношения A со всеми остальными значениями атрибута B, и наоборот"""
+        a1 = relation.atval1
+        a2 = relation.atval2
+        for atval in a2.attr.ordered_values:
+            if atval != a2:
+                yield Relation(a1, atval)
+        for atval in a1.attr.ordered_values:
+            if atval != a1:
+                yield Relation(a2, atval)
+
+    def candidates(self):
+        return self.solver.relations()
     
     def __str__(self):
         return "Exclusive"
@@ -280,21 +927,47 @@ class Offset:
         if relation.with_atval(self.atval1):
             offset_val = cur_offset_val.offset_value(-self.offset)
             if (offset_val == None
-                or self.solver.is_different(Relation(offset_val, self.atval2))):
+                or self.solver.is_different_at(offset_val, self.atval2)):
                 return Different(relation)
             if (offset_val != None
-                and self.solver.is_same(Relation(offset_val, self.atval2))):
+                and self.solver.is_same_at(offset_val, self.atval2)):
                 return Same(relation)
 
         if relation.with_atval(self.atval2):
             offset_val = cur_offset_val.offset_value(+self.offset)
             if (offset_val == None
-                or self.solver.is_different(Relation(offset_val, self.atval1))):
+                or self.solver.is_different_at(offset_val, self.atval1)):
                 return Different(relation)
             if (offset_val != None
-                and self.solver.is_same(Relation(offset_val, self.atval1))):
+                and self.solver.is_same_at(offset_val, self.atval1)):
                 return Same(relation)
             
+    def atvals(self):
+        return (self.atval1, self.atval2)
+
+    def watched(self):
+        for offset_val in self.offset_attr.ordered_values:
+            for atval in (self.atval1, self.atval2):
+                if atval.attr != self.offset_attr:
+                    yield Relation(offset_val, atval)
+
+    def affected(self, relation):
+        u"""Вывод по (X, atval1) читает (X-offset, atval2), вывод по (X, atval2) читает (X+offset, atval1)"""
+        if not relation.with_attr(self.offset_attr):
+            return
+        cur_offset_val = relation.atval(self.offset_attr)
+        if relation.with_atval(self.atval2):
+            offset_val = cur_offset_val.offset_value(+self.offset)
+            if offset_val != None and self.atval1.attr != self.offset_attr:
+                yield Relation(offset_val, self.atval1)
+        if relation.with_atval(self.atval1):
+            offset_val = cur_offset_val.offset_value(-self.offset)
+            if offset_val != None and self.atval2.attr != self.offset_attr:
+                yield Relation(offset_val, self.atval2)
+
+    def candidates(self):
+        return self.watched()
+
     def __str__(self):
         return "Offset " + str(self.atval1) + ":" + str(self.offset_attr) + "(" + str(self.offset) + "):" + str(self.atval2)
 
@@ -338,41 +1011,220 @@ class Distance:
         
         if relation.with_atval(self.atval1):
             if ((left_distance_val == None
-                    or self.solver.is_different(Relation(left_distance_val, self.atval2)))
+                    or self.solver.is_different_at(left_distance_val, self.atval2))
                 and (right_distance_val == None
-                    or self.solver.is_different(Relation(right_distance_val, self.atval2)))):
+                    or self.solver.is_different_at(right_distance_val, self.atval2))):
                 return Different(relation)
             
             if (left_distance_val != None
-                and self.solver.is_same(Relation(left_distance_val, self.atval2))
+                and self.solver.is_same_at(left_distance_val, self.atval2)
                 and (far_left_distance_val == None
-                    or self.solver.is_different(Relation(far_left_distance_val, self.atval1)))):
+                    or self.solver.is_different_at(far_left_distance_val, self.atval1))):
                 return Same(relation)
 
             if (right_distance_val != None
-                and self.solver.is_same(Relation(right_distance_val, self.atval2))
+                and self.solver.is_same_at(right_distance_val, self.atval2)
                 and (far_right_distance_val == None
-                    or self.solver.is_different(Relation(far_right_distance_val, self.atval1)))):
+                    or self.solver.is_different_at(far_right_distance_val, self.atval1))):
                 return Same(relation)
             
         if relation.with_atval(self.atval2):
             if ((left_distance_val == None
-                    or self.solver.is_different(Relation(left_distance_val, self.atval1)))
+                    or self.solver.is_different_at(left_distance_val, self.atval1))
                 and (right_distance_val == None
-                    or self.solver.is_different(Relation(right_distance_val, self.atval1)))):
+                    or self.solver.is_different_at(right_distance_val, self.atval1))):
                 return Different(relation)
             
             if (left_distance_val != None
-                and self.solver.is_same(Relation(left_distance_val, self.atval1))
+                and self.solver.is_same_at(left_distance_val, self.atval1)
                 and (far_left_distance_val == None
-                    or self.solver.is_different(Relation(far_left_distance_val, self.atval2)))):
+                    or self.solver.is_different_at(far_left_distance_val, self.atval2))):
                 return Same(relation)
 
             if (right_distance_val != None
-                and self.solver.is_same(Relation(right_distance_val, self.atval1))
+                and self.solver.is_same_at(right_distance_val, self.atval1)
                 and (far_right_distance_val == None
-                    or self.solver.is_different(Relation(far_right_distance_val, self.atval2)))):
+                    or self.solver.is_different_at(far_right_distance_val, self.atval2))):
                 return Same(relation)
             
+    def atvals(self):
+        return (self.atval1, self.atval2)
+
+    def watched(self):
+        for distance_val in self.distance_attr.ordered_values:
+            for atval in (self.atval1, self.atval2):
+                if atval.attr != self.distance_attr:
+                    yield Relation(distance_val, atval)
+
+    def affected(self, relation):
+        u"""Вывод по (X, atval1) читает (X±distance, atval2) и (X±2*distance, atval1), и наоборот"""
+        if not relation.with_attr(self.distance_attr):
+            return
+        cur_distance_val = relation.atval(self.distance_attr)
+        for atval, other in ((self.atval1, self.atval2), (self.atval2, self.atval1)):
+            if not relation.with_atval(atval):
+                continue
+            for step, target in ((self.distance, other), (2*self.distance, atval)):
+                if target.attr == self.distance_attr:
+                    continue
+                for offset in (-step, +step):
+                    distance_val = cur_distance_val.offset_value(offset)
+                    if distance_val != None:
+                        yield Relation(distance_val, target)
+
+    def candidates(self):
+        return self.watched()
+
     def __str__(self):
         return "Distance " + str(self.atval1) + ":" + str(self.distance_attr) + "(" + str(self.distance) + "):" + str(self.atval2)
+
+class AllDifferent:
+    u"""Знание: значения двух атрибутов связаны взаимно однозначно, т.е. матрица пары атрибутов - перестановка.
+    В отличие от AtLeastOnce, рассматривает матрицу целиком: по теореме Холла (паросочетания в двудольном графе
+    'значение A - допустимое значение B') отрицательными выводятся все отношения, которые не входят ни в одно
+    полное паросочетание, а положительными - те, без которых паросочетание невозможно. Так за один раз
+    выводится, например, что если два дома могут быть только красным или зеленым, то остальные дома - не красные
+    и не зеленые.
+    Вывод по паре атрибутов кешируется и пересчитывается только при изменении ревизии её матрицы. Если полного
+    паросочетания нет, знания противоречивы: contradiction содержит пару атрибутов, вывод не делается."""
+    def __init__(self):
+        self.solver = None
+        # (order1, order2) -> (ревизия, {отношение: Same или Different} или None, если полного паросочетания нет)
+        self.cache = {}
+        self.contradiction = None
+
+    def evaluate(self, relation):
+        key = self.solver.pair(relation)
+        revision = self.solver.revision(relation)
+        cached = self.cache.get(key)
+        if cached is None or cached[0] != revision:
+            cached = (revision, self.infer(relation.atval1.attr, relation.atval2.attr))
+            self.cache[key] = cached
+        if cached[1] is None:
+            return None
+        result = cached[1].get(relation)
+        if result is None:
+            return None
+        return result(relation)
+
+    def consistent(self):
+        u"""False, если для какой-то пары атрибутов в текущем состоянии известно, что полного паросочетания нет"""
+        for key, (revision, result) in self.cache.items():
+            if result is None and self.solver.revisions.get(key, 0) == revision:
+                return False
+        return True
+
+    def infer(self, attr1, attr2):
+        u"""Выводы по матрице пары атрибутов (алгоритм Режина): ищется полное паросочетание, затем компоненты
+        сильной связности графа чередующихся путей; ребро вне паросочетания и между разными компонентами
+        не входит ни в одно полное паросочетание"""
+        rows = attr1.ordered_values
+        cols = attr2.ordered_values
+        n = len(rows)
+        if n != len(cols):
+            return {}
+
+        # допустимые значения: не отрицательные, а при положительном отношении - только оно
+        allowed = [[c for c in range(n) if not self.solver.is_different_at(rows[r], cols[c])] for r in range(n)]
+        for r in range(n):
+            for c in range(n):
+                if self.solver.is_same_at(rows[r], cols[c]):
+                    allowed[r] = [c]
+                    for other in range(n):
+                        if other != r and c in allowed[other]:
+                            allowed[other].remove(c)
+
+        match_col = [None] * n
+
+        def augment(r, seen):
+            for c in allowed[r]:
+                if c in seen:
+                    continue
+                seen.add(c)
+                if match_col[c] is None or augment(match_col[c], seen):
+                    match_col[c] = r
+                    return True
+            return False
+
+        for r in range(n):
+            if not augment(r, set()):
+                self.contradiction = (attr1, attr2)
+                return None
+        match_row = [None] * n
+        for c in range(n):
+            match_row[match_col[c]] = c
+
+        # граф: строки 0..n-1, столбцы n..2n-1; ребро паросочетания - строка -> столбец, остальные - столбец -> строка
+        edges = [[] for _ in range(2 * n)]
+        for r in range(n):
+            for c in allowed[r]:
+                if match_row[r] == c:
+                    edges[r].append(n + c)
+                else:
+                    edges[n + c].append(r)
+        component = strongly_connected(edges)
+
+        result = {}
+        for r in range(n):
+            for c in range(n):
+                relation = rows[r].relations[cols[c]]
+                if relation in self.solver:
+                    continue
+                if c not in allowed[r] or (match_row[r] != c and component[r] != component[n + c]):
+                    result[relation] = Different
+                elif len(allowed[r]) == 1 or all(component[r] != component[n + other]
+                                                 for other in allowed[r] if other != c):
+                    result[relation] = Same
+        return result
+
+    def atvals(self):
+        return None
+
+    def watched(self):
+        return self.solver.relations()
+
+    def affected(self, relation):
+        u"""Вывод по любому отношению пары атрибутов читает всю матрицу этой пары"""
+        for atval1 in relation.atval1.attr.ordered_values:
+            for atval2 in relation.atval2.attr.ordered_values:
+                yield atval1.relations[atval2]
+
+    def candidates(self):
+        return self.solver.relations()
+
+    def __str__(self):
+        return "AllDifferent"
+
+def strongly_connected(edges):
+    u"""Номера компонент сильной связности (алгоритм Тарьяна) для графа в виде списков смежности"""
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    component = [None] * len(edges)
+    counter = [0, 0]
+
+    def visit(v):
+        index[v] = low[v] = counter[0]
+        counter[0] += 1
+        stack.append(v)
+        on_stack.add(v)
+        for w in edges[v]:
+            if w not in index:
+                visit(w)
+                low[v] = min(low[v], low[w])
+            elif w in on_stack:
+                low[v] = min(low[v], index[w])
+        if low[v] == index[v]:
+            while True:
+                w = stack.pop()
+                on_stack.discard(w)
+                component[w] = counter[1]
+                if w == v:
+                    break
+            counter[1] += 1
+
+    for v in range(len(edges)):
+        if v not in index:
+            visit(v)
+    return component
@@ -0,0 +1,168 @@
+u"""Пакетное решение загадок в формате einstein.txt на пуле процессов.
+
+Вход - каталог с файлами *.txt или JSONL-поток ({"id": ..., "puzzle": "<текст загадки>"} в каждой строке),
+выход - JSONL, по строке на загадку, в порядке входа:
+  {"id": ..., "answers": [[вопрос, ответ или null], ...], "solved": true, "passes": 3, "facts": 375, "time": 0.01}
+passes - число проходов iter (только для --engine iter, для propagate - null).
+Итоговая пропускная способность печатается в stderr.
+
+Вход читается по мере решения: процессам уходят пачки по chunksize загадок, в работе не больше двух пачек
+на процесс, поэтому поток можно подавать без предварительной загрузки целиком. Ошибка в одной загадке
+(в том числе неверная строка JSON) становится строкой {"id": ..., "error": ...} и не останавливает пакет.
+
+Usage: python einstein_batch.py puzzles/ [-o results.jsonl] [--workers 8] [--chunksize 16]
+                                [--engine propagate|iter] [--search] [--track]
+       python einstein_batch.py puzzles.jsonl
+       cat puzzles.jsonl | python einstein_batch.py -
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from einstein_dsl import load, parse
+
+# загадок в пачке для процесса по умолчанию
+CHUNKSIZE = 16
+# пачек в работе на процесс
+PENDING_PER_WORKER = 2
+
+def read_items(source):
+    u"""Загадки из каталога (id - имя файла) или JSONL-файла/потока ('-' - stdin)"""
+    if source != '-' and os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith('.txt'):
+                yield {'id': name, 'path': os.path.join(source, name)}
+        return
+    stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+    try:
+        for i, line in enumerate(stream):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as error:
+                yield {'id': i, 'error': "bad JSON: " + str(error)}
+                continue
+            if not isinstance(item, dict):
+                yield {'id': i, 'error': "expected a JSON object"}
+                continue
+            item.setdefault('id', i)
+            yield item
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def solve_item(item, engine="propagate", search=False, track=False, cache=True):
+    u"""Решение одной загадки в процессе пула, результат - словарь для строки JSONL"""
+    start = time.perf_counter()
+    if 'error' in item:
+        return {'id': item['id'], 'error': item['error'], 'time': 0.0}
+    try:
+        if 'path' in item:
+            puzzle, solver = load(item['path'], cache=cache)
+        else:
+            puzzle = parse(item['puzzle'].splitlines())
+            solver = puzzle.solver()
+        if track:
+            solver.track()
+        if engine == "iter":
+            passes = 0
+            while solver.iter():
+                passes += 1
+            solved = len(solver.map) == len(solver.table)
+        else:
+            passes = None
+            solved = solver.solve()
+        if search and not solved:
+            solved = solver.solve(search=True)
+        answers = [[str(atval), str(found) if found is not None else None]
+                   for atval, found in puzzle.answer(solver)]
+        return {'id': item['id'], 'answers': answers, 'solved': solved, 'passes': passes,
+                'facts': len(solver.map), 'time': time.perf_counter() - start}
+    except (OSError, ValueError) as error:
+        return {'id': item['id'], 'error': str(error), 'time': time.perf_counter() - start}
+    except Exception as error:
+        # любая другая ошибка тоже относится только к этой загадке
+        return {'id': item['id'], 'error': type(error).__name__ + ": " + str(error),
+                'time': time.perf_counter() - start}
+
+class _Task:
+    u"""Решение пачки загадок в процессе пула с параметрами решения (lambda не передается в другой процесс)"""
+    def __init__(self, engine, search, track, cache):
+        self.engine = engine
+        self.search = search
+        self.track = track
+        self.cache = cache
+
+    def __call__(self, items):
+        return [solve_item(item, self.engine, self.search, self.track, self.cache) for item in items]
+
+def _chunks(items, size):
+    iterator = iter(items)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+def run(items, out, workers=None, chunksize=None, engine="propagate", search=False, track=False, cache=True):
+    u"""Решает загадки на пуле из workers процессов, пишет результаты в out по мере готовности.
+    Загадки передаются процессам пачками по chunksize (по умолчанию CHUNKSIZE) и читаются из items лениво,
+    не больше PENDING_PER_WORKER пачек на процесс вперед.
+    Возвращает статистику: число загадок, решенных, с ошибками, время и загадок в секунду"""
+    workers = workers or os.cpu_count() or 1
+    chunksize = chunksize or CHUNKSIZE
+    stats = {'puzzles': 0, 'solved': 0, 'errors': 0}
+    start = time.perf_counter()
+
+    def write(results):
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            stats['puzzles'] += 1
+            stats['solved'] += bool(result.get('solved'))
+            stats['errors'] += 'error' in result
+
+    task = _Task(engine, search, track, cache)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # очередь пачек в порядке входа, результаты пишутся в том же порядке
+        pending = deque()
+        for chunk in _chunks(items, chunksize):
+            pending.append(executor.submit(task, chunk))
+            if len(pending) >= workers * PENDING_PER_WORKER:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    stats['time'] = time.perf_counter() - start
+    stats['per_second'] = stats['puzzles'] / stats['time'] if stats['time'] else 0.0
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve many einstein.txt puzzles on a process pool")
+    parser.add_argument("source", help="directory of *.txt puzzles, JSONL file, or - for JSONL on stdin")
+    parser.add_argument("-o", "--output", help="JSONL output path, stdout by default")
+    parser.add_argument("--workers", type=int, help="worker processes, all cores by default")
+    parser.add_argument("--chunksize", type=int, help=f"puzzles sent to a worker at once, {CHUNKSIZE} by default")
+    parser.add_argument("--engine", choices=["propagate", "iter"], default="propagate",
+                        help="worklist propagation, or full iter passes (reports the pass count)")
+    parser.add_argument("--search", action="store_true", help="backtrack if the rules alone do not fill the table")
+    parser.add_argument("--track", action="store_true", help="track entities (transitive Same/Different)")
+    parser.add_argument("--no-cache", action="store_true", help="always parse puzzle files")
+    args = parser.parse_args()
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        stats = run(read_items(args.source), out, args.workers, args.chunksize,
+                    args.engine, args.search, args.track, not args.no_cache)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{stats['puzzles']} puzzles ({stats['solved']} solved, {stats['errors']} errors) "
+          f"in {stats['time']:.2f} s, {stats['per_second']:.1f} puzzles/s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from einstein_batch import read_items, run, solve_item
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class BatchTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join(HERE, 'einstein.txt'), encoding='utf-8') as file:
+            cls.text = file.read()
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_solve_item_iter_engine_reports_passes(self):
+        result = solve_item({'id': 1, 'puzzle': self.text}, engine="iter", search=True)
+        self.assertEqual(result['answers'], [['drink:water', 'nation:norwegian'], ['animal:zebra', 'nation:japanese']])
+        self.assertTrue(result['solved'])
+        self.assertGreater(result['passes'], 0)
+
+    def test_solve_item_bad_puzzle_reports_error(self):
+        result = solve_item({'id': 'bad', 'puzzle': "attributes\nx:a b\nknowledge\nsame x:a y:b"})
+        self.assertIn('unknown attribute', result['error'])
+
+    def test_read_items_from_directory_and_jsonl(self):
+        for name in ('b.txt', 'a.txt', 'notes.md'):
+            with open(os.path.join(self.dir, name), 'w', encoding='utf-8') as file:
+                file.write(self.text)
+        self.assertEqual([item['id'] for item in read_items(self.dir)], ['a.txt', 'b.txt'])
+
+        path = os.path.join(self.dir, 'puzzles.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(json.dumps({'puzzle': self.text}) + "\n\n" + json.dumps({'id': 'x', 'puzzle': self.text}) + "\n")
+        self.assertEqual([item['id'] for item in read_items(path)], [0, 'x'])
+
+    def test_run_streams_results_in_input_order(self):
+        items = [{'id': i, 'puzzle': self.text} for i in range(4)]
+        out = io.StringIO()
+        stats = run(items, out, workers=2, chunksize=1, search=True)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([result['id'] for result in results], [0, 1, 2, 3])
+        self.assertEqual(stats['puzzles'], 4)
+        self.assertEqual(stats['solved'], 4)
+        self.assertEqual(stats['errors'], 0)
+
+    def test_run_reports_broken_items_and_keeps_the_rest(self):
+        items = [{'id': 0, 'puzzle': self.text}, {'id': 1}, {'id': 2, 'puzzle': None},
+                 {'id': 3, 'puzzle': "attributes\nx:a b\nknowledge\nsame x:a x:b"}, {'id': 4, 'puzzle': self.text}]
+        out = io.StringIO()
+        stats = run(items, out, workers=1, chunksize=2, search=True)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([result['id'] for result in results], [0, 1, 2, 3, 4])
+        self.assertEqual([('error' in result) for result in results], [False, True, True, True, False])
+        self.assertIn('KeyError', results[1]['error'])
+        self.assertIn('line 4', results[3]['error'])
+        self.assertEqual((stats['solved'], stats['errors']), (2, 3))
+
+    def test_read_items_reports_bad_json_lines(self):
+        path = os.path.join(self.dir, 'puzzles.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("{not json\n" + json.dumps({'puzzle': self.text}) + "\n")
+        results = [solve_item(item) for item in read_items(path)]
+        self.assertIn('bad JSON', results[0]['error'])
+        self.assertEqual(results[1]['id'], 1)
+
+    def test_read_items_reports_json_lines_that_are_not_objects(self):
+        path = os.path.join(self.dir, 'puzzles.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("[1, 2]\nnull\n\"x\"\n" + json.dumps({'puzzle': self.text}) + "\n")
+        out = io.StringIO()
+        stats = run(read_items(path), out, workers=1, search=True)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([result['id'] for result in results], [0, 1, 2, 3])
+        self.assertEqual([result.get('error') for result in results[:3]], ["expected a JSON object"] * 3)
+        self.assertEqual((stats['solved'], stats['errors']), (1, 3))
+
+    def test_run_reads_input_lazily(self):
+        read = []
+
+        def items():
+            for i in range(40):
+                read.append(i)
+                yield {'id': i, 'puzzle': self.text}
+
+        class Out:
+            first = None
+
+            def write(self, line):
+                if self.first is None:
+                    self.first = len(read)
+
+        out = Out()
+        stats = run(items(), out, workers=1, chunksize=2)
+        self.assertEqual(stats['puzzles'], 40)
+        self.assertLessEqual(out.first, 6)
+
+if __name__ == '__main__':
+    unittest.main()
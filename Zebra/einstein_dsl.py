@@ -0,0 +1,270 @@
+u"""Чтение загадок в формате einstein.txt.
+
+Файл состоит из произвольного текста условия и трех секций:
+
+  attributes
+  house:ordinal:1 5                       - порядковый атрибут, значения от 1 до 5
+  color:attr:red green white              - атрибут с перечисленными значениями
+  smoke:oldgold kool                      - то же, вид атрибута можно не указывать
+
+  knowledge
+  same color:red nation:english           - одна и та же сущность
+  different color:red nation:spanish      - разные сущности
+  offset:house:1 color:white color:green  - green смещен относительно white на +1 по house
+  dist:house:1 smoke:chesterfield animal:fox - расстояние по house равно 1
+
+  queries:
+  drink:water nation                      - значение nation у того, у кого drink:water
+
+Разбор потоковый (по строкам), знание AtLeastOnce добавляется автоматически. Подготовленный решатель
+(атрибуты, таблица отношений, знания и их индексы) кешируется в pickle, ключ - sha256 содержимого файла
+и исходников einstein.py и einstein_dsl.py, поэтому повторный запуск на том же файле не разбирает его и не
+строит индексы заново, а после изменения решателя старый pickle не используется.
+"""
+import argparse
+import hashlib
+import os
+import pickle
+
+import einstein
+from einstein import *
+
+# версия формата кеша, входит в ключ
+CACHE_VERSION = 3
+SECTIONS = ('attributes', 'knowledge', 'queries')
+
+class Puzzle:
+    u"""Разобранная загадка: атрибуты, знания и вопросы (значение атрибута, атрибут ответа)"""
+    def __init__(self, attrs, rules, queries):
+        self.attrs = attrs
+        self.rules = rules
+        self.queries = queries
+
+    def solver(self, solver_class=Solver):
+        u"""Новый решатель со всеми знаниями загадки"""
+        solver = solver_class(self.attrs)
+        solver.add(AtLeastOnce())
+        for rule in self.rules:
+            solver.add(rule)
+        return solver
+
+    def answer(self, solver):
+        u"""Ответы на вопросы: список (значение атрибута, найденное значение атрибута ответа или None)"""
+        answers = []
+        for atval, attr in self.queries:
+            found = None
+            for value in attr.ordered_values:
+                if solver.is_same_at(atval, value):
+                    found = value
+                    break
+            answers.append((atval, found))
+        return answers
+
+class Parser:
+    u"""Потоковый разбор: строки подаются по одной через feed, результат - puzzle()"""
+    def __init__(self):
+        self.section = None
+        self.attrs = []
+        self.by_name = {}
+        self.rules = []
+        self.queries = []
+        self.line_no = 0
+
+    def feed(self, line):
+        self.line_no += 1
+        line = line.strip()
+        if not line:
+            return
+        header = line.rstrip(':')
+        if header in SECTIONS:
+            self.section = header
+            return
+        # текст условия до первой секции не разбирается
+        if self.section == 'attributes':
+            self.parse_attr(line)
+        elif self.section == 'knowledge':
+            self.parse_rule(line)
+        elif self.section == 'queries':
+            self.parse_query(line)
+
+    def error(self, message):
+        return ValueError("line " + str(self.line_no) + ": " + message)
+
+    def parse_attr(self, line):
+        head, _, values = line.partition(' ')
+        parts = head.split(':')
+        if len(parts) == 3:
+            name, kind, first = parts
+            values = first + ' ' + values
+        elif len(parts) == 2:
+            name, first = parts
+            kind = 'attr'
+            values = first + ' ' + values
+        else:
+            raise self.error("bad attribute: " + line)
+        values = values.split()
+        if kind == 'ordinal':
+            if len(values) != 2:
+                raise self.error("ordinal attribute needs a range: " + line)
+            values = list(range(int(values[0]), int(values[1]) + 1))
+        elif kind != 'attr':
+            raise self.error("unknown attribute kind: " + kind)
+        if name in self.by_name:
+            raise self.error("duplicate attribute: " + name)
+        attr = Attr(name, len(self.attrs), values)
+        self.attrs.append(attr)
+        self.by_name[name] = attr
+
+    def attr(self, name):
+        if name not in self.by_name:
+            raise self.error("unknown attribute: " + name)
+        return self.by_name[name]
+
+    def atval(self, token):
+        name, _, value = token.partition(':')
+        attr = self.attr(name)
+        if value not in attr.values:
+            try:
+                value = int(value)
+            except ValueError:
+                pass
+        if value not in attr.values:
+            raise self.error("unknown value: " + token)
+        return attr.values[value]
+
+    def parse_rule(self, line):
+        words = line.split()
+        if len(words) != 3:
+            raise self.error("bad knowledge: " + line)
+        kind, a, b = words
+        if kind == 'same' or kind == 'different':
+            a, b = self.atval(a), self.atval(b)
+            # отношение связывает значения двух разных атрибутов
+            if a.attr == b.attr:
+                raise self.error("values of the same attribute: " + line)
+            self.rules.append((Same if kind == 'same' else Different).of(a, b))
+        else:
+            kind, name, amount = (kind.split(':') + [None, None])[:3]
+            if name is None or amount is None:
+                raise self.error("bad knowledge: " + line)
+            if kind not in ('offset', 'dist'):
+                raise self.error("unknown knowledge: " + kind)
+            attr = self.attr(name)
+            try:
+                amount = int(amount)
+            except ValueError:
+                raise self.error("bad amount: " + line)
+            a, b = self.atval(a), self.atval(b)
+            if a.attr == attr or b.attr == attr:
+                raise self.error("value of the " + name + " attribute itself: " + line)
+            if kind == 'offset':
+                if amount == 0:
+                    raise self.error("zero offset: " + line)
+                # offset:attr:k X Y - Y смещен относительно X на k
+                self.rules.append(Offset(b, a, attr, amount))
+            else:
+                if amount <= 0:
+                    raise self.error("distance must be positive: " + line)
+                self.rules.append(Distance(a, b, attr, amount))
+
+    def parse_query(self, line):
+        words = line.split()
+        if len(words) != 2:
+            raise self.error("bad query: " + line)
+        self.queries.append((self.atval(words[0]), self.attr(words[1])))
+
+    def puzzle(self):
+        if not self.attrs:
+            raise ValueError("no attributes section")
+        return Puzzle(self.attrs, self.rules, self.queries)
+
+def parse(lines):
+    u"""Разбор загадки из любого итерируемого набора строк (файл, список, генератор)"""
+    parser = Parser()
+    for line in lines:
+        parser.feed(line)
+    return parser.puzzle()
+
+def parse_file(path):
+    with open(path, encoding='utf-8') as file:
+        return parse(file)
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+_code_hash = None
+
+def code_hash():
+    u"""sha256 исходников решателя и разбора (einstein.py, einstein_dsl.py), часть ключа кеша"""
+    global _code_hash
+    if _code_hash is None:
+        digest = hashlib.sha256()
+        for module_path in (einstein.__file__, __file__):
+            digest.update(file_hash(module_path).encode('ascii'))
+        _code_hash = digest.hexdigest()
+    return _code_hash
+
+def cache_path(path, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), '.einstein_cache')
+    key = file_hash(path) + '-' + str(CACHE_VERSION) + '-' + code_hash()[:16]
+    return os.path.join(cache_dir, key + '.pickle')
+
+def load(path, solver_class=Solver, cache=True, cache_dir=None):
+    u"""Загадка и подготовленный решатель для файла, (puzzle, solver). С cache=True решатель берется из кеша,
+    если файл с таким содержимым уже разбирался тем же классом решателя"""
+    if not cache:
+        puzzle = parse_file(path)
+        return puzzle, puzzle.solver(solver_class)
+    cached = cache_path(path, cache_dir)
+    if os.path.exists(cached):
+        try:
+            with open(cached, 'rb') as file:
+                name, puzzle, solver = pickle.load(file)
+            if name == solver_class.__name__:
+                return puzzle, solver
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            pass
+    puzzle = parse_file(path)
+    solver = puzzle.solver(solver_class)
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    # запись через временный файл, чтобы параллельные запуски не прочли недописанный кеш
+    temp = cached + '.' + str(os.getpid())
+    with open(temp, 'wb') as file:
+        pickle.dump((solver_class.__name__, puzzle, solver), file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, cached)
+    return puzzle, solver
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a puzzle in the einstein.txt format")
+    parser.add_argument("path", nargs='?', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'einstein.txt'))
+    parser.add_argument("--search", action="store_true", help="backtrack if the rules alone do not fill the table")
+    parser.add_argument("--track", action="store_true", help="track entities (transitive Same/Different)")
+    parser.add_argument("--no-cache", action="store_true", help="always parse the file")
+    parser.add_argument("--profile", action="store_true", help="print per-pass and per-rule statistics")
+    parser.add_argument("--trace", help="write the derivation trace as JSON to this path")
+    parser.add_argument("--chrome-trace", help="write the derivation trace in Chrome trace format to this path")
+    args = parser.parse_args()
+
+    puzzle, solver = load(args.path, cache=not args.no_cache)
+    if args.track:
+        solver.track()
+    if args.profile or args.trace or args.chrome_trace:
+        solver.trace = Trace()
+    solver.solve(search=args.search)
+    for atval, found in puzzle.answer(solver):
+        print(atval, "->", found if found is not None else "unknown")
+    if args.profile:
+        print()
+        print(solver.trace.format_report())
+    if args.trace:
+        solver.trace.to_json(args.trace)
+    if args.chrome_trace:
+        solver.trace.to_chrome_trace(args.chrome_trace)
+
+if __name__ == "__main__":
+    main()
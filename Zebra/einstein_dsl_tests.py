@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from einstein_dsl import *
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SMALL = u"""Условие задачи
+
+attributes
+house:ordinal:1 3
+color:attr:red green blue
+nation:english spanish japanese
+
+knowledge
+same color:red nation:english
+offset:house:1 color:green color:blue
+same house:1 color:green
+different nation:spanish house:2
+
+queries:
+color:blue nation
+""".splitlines()
+
+class ParserTests(unittest.TestCase):
+    def setUp(self):
+        self.puzzle = parse(SMALL)
+
+    def test_parse_attributes_of_all_kinds(self):
+        house, color, nation = self.puzzle.attrs
+        self.assertEqual([v.value for v in house.ordered_values], [1, 2, 3])
+        self.assertEqual([v.value for v in color.ordered_values], ['red', 'green', 'blue'])
+        self.assertEqual([v.value for v in nation.ordered_values], ['english', 'spanish', 'japanese'])
+        self.assertEqual([attr.order for attr in self.puzzle.attrs], [0, 1, 2])
+
+    def test_parse_knowledge(self):
+        same, offset, fixed, different = self.puzzle.rules
+        house, color, nation = self.puzzle.attrs
+        self.assertIsInstance(same, Same)
+        self.assertEqual(same.relation, Relation(color.red, nation.english))
+        # offset:house:1 X Y - Y смещен относительно X
+        self.assertIsInstance(offset, Offset)
+        self.assertIs(offset.atval1, color.blue)
+        self.assertIs(offset.atval2, color.green)
+        self.assertEqual(offset.offset, 1)
+        self.assertEqual(fixed.relation, Relation(house[1], color.green))
+        self.assertIsInstance(different, Different)
+
+    def test_solve_answers_queries(self):
+        solver = self.puzzle.solver()
+        solver.solve()
+        nation = self.puzzle.attrs[2]
+        self.assertEqual(self.puzzle.answer(solver), [(self.puzzle.attrs[1].blue, nation.japanese)])
+
+    def test_unknown_value_raises_with_line_number(self):
+        lines = ["attributes", "color:red green", "nation:english spanish", "knowledge", "same color:red nation:french"]
+        with self.assertRaisesRegex(ValueError, "line 5"):
+            parse(lines)
+
+    def test_bad_knowledge_raises_with_line_number(self):
+        head = ["attributes", "house:ordinal:1 3", "color:red green blue", "knowledge"]
+        for rule in ["same color:red color:green", "different color:red color:blue",
+                     "offset:house:0 color:red color:green", "offset:house:x color:red color:green",
+                     "dist:house:-1 color:red color:green", "dist:house:0 color:red color:green",
+                     "offset:house:1 house:1 color:green"]:
+            with self.assertRaisesRegex(ValueError, "line 5", msg=rule):
+                parse(head + [rule])
+
+    def test_einstein_txt_solves(self):
+        puzzle = parse_file(os.path.join(HERE, 'einstein.txt'))
+        solver = puzzle.solver()
+        self.assertTrue(solver.solve(search=True))
+        answers = [str(found) for _, found in puzzle.answer(solver)]
+        self.assertEqual(answers, ['nation:norwegian', 'nation:japanese'])
+
+class CacheTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'puzzle.txt')
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write("\n".join(SMALL) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_load_writes_cache_and_reads_it_back(self):
+        load(self.path)
+        cached = cache_path(self.path)
+        self.assertTrue(os.path.exists(cached))
+
+        puzzle, solver = load(self.path)
+        solver.solve()
+        self.assertEqual([str(found) for _, found in puzzle.answer(solver)], ['nation:japanese'])
+
+    def test_changed_file_is_parsed_again(self):
+        load(self.path)
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write("color:red nation\n")
+        puzzle, _ = load(self.path)
+        self.assertEqual(len(puzzle.queries), 2)
+
+    def test_changed_solver_code_is_not_read_from_cache(self):
+        import einstein_dsl
+        load(self.path)
+        cached = cache_path(self.path)
+        self.assertIn(code_hash()[:16], os.path.basename(cached))
+        code = einstein_dsl._code_hash
+        einstein_dsl._code_hash = '0' * 64
+        try:
+            self.assertNotEqual(cache_path(self.path), cached)
+            load(self.path)
+            self.assertTrue(os.path.exists(cache_path(self.path)))
+        finally:
+            einstein_dsl._code_hash = code
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,402 @@
+u"""Генератор загадок Эйнштейна заданного размера (N домов x K атрибутов) с единственным решением.
+
+Загадка строится от случайного решения (с заданным seed): в нее добавляются случайные верные подсказки,
+пока решение не станет единственным, затем подсказки по одной удаляются, если без них решение остается
+единственным. Подсказки:
+  same - два значения у одной сущности (Same)
+  position - значение в доме с номером amount, считая с 0 (Same со значением house)
+  offset - дом a = дом b + amount (Offset)
+  distance - |дом a - дом b| = amount (Distance)
+amount у offset и distance всегда 1, как в графе Zebra_Puzzle/rdf_graph.py.
+
+Единственность проверяет Checker - перебор с распространением ограничений на битовых масках домов,
+он быстрее решателя знаний на порядки и позволяет строить загадки 10x10 за секунды.
+
+Результат - знания Same/Offset/Distance (puzzle), текст в формате einstein.txt (to_text)
+или RDF-граф в форме Zebra_Puzzle/rdf_graph.py (to_rdf).
+
+Usage: python einstein_generate.py 10 10 [--seed 1] [--format txt|ttl|json] [-o puzzle.txt]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from collections import namedtuple
+
+from einstein import *
+from einstein_dsl import Puzzle
+
+CATEGORY_NAMES = ['color', 'nationality', 'pet', 'drink', 'cigar', 'sport', 'music', 'car', 'job', 'food',
+                  'flower', 'game']
+KINDS = ['same', 'same', 'position', 'offset', 'distance']
+
+# подсказка в том же виде, что clues.Clue в Zebra_Puzzle, под своим именем, чтобы их не путать, когда оба
+# каталога в sys.path (benchmarks/engines.py); a, b - пары (атрибут, значение), b - None у position
+GeneratedClue = namedtuple('GeneratedClue', ['kind', 'a', 'b', 'amount'])
+
+def category_names(count):
+    return CATEGORY_NAMES[:count] + ['attr' + str(i + 1) for i in range(len(CATEGORY_NAMES), count)]
+
+# узлов перебора без проб, после которых перебор повторяется с пробами
+SEARCH_BUDGET = 2000
+
+class SearchBudgetExceeded(Exception):
+    pass
+
+def shift(mask, amount, full):
+    u"""Маска домов, сдвинутая на amount домов"""
+    return (mask << amount) & full if amount >= 0 else mask >> -amount
+
+class Checker:
+    u"""Подсчет решений набора подсказок. Переменная - значение атрибута, ее домен - битовая маска домов,
+    где оно может быть. Подсказки сужают домены друг друга, значения одного атрибута - в разных домах
+    (единственный дом значения исключается у остальных, дом, возможный только для одного значения,
+    закрепляется за ним), дома, предположение о которых сразу дает противоречие, исключаются пробами. Когда и
+    это ничего не дает, перебираются дома переменной с наименьшим доменом"""
+    def __init__(self, houses, categories):
+        self.houses = houses
+        self.full = (1 << houses) - 1
+        self.ids = {}
+        self.groups = []
+        for name, values in categories.items():
+            group = []
+            for value in values:
+                self.ids[(name, value)] = len(self.ids)
+                group.append(self.ids[(name, value)])
+            self.groups.append(group)
+        self.group_of = [group for group in self.groups for _ in group]
+
+    def count(self, clues, limit=2):
+        u"""Число решений (не более limit)"""
+        domains = [self.full] * len(self.ids)
+        # watches[y] - (x, amount, both): дом x = дом y + amount (или - amount, если both)
+        watches = [[] for _ in domains]
+        for kind, a, b, amount in clues:
+            x = self.ids[tuple(a)]
+            if kind == 'position':
+                domains[x] &= 1 << amount
+                continue
+            y = self.ids[tuple(b)]
+            if kind == 'same':
+                watches[y].append((x, 0, False))
+                watches[x].append((y, 0, False))
+            elif kind == 'offset':
+                watches[y].append((x, amount, False))
+                watches[x].append((y, -amount, False))
+            else:
+                watches[y].append((x, amount, True))
+                watches[x].append((y, amount, True))
+        if not self.propagate(domains, watches, list(range(len(domains)))):
+            return 0
+        # обычно хватает перебора без проб, но на редких наборах он уходит в огромные поддеревья без решений;
+        # тогда перебор повторяется с пробами в каждом узле
+        self.nodes = 0
+        try:
+            return self.search(list(domains), watches, limit, False)
+        except SearchBudgetExceeded:
+            return self.search(domains, watches, limit, True)
+
+    def propagate(self, domains, watches, changed):
+        u"""Сужение доменов до неподвижной точки. Возвращает False при противоречии (пустой домен)"""
+        full = self.full
+        while changed:
+            while changed:
+                y = changed.pop()
+                domain = domains[y]
+                for x, amount, both in watches[y]:
+                    support = shift(domain, amount, full)
+                    if both:
+                        support |= shift(domain, -amount, full)
+                    narrowed = domains[x] & support
+                    if narrowed != domains[x]:
+                        if not narrowed:
+                            return False
+                        domains[x] = narrowed
+                        changed.append(x)
+                if domain & (domain - 1) == 0:
+                    for z in self.group_of[y]:
+                        if z != y and domains[z] & domain:
+                            domains[z] &= ~domain
+                            if not domains[z]:
+                                return False
+                            changed.append(z)
+            # дома, возможные только для одного значения атрибута
+            for group in self.groups:
+                once = twice = 0
+                for z in group:
+                    twice |= once & domains[z]
+                    once |= domains[z]
+                if once != full:
+                    return False
+                single = once & ~twice
+                if not single:
+                    continue
+                for z in group:
+                    domain = domains[z]
+                    if domain & single and domain & (domain - 1):
+                        narrowed = domain & single
+                        if narrowed & (narrowed - 1):
+                            return False
+                        domains[z] = narrowed
+                        changed.append(z)
+        return True
+
+    def probe(self, domains, watches):
+        u"""Пробы: дом, предположение о котором сразу ведет к противоречию, исключается из домена. Повторяется,
+        пока что-то исключается. Возвращает False при противоречии"""
+        narrowed = True
+        while narrowed:
+            narrowed = False
+            for z in range(len(domains)):
+                rest = domains[z]
+                if not rest & (rest - 1):
+                    continue
+                while rest:
+                    bit = rest & -rest
+                    rest &= rest - 1
+                    if not domains[z] & bit:
+                        continue
+                    trial = list(domains)
+                    trial[z] = bit
+                    if self.propagate(trial, watches, [z]):
+                        continue
+                    domains[z] &= ~bit
+                    if not domains[z] or not self.propagate(domains, watches, [z]):
+                        return False
+                    narrowed = True
+        return True
+
+    def search(self, domains, watches, limit, probing):
+        if probing:
+            if not self.probe(domains, watches):
+                return 0
+        else:
+            self.nodes += 1
+            if self.nodes > SEARCH_BUDGET:
+                raise SearchBudgetExceeded()
+        best = None
+        for z, domain in enumerate(domains):
+            if domain & (domain - 1):
+                size = bin(domain).count('1')
+                if best is None or size < best[0]:
+                    best = (size, z)
+                    if size == 2:
+                        break
+        if best is None:
+            return 1
+        z = best[1]
+        found = 0
+        domain = domains[z]
+        while domain and found < limit:
+            bit = domain & -domain
+            domain &= domain - 1
+            trial = list(domains)
+            trial[z] = bit
+            if self.propagate(trial, watches, [z]):
+                found += self.search(trial, watches, limit - found, probing)
+        return found
+
+    def unique(self, clues):
+        return self.count(clues, 2) == 1
+
+class GeneratedPuzzle:
+    u"""Сгенерированная загадка: число домов, атрибуты со значениями, подсказки, решение
+    ((атрибут, значение) -> дом, с 0) и вопросы ((атрибут, значение), атрибут ответа)"""
+    def __init__(self, houses, categories, clues, solution, queries, seed=None):
+        self.houses = houses
+        self.categories = categories
+        self.clues = clues
+        self.solution = solution
+        self.queries = queries
+        self.seed = seed
+
+    def attrs(self):
+        u"""Атрибуты решателя: house (порядковый, от 1) и атрибуты загадки"""
+        house = Attr('house', 0, list(range(1, self.houses + 1)))
+        return [house] + [Attr(name, i + 1, values) for i, (name, values) in enumerate(self.categories.items())]
+
+    def puzzle(self):
+        u"""Загадка со знаниями Same/Offset/Distance, как после разбора einstein.txt"""
+        attrs = self.attrs()
+        by_name = {attr.name: attr for attr in attrs}
+        house = by_name['house']
+        rules = []
+        for kind, a, b, amount in self.clues:
+            atval = by_name[a[0]][a[1]]
+            if kind == 'position':
+                rules.append(Same.of(house[amount + 1], atval))
+            elif kind == 'same':
+                rules.append(Same.of(atval, by_name[b[0]][b[1]]))
+            elif kind == 'offset':
+                rules.append(Offset(atval, by_name[b[0]][b[1]], house, amount))
+            else:
+                rules.append(Distance(atval, by_name[b[0]][b[1]], house, amount))
+        queries = [(by_name[a[0]][a[1]], by_name[name]) for a, name in self.queries]
+        return Puzzle(attrs, rules, queries)
+
+    def to_text(self):
+        u"""Загадка в формате einstein.txt"""
+        lines = ["Generated puzzle: " + str(self.houses) + " houses, " + str(len(self.categories))
+                 + " attributes, seed " + str(self.seed), "", "attributes",
+                 "house:ordinal:1 " + str(self.houses)]
+        for name, values in self.categories.items():
+            lines.append(name + ":attr:" + " ".join(values))
+        lines += ["", "knowledge"]
+        for kind, a, b, amount in self.clues:
+            a = a[0] + ":" + a[1]
+            if kind == 'position':
+                lines.append("same house:" + str(amount + 1) + " " + a)
+                continue
+            b = b[0] + ":" + b[1]
+            if kind == 'same':
+                lines.append("same " + a + " " + b)
+            elif kind == 'offset':
+                # offset:house:k X Y - Y смещен относительно X на k
+                lines.append("offset:house:" + str(amount) + " " + b + " " + a)
+            else:
+                lines.append("dist:house:" + str(amount) + " " + a + " " + b)
+        lines += ["", "queries:"]
+        for a, name in self.queries:
+            lines.append(a[0] + ":" + a[1] + " " + name)
+        return "\n".join(lines) + "\n"
+
+    def to_rdf(self):
+        u"""RDF-граф в форме Zebra_Puzzle/rdf_graph.py, (graph, ns): классы атрибутов, значения с типом
+        своего класса, дома с ns:position и подсказки ns:same / ns:offset / ns:dist"""
+        from rdflib import Graph, Literal, Namespace, OWL, RDF
+
+        ns = Namespace("http://example.org/")
+        g = Graph()
+        houses = [ns["House" + str(i + 1)] for i in range(self.houses)]
+        g.add((ns.House, RDF.type, OWL.Class))
+        for i, house in enumerate(houses):
+            g.add((house, RDF.type, ns.House))
+            g.add((house, ns.position, Literal(i + 1)))
+        for name, values in self.categories.items():
+            category = ns[name.capitalize()]
+            g.add((category, RDF.type, OWL.Class))
+            for value in values:
+                g.add((ns[value], RDF.type, category))
+        predicates = {'same': ns.same, 'offset': ns.offset, 'distance': ns.dist}
+        for kind, a, b, amount in self.clues:
+            if kind == 'position':
+                g.add((houses[amount], ns.same, ns[a[1]]))
+            else:
+                g.add((ns[a[1]], predicates[kind], ns[b[1]]))
+        return g, ns
+
+    def to_dict(self):
+        u"""Загадка для JSON: подсказки - [вид, [атрибут, значение], [атрибут, значение] или null, amount]"""
+        return {'houses': self.houses, 'categories': self.categories, 'seed': self.seed,
+                'clues': [[kind, list(a), list(b) if b is not None else None, amount]
+                          for kind, a, b, amount in self.clues],
+                'queries': [[list(a), name] for a, name in self.queries]}
+
+    @classmethod
+    def from_dict(cls, data):
+        u"""Загадка из to_dict(), без решения"""
+        clues = [GeneratedClue(kind, tuple(a), tuple(b) if b is not None else None, amount)
+                 for kind, a, b, amount in data['clues']]
+        queries = [(tuple(a), name) for a, name in data.get('queries', [])]
+        return cls(data['houses'], data['categories'], clues, None, queries, data.get('seed'))
+
+def random_clue(rng, houses, names, at):
+    u"""Случайная подсказка, верная для решения at ((атрибут, дом) -> значение)"""
+    kind = rng.choice(KINDS)
+    a = rng.choice(names)
+    if kind == 'position' or houses == 1:
+        house = rng.randrange(houses)
+        return GeneratedClue('position', (a, at[(a, house)]), None, house)
+    if kind == 'same':
+        if len(names) == 1:
+            return None
+        b = rng.choice([name for name in names if name != a])
+        house = rng.randrange(houses)
+        return GeneratedClue('same', (a, at[(a, house)]), (b, at[(b, house)]), 0)
+    b = rng.choice(names)
+    house = rng.randrange(houses - 1)
+    if kind == 'offset':
+        return GeneratedClue('offset', (a, at[(a, house + 1)]), (b, at[(b, house)]), 1)
+    first, second = (house, house + 1) if rng.random() < 0.5 else (house + 1, house)
+    return GeneratedClue('distance', (a, at[(a, first)]), (b, at[(b, second)]), 1)
+
+def generate(houses, categories, seed=None, minimize=True):
+    u"""Загадка с houses домами и categories атрибутами (кроме house) с единственным решением.
+    С minimize=True из нее удалены все подсказки, без которых решение остается единственным"""
+    rng = random.Random(seed)
+    names = category_names(categories)
+    values = {name: [name.capitalize() + str(i + 1) for i in range(houses)] for name in names}
+    solution = {}
+    for name in names:
+        order = list(range(houses))
+        rng.shuffle(order)
+        solution.update({(name, value): house for value, house in zip(values[name], order)})
+    at = {(name, house): value for (name, value), house in solution.items()}
+    checker = Checker(houses, values)
+
+    # подсказки добавляются пачками, проверка - после каждой пачки
+    clues = []
+    seen = set()
+    batch = max(1, houses // 2)
+    while True:
+        added = 0
+        while added < batch:
+            clue = random_clue(rng, houses, names, at)
+            if clue is None or clue in seen or (clue.kind != 'same' and clue.a == clue.b):
+                continue
+            seen.add(clue)
+            clues.append(clue)
+            added += 1
+        if checker.unique(clues):
+            break
+
+    if minimize:
+        order = list(range(len(clues)))
+        rng.shuffle(order)
+        removed = set()
+        for i in order:
+            removed.add(i)
+            if not checker.unique([clue for j, clue in enumerate(clues) if j not in removed]):
+                removed.discard(i)
+        clues = [clue for j, clue in enumerate(clues) if j not in removed]
+
+    last = names[-1]
+    target = names[0] if len(names) > 1 else 'house'
+    queries = [((last, value), target) for value in rng.sample(values[last], min(2, houses))]
+    return GeneratedPuzzle(houses, values, clues, solution, queries, seed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a Zebra puzzle with a unique solution")
+    parser.add_argument("houses", type=int)
+    parser.add_argument("categories", type=int, help="attributes besides the house number")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--count", type=int, default=1, help="puzzles to generate, seeds seed, seed+1, ...")
+    parser.add_argument("--no-minimize", action="store_true", help="keep redundant clues")
+    parser.add_argument("--format", choices=["txt", "ttl", "json"], default="txt",
+                        help="einstein.txt, Turtle in the Zebra_Puzzle/rdf_graph.py shape, or JSON lines")
+    parser.add_argument("-o", "--output", help="output path, stdout by default")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for i in range(args.count):
+            start = time.perf_counter()
+            generated = generate(args.houses, args.categories, seed + i, minimize=not args.no_minimize)
+            if args.format == 'txt':
+                out.write(generated.to_text() + ("\n" if i + 1 < args.count else ""))
+            elif args.format == 'ttl':
+                graph, ns = generated.to_rdf()
+                graph.bind('ns', ns)
+                out.write(graph.serialize(format='turtle'))
+            else:
+                out.write(json.dumps(generated.to_dict(), ensure_ascii=False) + "\n")
+            print(f"seed {seed + i}: {len(generated.clues)} clues in {time.perf_counter() - start:.2f} s",
+                  file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import json
+import unittest
+
+from einstein_dsl import parse
+from einstein_generate import *
+
+class CheckerTests(unittest.TestCase):
+    def setUp(self):
+        self.categories = {'color': ['Color1', 'Color2', 'Color3'], 'pet': ['Pet1', 'Pet2', 'Pet3']}
+        self.checker = Checker(3, self.categories)
+
+    def test_no_clues_counts_all_assignments(self):
+        self.assertEqual(self.checker.count([], limit=100), 36)
+
+    def test_positions_of_every_value_give_one_solution(self):
+        clues = [GeneratedClue('position', ('color', 'Color' + str(i + 1)), None, i) for i in range(3)] + \
+                [GeneratedClue('position', ('pet', 'Pet' + str(i + 1)), None, i) for i in range(3)]
+        self.assertTrue(self.checker.unique(clues))
+
+    def test_offset_and_distance_narrow_houses(self):
+        # Color1, Color2, Color3 стоят подряд слева направо, животные - в любом порядке (3! вариантов)
+        clues = [GeneratedClue('offset', ('color', 'Color2'), ('color', 'Color1'), 1),
+                 GeneratedClue('offset', ('color', 'Color3'), ('color', 'Color2'), 1)]
+        self.assertEqual(self.checker.count(clues, limit=100), 6)
+
+    def test_search_with_probes_counts_the_same(self):
+        import einstein_generate
+        generated = generate(6, 6, seed=4, minimize=False)
+        checker = Checker(6, generated.categories)
+        clues = generated.clues[:len(generated.clues) // 2]
+        expected = checker.count(clues, limit=5)
+        budget = einstein_generate.SEARCH_BUDGET
+        einstein_generate.SEARCH_BUDGET = 0
+        try:
+            self.assertEqual(checker.count(clues, limit=5), expected)
+        finally:
+            einstein_generate.SEARCH_BUDGET = budget
+
+    def test_contradiction_has_no_solutions(self):
+        clues = [GeneratedClue('position', ('color', 'Color1'), None, 0), GeneratedClue('position', ('color', 'Color2'), None, 0)]
+        self.assertEqual(self.checker.count(clues), 0)
+
+class GenerateTests(unittest.TestCase):
+    def test_same_seed_gives_same_puzzle(self):
+        self.assertEqual(generate(5, 4, seed=3).to_text(), generate(5, 4, seed=3).to_text())
+
+    def test_solution_is_unique_for_einstein_solver(self):
+        for seed in range(5):
+            generated = generate(4, 4, seed)
+            solver = parse(generated.to_text().splitlines()).solver()
+            solver.track()
+            self.assertEqual(solver.count_solutions(limit=2), 1)
+
+    def test_answers_match_generated_solution(self):
+        generated = generate(5, 5, seed=1)
+        puzzle = generated.puzzle()
+        solver = puzzle.solver()
+        self.assertTrue(solver.solve(search=True))
+        for atval, found in puzzle.answer(solver):
+            self.assertEqual(generated.solution[(atval.attr.name, atval.value)],
+                             generated.solution[(found.attr.name, found.value)])
+
+    def test_minimized_clues_are_all_needed(self):
+        generated = generate(5, 5, seed=2)
+        checker = Checker(generated.houses, generated.categories)
+        for i in range(len(generated.clues)):
+            self.assertFalse(checker.unique(generated.clues[:i] + generated.clues[i + 1:]))
+
+    def test_large_puzzle_is_unique(self):
+        generated = generate(10, 10, seed=1)
+        self.assertTrue(Checker(10, generated.categories).unique(generated.clues))
+        self.assertEqual(len(generated.categories), 10)
+
+    def test_to_dict_keeps_clues(self):
+        generated = generate(4, 3, seed=5)
+        data = generated.to_dict()
+        self.assertEqual(len(data['clues']), len(generated.clues))
+        self.assertEqual(data['categories'], generated.categories)
+
+    def test_from_dict_gives_the_same_puzzle(self):
+        generated = generate(4, 3, seed=5)
+        restored = GeneratedPuzzle.from_dict(json.loads(json.dumps(generated.to_dict())))
+        self.assertEqual(restored.clues, generated.clues)
+        self.assertEqual(restored.to_text(), generated.to_text())
+
+class RdfTests(unittest.TestCase):
+    def test_graph_has_clue_triples(self):
+        try:
+            import rdflib
+        except ImportError:
+            self.skipTest("rdflib is not installed")
+        generated = generate(5, 4, seed=1)
+        graph, ns = generated.to_rdf()
+        clues = sum(1 for predicate in (ns.same, ns.offset, ns.dist) for _ in graph.subject_objects(predicate))
+        self.assertEqual(clues, len(generated.clues))
+        self.assertEqual(len(list(graph.subjects(ns.position, None))), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import json
 import unittest
 
 from einstein import *
@@ -73,6 +74,18 @@ class RelationTests(unittest.TestCase):
     
     def test_with_atval_c1_diff_attr_returns_false(self):
         self.assertFalse(self.rel.with_atval(self.attr_c.c1))
+
+    def test_new_relation_same_values_returns_same_instance(self):
+        self.assertIs(Relation(self.attr_a.a2, self.attr_b.b3), self.rel)
+
+    def test_new_relation_swapped_values_returns_same_instance(self):
+        self.assertIs(Relation(self.attr_b.b3, self.attr_a.a2), self.rel)
+
+    def test_solver_table_holds_interned_relations(self):
+        solver = Solver([self.attr_a, self.attr_b, self.attr_c])
+        self.assertEqual(len(solver.table), 3 * 5 * 5)
+        self.assertIn(self.rel, solver.table)
+        self.assertIs(solver.relation(self.attr_b.b3, self.attr_a.a2), self.rel)
     
 class ExclusiveTests(unittest.TestCase):
     @classmethod
@@ -420,6 +433,283 @@ class SolverTests(unittest.TestCase):
 
         self.assertTrue(solver.is_different(Relation(color.green, house[2])))
 
+def make_einstein_solver(offset=1, solver_class=Solver):
+    house = Attr('house', 0, [1, 2, 3, 4, 5])
+    color = Attr('color', 1, ['red', 'green', 'white', 'yellow', 'blue'])
+    nation = Attr('nation', 2, ['english', 'spanish', 'ukrainian', 'norwegian', 'japanese'])
+    animal = Attr('animal', 3, ['dog', 'snail', 'fox', 'horse', 'zebra'])
+    drink = Attr('drink', 4, ['coffee', 'tea', 'milk', 'orangejuice', 'water'])
+    smoke = Attr('smoke', 5, ['oldgold', 'kool', 'chesterfield', 'luckystrike', 'parliament'])
+
+    solver = solver_class([house, color, nation, animal, drink, smoke])
+    solver.add(AtLeastOnce())
+    solver.add(Same.of(color.red, nation.english))
+    solver.add(Same.of(nation.spanish, animal.dog))
+    solver.add(Same.of(color.green, drink.coffee))
+    solver.add(Same.of(nation.ukrainian, drink.tea))
+    solver.add(Offset(color.green, color.white, house, offset))
+    solver.add(Same.of(smoke.oldgold, animal.snail))
+    solver.add(Same.of(color.yellow, smoke.kool))
+    solver.add(Same.of(house[3], drink.milk))
+    solver.add(Same.of(nation.norwegian, house[1]))
+    solver.add(Distance(smoke.chesterfield, animal.fox, house, 1))
+    solver.add(Distance(animal.horse, smoke.kool, house, 1))
+    solver.add(Same.of(smoke.luckystrike, drink.orangejuice))
+    solver.add(Same.of(nation.japanese, smoke.parliament))
+    solver.add(Distance(nation.norwegian, color.blue, house, 1))
+    return solver
+
+def knowledge(solver):
+    return {str(relation): type(rule).__name__ for relation, rule in solver.map.items()}
+
+class SolverPropagateTests(unittest.TestCase):
+    def test_solve_derives_same_knowledge_as_iter(self):
+        for offset in (1, -1):
+            iterated = make_einstein_solver(offset)
+            while iterated.iter():
+                pass
+            solved = make_einstein_solver(offset)
+            solved.solve()
+            self.assertEqual(knowledge(solved), knowledge(iterated))
+
+    def test_propagate_only_revisits_affected_relations(self):
+        house = Attr('house', 0, [1, 2, 3])
+        color = Attr('color', 1, ['red', 'green', 'blue'])
+        solver = Solver([house, color])
+        solver.add(Offset(color.green, color.red, house, 1))
+        solver.queue.clear()
+        solver.queued.clear()
+
+        solver.add(Different(Relation(color.red, house[1])))
+
+        self.assertEqual(list(solver.queue), [Relation(house[2], color.green)])
+        solver.propagate()
+        self.assertTrue(solver.is_different(Relation(color.green, house[2])))
+
+class RuleIndexTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.house = Attr('house', 0, [1, 2, 3])
+        cls.color = Attr('color', 1, ['red', 'green', 'blue'])
+        cls.nation = Attr('nation', 2, ['english', 'spanish', 'japanese'])
+
+    def test_rules_for_offers_only_rules_on_relation_values(self):
+        solver = Solver([self.house, self.color, self.nation])
+        exclusive = AtLeastOnce()
+        same = Same.of(self.color.red, self.nation.english)
+        offset = Offset(self.color.green, self.color.blue, self.house, 1)
+        different = Different.of(self.color.red, self.house[1])
+        for rule in (exclusive, same, offset, different):
+            solver.add(rule)
+
+        self.assertEqual(solver.rules_for(Relation(self.house[2], self.nation.spanish)), [exclusive])
+        self.assertEqual(solver.rules_for(Relation(self.house[2], self.color.red)), [exclusive, same])
+        self.assertEqual(solver.rules_for(Relation(self.house[2], self.color.green)), [exclusive, offset])
+
+    def test_undo_removes_rules_from_index(self):
+        solver = Solver([self.house, self.color])
+        mark = solver.mark()
+        solver.add(Same.of(self.color.red, self.house[1]))
+        solver.undo(mark)
+        self.assertEqual(solver.rules_for(Relation(self.house[2], self.color.red)), [])
+
+class TraceTests(unittest.TestCase):
+    def test_trace_counts_passes_rules_and_facts(self):
+        solver = make_einstein_solver(-1)
+        solver.trace = Trace()
+        passes = 0
+        while solver.iter():
+            passes += 1
+
+        report = solver.trace.report()
+        self.assertEqual(len(report['passes']), passes + 1)
+        self.assertTrue(all(row['kind'] == 'iter' for row in report['passes']))
+        facts = sum(row['facts'] for row in report['passes'])
+        self.assertEqual(facts, len(solver.trace.events))
+        self.assertEqual(sum(row['hits'] for row in report['rules']), facts)
+        self.assertEqual({row['class'] for row in report['rules']}, {'AtLeastOnce', 'Same', 'Offset', 'Distance'})
+
+    def test_traced_solve_derives_same_knowledge(self):
+        solver = make_einstein_solver(-1)
+        solver.trace = Trace(events=False)
+        solver.solve()
+        expected = make_einstein_solver(-1)
+        expected.solve()
+        self.assertEqual(knowledge(solver), knowledge(expected))
+
+    def test_export_json_and_chrome_trace(self):
+        solver = make_einstein_solver(-1)
+        solver.trace = Trace()
+        solver.solve()
+        data = json.loads(solver.trace.to_json())
+        self.assertEqual(len(data['events']), sum(row['facts'] for row in data['passes']))
+        chrome = json.loads(solver.trace.to_chrome_trace())
+        self.assertTrue(all(event['ph'] == 'X' for event in chrome['traceEvents']))
+        self.assertEqual(len(chrome['traceEvents']), len(data['passes']) + len(data['events']))
+
+class MatrixSolverTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.A = Attr('A', 0, ['A1', 'A2', 'A3'])
+        cls.B = Attr('B', 1, ['B1', 'B2', 'B3'])
+
+    def test_added_knowledge_is_stored_in_matrix(self):
+        solver = MatrixSolver([self.A, self.B])
+        solver.add(Same.of(self.B.B2, self.A.A1)).add(Different.of(self.A.A3, self.B.B1))
+        self.assertTrue(solver.is_same_at(self.A.A1, self.B.B2))
+        self.assertTrue(solver.is_same_at(self.B.B2, self.A.A1))
+        self.assertTrue(solver.is_different(Relation(self.A.A3, self.B.B1)))
+        self.assertFalse(solver.is_same_at(self.A.A2, self.B.B2))
+        self.assertFalse(solver.is_different_at(self.A.A2, self.B.B2))
+
+    def test_all_different_except(self):
+        solver = MatrixSolver([self.A, self.B])
+        solver.add(Different.of(self.A.A2, self.B.B1)).add(Different.of(self.A.A2, self.B.B3))
+        self.assertTrue(solver.all_different_except(self.A.A2, self.B.B2))
+        self.assertFalse(solver.all_different_except(self.A.A2, self.B.B1))
+        self.assertFalse(solver.all_different_except(self.B.B2, self.A.A2))
+
+    def test_solve_derives_same_knowledge_as_solver(self):
+        for offset in (1, -1):
+            solver = make_einstein_solver(offset)
+            solver.solve()
+            matrix_solver = make_einstein_solver(offset, MatrixSolver)
+            matrix_solver.solve()
+            self.assertEqual(knowledge(matrix_solver), knowledge(solver))
+
+class AllDifferentTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.house = Attr('house', 0, [1, 2, 3, 4])
+        cls.color = Attr('color', 1, ['red', 'green', 'blue', 'yellow'])
+
+    def setUp(self):
+        self.solver = Solver([self.house, self.color])
+        self.rule = AllDifferent()
+        self.solver.add(self.rule)
+
+    def test_evaluate_pair_of_houses_with_two_colors_excludes_colors_from_other_houses(self):
+        for h in (1, 2):
+            self.solver.add(Different.of(self.house[h], self.color.blue))
+            self.solver.add(Different.of(self.house[h], self.color.yellow))
+
+        self.assertIsInstance(self.rule.evaluate(Relation(self.house[3], self.color.red)), Different)
+        self.assertIsInstance(self.rule.evaluate(Relation(self.house[4], self.color.green)), Different)
+        self.assertIsNone(self.rule.evaluate(Relation(self.house[1], self.color.red)))
+        self.assertIsNone(self.rule.evaluate(Relation(self.house[3], self.color.blue)))
+
+    def test_evaluate_only_possible_value_returns_same(self):
+        for h in (1, 2, 3):
+            self.solver.add(Different.of(self.house[h], self.color.yellow))
+
+        self.assertIsInstance(self.rule.evaluate(Relation(self.house[4], self.color.yellow)), Same)
+        self.assertIsInstance(self.rule.evaluate(Relation(self.house[4], self.color.red)), Different)
+
+    def test_evaluate_no_perfect_matching_sets_contradiction(self):
+        for h in (1, 2, 3):
+            self.solver.add(Different.of(self.house[h], self.color.blue))
+            self.solver.add(Different.of(self.house[h], self.color.yellow))
+
+        self.assertIsNone(self.rule.evaluate(Relation(self.house[4], self.color.red)))
+        self.assertEqual(self.rule.contradiction, (self.house, self.color))
+
+    def test_solve_with_all_different_derives_same_knowledge(self):
+        solver = make_einstein_solver(-1)
+        solver.add(AllDifferent())
+        solver.solve()
+        expected = make_einstein_solver(-1)
+        expected.solve()
+        self.assertEqual(knowledge(solver), knowledge(expected))
+
+class EntityTrackerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.A = Attr('A', 0, ['A1', 'A2', 'A3'])
+        cls.B = Attr('B', 1, ['B1', 'B2', 'B3'])
+        cls.C = Attr('C', 2, ['C1', 'C2', 'C3'])
+
+    def setUp(self):
+        self.solver = Solver([self.A, self.B, self.C])
+        self.tracker = self.solver.track()
+
+    def test_add_same_chain_derives_transitive_same(self):
+        self.solver.add(Same.of(self.A.A1, self.B.B2)).add(Same.of(self.B.B2, self.C.C3))
+        self.assertTrue(self.solver.is_same_at(self.A.A1, self.C.C3))
+        self.assertEqual(set(self.tracker.entity(self.C.C3)), {self.A.A1, self.B.B2, self.C.C3})
+
+    def test_add_same_and_different_derives_different_across_entities(self):
+        self.solver.add(Same.of(self.A.A1, self.B.B2)).add(Different.of(self.B.B2, self.C.C3))
+        self.assertTrue(self.solver.is_different_at(self.A.A1, self.C.C3))
+        self.assertTrue(self.solver.is_different_at(self.A.A2, self.B.B2))
+
+    def test_add_same_to_different_entity_sets_contradiction(self):
+        self.solver.add(Different.of(self.A.A1, self.C.C1)).add(Same.of(self.A.A1, self.B.B1))
+        self.solver.add(Same.of(self.B.B1, self.C.C1))
+        self.assertEqual(self.tracker.contradiction, Relation(self.B.B1, self.C.C1))
+
+    def test_undo_restores_entities(self):
+        mark = self.tracker.mark()
+        self.tracker.add(Same.of(self.A.A1, self.B.B2))
+        self.tracker.add(Different.of(self.A.A1, self.C.C3))
+        self.tracker.undo(mark)
+        self.assertFalse(self.tracker.same(self.A.A1, self.B.B2))
+        self.assertFalse(self.tracker.different(self.B.B2, self.C.C3))
+        self.assertTrue(self.tracker.different(self.A.A1, self.A.A2))
+        self.assertEqual(self.tracker.entity(self.B.B2), [self.B.B2])
+
+    def test_solve_with_tracker_derives_same_knowledge(self):
+        for offset in (1, -1):
+            solver = make_einstein_solver(offset)
+            solver.track()
+            solver.solve()
+            expected = make_einstein_solver(offset)
+            expected.solve()
+            self.assertEqual(knowledge(solver), knowledge(expected))
+
+class SolverSearchTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.house = Attr('house', 0, [1, 2, 3])
+        cls.color = Attr('color', 1, ['red', 'green', 'blue'])
+        cls.nation = Attr('nation', 2, ['english', 'spanish', 'japanese'])
+
+    def test_count_solutions_without_clues_counts_all_permutations(self):
+        for track in (False, True):
+            solver = Solver([self.house, self.color, self.nation])
+            solver.add(AtLeastOnce())
+            if track:
+                solver.track()
+            self.assertEqual(solver.count_solutions(), 36)
+            self.assertEqual(solver.count_solutions(limit=2), 2)
+
+    def test_count_solutions_restores_knowledge(self):
+        solver = Solver([self.house, self.color, self.nation])
+        solver.add(AtLeastOnce())
+        solver.add(Same.of(self.house[1], self.color.red))
+        solver.solve()
+        before = knowledge(solver)
+        solver.count_solutions()
+        self.assertEqual(knowledge(solver), before)
+
+    def test_undo_restores_matrix_solver(self):
+        solver = MatrixSolver([self.house, self.color])
+        solver.add(AtLeastOnce())
+        mark = solver.mark()
+        solver.add(Same.of(self.house[2], self.color.green))
+        solver.propagate()
+        solver.undo(mark)
+        self.assertEqual(len(solver.map), 0)
+        self.assertFalse(solver.is_different_at(self.house[1], self.color.green))
+
+    def test_solve_with_search_completes_einstein_puzzle(self):
+        for offset in (1, -1):
+            solver = make_einstein_solver(offset)
+            self.assertTrue(solver.solve(search=True))
+            nation, animal, drink = solver.attrs[2], solver.attrs[3], solver.attrs[4]
+            self.assertTrue(solver.is_same_at(nation.norwegian, drink.water))
+            self.assertTrue(solver.is_same_at(nation.japanese, animal.zebra))
+            self.assertEqual(solver.count_solutions(), 1)
+
 class SolverAcceptanceTests(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -0,0 +1,325 @@
+"""
+Declarative clue table for the Zebra puzzle and the checkers generated from it.
+
+The table is read from the RDF graph (see rdf_graph.py): every value is typed with
+its category class, houses carry ns:position, and clues are ns:same / ns:offset /
+ns:dist triples. From this single table specialized Python functions are generated
+for each engine, with the clues ordered by selectivity and fused into one expression.
+"""
+import itertools
+import time
+from collections import namedtuple
+from math import factorial
+
+from rdflib import RDF
+
+# kind:
+#   same - a and b are in the same house
+#   position - a is in house number `amount` (0-based)
+#   offset - house of a = house of b + amount
+#   distance - |house of a - house of b| = amount
+# a and b are (category, value) pairs, b is None for position clues
+Clue = namedtuple('Clue', ['kind', 'a', 'b', 'amount'])
+
+
+class Puzzle:
+    """ Categories with their values and the clue table """
+    def __init__(self, categories, clues):
+        self.categories = categories
+        self.houses = len(next(iter(categories.values())))
+        self.clues = clues
+        self.category_ids = {category: i for i, category in enumerate(categories)}
+        self.value_ids = {(category, value): i
+                          for category, values in categories.items() for i, value in enumerate(values)}
+
+    @classmethod
+    def from_graph(cls, rdf_graph, ns):
+        house_class = ns.House
+        positions = {house: int(position) - 1 for house, _, position in rdf_graph.triples((None, ns.position, None))}
+        categories = {}
+        value_category = {}
+        # whether a type is itself typed (a category class), looked up once per class
+        is_category = {house_class: False}
+        for value, _, category_class in rdf_graph.triples((None, RDF.type, None)):
+            if category_class not in is_category:
+                is_category[category_class] = (category_class, RDF.type, None) in rdf_graph
+            if not is_category[category_class]:
+                continue
+            category = local_name(category_class).lower()
+            categories.setdefault(category, []).append(local_name(value))
+            value_category[value] = (category, local_name(value))
+        categories = {category: sorted(values) for category, values in sorted(categories.items())}
+
+        clues = []
+        for subj, obj in rdf_graph.subject_objects(ns.same):
+            if subj in positions:
+                clues.append(Clue('position', value_category[obj], None, positions[subj]))
+            elif obj in positions:
+                clues.append(Clue('position', value_category[subj], None, positions[obj]))
+            else:
+                clues.append(Clue('same', value_category[subj], value_category[obj], 0))
+        for subj, obj in rdf_graph.subject_objects(ns.offset):
+            clues.append(Clue('offset', value_category[subj], value_category[obj], 1))
+        for subj, obj in rdf_graph.subject_objects(ns.dist):
+            clues.append(Clue('distance', value_category[subj], value_category[obj], 1))
+        clues.sort()
+        return cls(categories, clues)
+
+    def involved(self, clue):
+        """ Categories a clue depends on """
+        if clue.b is None or clue.a[0] == clue.b[0]:
+            return (clue.a[0],)
+        return (clue.a[0], clue.b[0])
+
+    def pass_rate(self, clue):
+        """ Share of random candidates that pass the clue """
+        n = self.houses
+        if clue.kind in ('same', 'position'):
+            return 1 / n
+        if clue.kind == 'offset':
+            return (n - abs(clue.amount)) / (n * (n - 1))
+        return 2 * (n - clue.amount) / (n * (n - 1))
+
+    def by_selectivity(self, clues):
+        """ Most selective (lowest pass rate) clues first """
+        return sorted(clues, key=self.pass_rate)
+
+    def binding_order(self):
+        """
+        Order in which the engines bind categories: the category with the smallest pruned domain first,
+        then the one sharing the most clues with the categories already bound.
+        """
+        domain_size = {category: factorial(self.houses) for category in self.categories}
+        for clue in self.clues:
+            involved = self.involved(clue)
+            if len(involved) == 1:
+                domain_size[involved[0]] *= self.pass_rate(clue)
+        order = []
+        while len(order) < len(self.categories):
+            order.append(min(
+                (category for category in self.categories if category not in order),
+                key=lambda c: (-sum(1 for clue in self.clues
+                                    if c in self.involved(clue) and len(self.involved(clue)) > 1
+                                    and all(i in order or i == c for i in self.involved(clue))),
+                               domain_size[c])))
+        return order
+
+    def clues_at(self, order):
+        """ For each depth of the binding order, the clues whose last category is bound there """
+        return [self.by_selectivity([clue for clue in self.clues
+                                     if category in self.involved(clue)
+                                     and all(i in order[:depth + 1] for i in self.involved(clue))])
+                for depth, category in enumerate(order)]
+
+
+def local_name(node):
+    return str(node).rsplit("/", 1)[-1].rsplit("#", 1)[-1]
+
+
+def clue_expression(clue, ref, base=0):
+    """
+    Python expression for a clue, `ref(category, value)` gives the expression for the house
+    index of a value, `base` is the number of the first house.
+    """
+    a = ref(*clue.a)
+    if clue.kind == 'position':
+        return f"{a} == {clue.amount + base}"
+    b = ref(*clue.b)
+    if clue.kind == 'same':
+        return f"{a} == {b}"
+    if clue.kind == 'offset':
+        return f"{a} - {b} == {clue.amount}"
+    return f"abs({a} - {b}) == {clue.amount}"
+
+
+def _fused(clues, ref, base=0):
+    return " and ".join(f"({clue_expression(clue, ref, base)})" for clue in clues) or "True"
+
+
+def _compile(source, name, namespace=None):
+    namespace = dict(namespace or {})
+    exec(source, namespace)
+    function = namespace[name]
+    function.source = source
+    return function
+
+
+def _var(puzzle, category):
+    # category names come from the graph, generated code only uses their index
+    return f"c_{puzzle.category_ids[category]}"
+
+
+def compile_dict_checker(puzzle, clues=None):
+    """
+    Checker over the brute-force form {"House1": {'color': 'Red', ...}, ...}.
+    By default checks every clue, most selective first, otherwise the given clues in the given order.
+    """
+    clues = puzzle.by_selectivity(puzzle.clues) if clues is None else clues
+    categories = sorted({category for clue in clues for category in puzzle.involved(clue)})
+    lines = ["def check(combination):", "    houses = list(combination.values())"]
+    lines += [f"    {_var(puzzle, category)} = [house[{category!r}] for house in houses]" for category in categories]
+    lines.append("    return " + _fused(clues, lambda category, value: f"{_var(puzzle, category)}.index({value!r})"))
+    return _compile("\n".join(lines), "check")
+
+
+def compile_encoded_checker(puzzle, clues=None):
+    """
+    Checker over the encoded form: one tuple value id -> house index per category,
+    passed as positional arguments in puzzle.categories order.
+    By default checks every clue, most selective first, otherwise the given clues in the given order.
+    """
+    clues = puzzle.by_selectivity(puzzle.clues) if clues is None else clues
+    ref = lambda category, value: f"{_var(puzzle, category)}[{puzzle.value_ids[(category, value)]}]"
+    args = ", ".join(_var(puzzle, category) for category in puzzle.categories)
+    source = f"def check({args}):\n    return {_fused(clues, ref)}"
+    return _compile(source, "check")
+
+
+def compile_encoded_solver(puzzle):
+    """
+    Nested-loop search over encoded permutations, one loop per category in binding order,
+    each clue tested in the loop where its last category is bound.
+    Returns encoded tuples in puzzle.categories order, or None.
+    """
+    ref = lambda category, value: f"{_var(puzzle, category)}[{puzzle.value_ids[(category, value)]}]"
+    order = puzzle.binding_order()
+    lines = ["def solve():", f"    perms = list(permutations(range({puzzle.houses})))"]
+    indent = "    "
+    for category, clues in zip(order, puzzle.clues_at(order)):
+        lines.append(f"{indent}for {_var(puzzle, category)} in perms:")
+        indent += "    "
+        if clues:
+            lines.append(f"{indent}if not ({_fused(clues, ref)}):")
+            lines.append(f"{indent}    continue")
+    lines.append(f"{indent}return ({', '.join(_var(puzzle, category) for category in puzzle.categories)},)")
+    lines.append("    return None")
+    return _compile("\n".join(lines), "solve", {"permutations": itertools.permutations})
+
+
+def compile_house_masks(puzzle):
+    """
+    Clues for the propagate engine over bit masks of houses. Every value has a slot,
+    category index * houses + value id, so the slots of a category hold its encoded tuple.
+    Returns the initial mask of every slot, narrowed by the position clues, and for every slot y
+    its links (x, amount, both): house of x = house of y + amount (or - amount as well, if both).
+    """
+    n = puzzle.houses
+    slot = lambda category, value: puzzle.category_ids[category] * n + puzzle.value_ids[(category, value)]
+    masks = [(1 << n) - 1] * (n * len(puzzle.categories))
+    links = [[] for _ in masks]
+    for clue in puzzle.clues:
+        x = slot(*clue.a)
+        if clue.kind == 'position':
+            masks[x] &= 1 << clue.amount
+            continue
+        y = slot(*clue.b)
+        both = clue.kind == 'distance'
+        links[y].append((x, clue.amount, both))
+        links[x].append((y, clue.amount if both else -clue.amount, both))
+    return masks, links
+
+
+def compile_constraints(puzzle, base=1, clues=None):
+    """
+    Clues for the python-constraint model as (variables, function), variables are value names
+    with house numbers starting from `base` as their domain.
+    By default every clue, most selective first, otherwise the given clues in the given order.
+    """
+    constraints = []
+    for clue in (puzzle.by_selectivity(puzzle.clues) if clues is None else clues):
+        names = [clue.a[1]] if clue.b is None else [clue.a[1], clue.b[1]]
+        args = {value: f"v{i}" for i, value in enumerate(names)}
+        source = (f"def check({', '.join(args.values())}):\n"
+                  f"    return {clue_expression(clue, lambda category, value: args[value], base)}")
+        constraints.append((names, _compile(source, "check")))
+    return constraints
+
+
+class AdaptiveChecker:
+    """
+    Full-candidate checker that learns the clue order.
+    For the first `warmup` candidates the clues run one at a time, counting for each clue how often
+    it is evaluated and rejects and how long it takes. Then the clues are reordered by rejections per
+    unit of time, so the most-rejecting, cheapest clues run first, and fused into one checker.
+    `compile(clues)` builds a checker for the given clues in the given order, e.g.
+    lambda clues: compile_dict_checker(puzzle, clues).
+    """
+    def __init__(self, puzzle, compile, warmup=1000):
+        self.compile = compile
+        self.warmup = warmup
+        self.clues = puzzle.by_selectivity(puzzle.clues)
+        self.checks = [compile([clue]) for clue in self.clues]
+        self.evaluated = [0] * len(self.clues)
+        self.rejected = [0] * len(self.clues)
+        self.elapsed = [0.0] * len(self.clues)
+        self.candidates = 0
+        self.rejected_candidates = 0
+        self.fused = None
+
+    def __call__(self, *candidate):
+        if self.fused is not None:
+            return self.fused(*candidate)
+        self.candidates += 1
+        valid = True
+        for i, check in enumerate(self.checks):
+            start = time.perf_counter()
+            passed = check(*candidate)
+            self.elapsed[i] += time.perf_counter() - start
+            self.evaluated[i] += 1
+            if not passed:
+                self.rejected[i] += 1
+                self.rejected_candidates += 1
+                valid = False
+                break
+        if self.candidates >= self.warmup:
+            self.reorder()
+        return valid
+
+    def reject_rate(self, i):
+        return self.rejected[i] / self.evaluated[i] if self.evaluated[i] else 0.0
+
+    def cost(self, i):
+        return self.elapsed[i] / self.evaluated[i] if self.evaluated[i] else 0.0
+
+    def reorder(self):
+        # clues never reached during warmup keep their selectivity order, after the measured ones
+        measured = sorted((i for i in range(len(self.clues)) if self.evaluated[i]),
+                          key=lambda i: -self.reject_rate(i) / max(self.cost(i), 1e-9))
+        order = measured + [i for i in range(len(self.clues)) if not self.evaluated[i]]
+        self.clues = [self.clues[i] for i in order]
+        self.checks = [self.checks[i] for i in order]
+        self.evaluated = [self.evaluated[i] for i in order]
+        self.rejected = [self.rejected[i] for i in order]
+        self.elapsed = [self.elapsed[i] for i in order]
+        self.fused = self.compile(self.clues)
+
+    def checks_per_rejection(self):
+        """ Average number of clue checks per rejected candidate during warmup """
+        return sum(self.evaluated) / self.rejected_candidates if self.rejected_candidates else 0.0
+
+    def report(self):
+        """ Per-clue statistics collected during warmup, in the current evaluation order """
+        return [
+            {"clue": clue, "evaluated": self.evaluated[i], "rejected": self.rejected[i],
+             "reject_rate": self.reject_rate(i), "cost_us": self.cost(i) * 1e6}
+            for i, clue in enumerate(self.clues)
+        ]
+
+    def format_report(self):
+        lines = [f"{'clue':<60} {'evaluated':>9} {'rejected':>9} {'rate':>6} {'cost us':>8}"]
+        for row in self.report():
+            clue = row["clue"]
+            text = f"{clue.kind} {clue.a[1]} {clue.b[1] if clue.b else ''} {clue.amount}"
+            lines.append(f"{text:<60} {row['evaluated']:>9} {row['rejected']:>9} "
+                         f"{row['reject_rate']:>6.2f} {row['cost_us']:>8.2f}")
+        lines.append(f"checks per rejected candidate: {self.checks_per_rejection():.2f}")
+        return "\n".join(lines)
+
+
+def decode(puzzle, encoded):
+    """ Encoded tuples -> {"House1": {'color': 'Red', ...}, ...} """
+    return {
+        "House" + str(i + 1): {category: values[perm.index(i)]
+                               for (category, values), perm in zip(puzzle.categories.items(), encoded)}
+        for i in range(puzzle.houses)
+    }
@@ -0,0 +1,81 @@
+import itertools
+import unittest
+
+from rdflib import Namespace
+
+from clues import *
+from rdf_graph import create_rdf_graph
+
+NS = Namespace("http://example.org/")
+
+
+class ClueTableTests(unittest.TestCase):
+    def setUp(self):
+        self.puzzle = Puzzle.from_graph(create_rdf_graph(), NS)
+
+    def test_categories_from_the_graph(self):
+        self.assertEqual(sorted(self.puzzle.categories), ['cigar', 'color', 'drink', 'nationality', 'pet'])
+        self.assertEqual(self.puzzle.categories['color'], ['Blue', 'Green', 'Red', 'White', 'Yellow'])
+        self.assertEqual(self.puzzle.houses, 5)
+
+    def test_clues_from_the_graph(self):
+        clues = self.puzzle.clues
+        self.assertEqual(len(clues), 14)
+        self.assertIn(Clue('position', ('drink', 'Milk'), None, 2), clues)
+        self.assertIn(Clue('position', ('nationality', 'Norwegian'), None, 0), clues)
+        self.assertIn(Clue('offset', ('color', 'Green'), ('color', 'White'), 1), clues)
+        self.assertIn(Clue('distance', ('pet', 'Horse'), ('cigar', 'Kool'), 1), clues)
+        self.assertIn(Clue('same', ('color', 'Red'), ('nationality', 'English'), 0), clues)
+
+    def test_binding_order_covers_every_category(self):
+        order = self.puzzle.binding_order()
+        self.assertEqual(sorted(order), sorted(self.puzzle.categories))
+        clues_at = self.puzzle.clues_at(order)
+        self.assertEqual(sorted(clue for clues in clues_at for clue in clues), self.puzzle.clues)
+
+    def test_clue_expression(self):
+        ref = lambda category, value: value
+        self.assertEqual(clue_expression(Clue('offset', ('color', 'a'), ('color', 'b'), 1), ref), "a - b == 1")
+        self.assertEqual(clue_expression(Clue('distance', ('color', 'a'), ('pet', 'b'), 1), ref), "abs(a - b) == 1")
+        self.assertEqual(clue_expression(Clue('position', ('color', 'a'), None, 2), ref, base=1), "a == 3")
+
+    def test_encoded_solver_and_checker_agree(self):
+        encoded = compile_encoded_solver(self.puzzle)()
+        self.assertTrue(compile_encoded_checker(self.puzzle)(*encoded))
+        solution = decode(self.puzzle, encoded)
+        self.assertEqual(solution["House5"]["pet"], "Zebra")
+        self.assertTrue(compile_dict_checker(self.puzzle)(solution))
+
+
+class AdaptiveCheckerTests(unittest.TestCase):
+    def setUp(self):
+        self.puzzle = Puzzle.from_graph(create_rdf_graph(), NS)
+        self.solution = decode(self.puzzle, compile_encoded_solver(self.puzzle)())
+        self.checker = AdaptiveChecker(self.puzzle, lambda clues: compile_dict_checker(self.puzzle, clues), warmup=50)
+
+    def candidates(self, count):
+        """ The solution with the pets of two houses swapped """
+        pairs = itertools.cycle(itertools.combinations(self.solution, 2))
+        for a, b in itertools.islice(pairs, count):
+            candidate = {house: dict(attrs) for house, attrs in self.solution.items()}
+            candidate[a]['pet'], candidate[b]['pet'] = candidate[b]['pet'], candidate[a]['pet']
+            yield candidate
+
+    def test_answers_like_the_fused_checker(self):
+        full = compile_dict_checker(self.puzzle)
+        for candidate in list(self.candidates(60)) + [self.solution]:
+            self.assertEqual(self.checker(candidate), full(candidate))
+        self.assertIsNotNone(self.checker.fused)
+
+    def test_rejecting_clues_move_first(self):
+        for candidate in self.candidates(50):
+            self.checker(candidate)
+        report = self.checker.report()
+        self.assertEqual(sorted(row["clue"] for row in report), self.puzzle.clues)
+        self.assertGreater(report[0]["rejected"], 0)
+        self.assertIn('pet', self.puzzle.involved(report[0]["clue"]))
+        self.assertGreaterEqual(self.checker.checks_per_rejection(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,114 +1,214 @@
+import argparse
+import os
+import sys
+
 from rdf_graph import create_rdf_graph
 from rdflib import Namespace, URIRef
+from clues import (AdaptiveChecker, Puzzle, compile_dict_checker, compile_encoded_checker, compile_encoded_solver,
+                   compile_house_masks, decode)
 import itertools
-
-def is_valid_partial_combination(combination, ns):
-    # Early checks based on fixed clues
-    if combination['House1']['nationality'] != 'Norwegian':  # Clue 10
-        return False
-    if combination['House3']['drink'] != 'Milk':  # Clue 9
-        return False
-    return True
+from functools import lru_cache
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from graph_version import GraphCache
+
+class Checkers:
+    """ Clue table of a graph and the checkers generated from it for every engine """
+    def __init__(self, rdf_graph, ns):
+        self.puzzle = Puzzle.from_graph(rdf_graph, ns)
+        fixed = [clue for clue in self.puzzle.clues if clue.kind == 'position']
+        self.partial = compile_dict_checker(self.puzzle, fixed)
+        self.full = compile_dict_checker(self.puzzle)
+        self.encoded = compile_encoded_checker(self.puzzle)
+        self.encoded_solver = compile_encoded_solver(self.puzzle)
+        self.house_masks = compile_house_masks(self.puzzle)
+        self._adaptive = None
+
+    @property
+    def adaptive(self):
+        """ Full-combination validator that reorders clues by their observed reject rate """
+        if self._adaptive is None:
+            self._adaptive = AdaptiveChecker(self.puzzle, lambda clues: compile_dict_checker(self.puzzle, clues))
+        return self._adaptive
+
+_checkers = GraphCache()
+
+def checkers(rdf_graph, ns):
+    """ Checkers for the graph, generated on first use and generated again after the graph changes """
+    return _checkers.get(rdf_graph, str(ns), lambda: Checkers(rdf_graph, ns))
+
+@lru_cache(maxsize=None)
+def _classic_graph():
+    return create_rdf_graph()
+
+def is_valid_partial_combination(combination, ns, rdf_graph=None):
+    # Early checks based on fixed clues (value in a given house), of the classic puzzle by default
+    rdf_graph = rdf_graph if rdf_graph is not None else _classic_graph()
+    return checkers(rdf_graph, ns).partial(combination)
 
 def is_valid_full_combination(combination, rdf_graph, ns):
-    # Convert URIRefs to a list for index-based access
-    houses = list(combination.keys())
-
-    for house, attributes in combination.items():
-        house_index = houses.index(house)
-
-        # Clue 2: The Englishman lives in the red house.
-        if attributes['nationality'] == 'Englishman' and attributes['color'] != 'Red':
-            return False
-
-        # Clue 3: The Spaniard owns the dog.
-        if attributes['nationality'] == 'Spaniard' and attributes['pet'] != 'Dog':
-            return False
-
-        # Clue 4: Coffee is drunk in the green house.
-        if attributes['drink'] == 'Coffee' and attributes['color'] != 'Green':
-            return False
-
-        # Clue 5: The Ukrainian drinks tea.
-        if attributes['nationality'] == 'Ukrainian' and attributes['drink'] != 'Tea':
-            return False
-
-        # Clue 6: The green house is immediately to the right of the ivory house.
-        if attributes['color'] == 'Green':
-            if house_index == 0 or combination[houses[house_index - 1]]['color'] != 'Ivory':
-                return False
-
-        # Clue 7: The Old Gold smoker owns snails.
-        if attributes['cigar'] == 'OldGold' and attributes['pet'] != 'Snails':
-            return False
-
-        # Clue 8: Kools are smoked in the yellow house.
-        if attributes['cigar'] == 'Kools' and attributes['color'] != 'Yellow':
-            return False
+    return checkers(rdf_graph, ns).full(combination)
+
+def is_valid_encoded_combination(encoded, rdf_graph, ns):
+    """
+    Same clues as is_valid_full_combination over the encoded form:
+    one tuple value id -> house index (0-4) per category.
+    """
+    return checkers(rdf_graph, ns).encoded(*encoded)
+
+def solve_zebra_puzzle(rdf_graph, ns, engine="propagate", adaptive=False):
+    """
+    Solve the puzzle with the chosen engine:
+      brute - enumerate every full combination and validate it,
+              with adaptive=True the clue order is learned (see checkers(rdf_graph, ns).adaptive.report())
+      encoded - brute force over integer-encoded candidates, clues tested in the loop where they become decidable
+      propagate - narrow the houses each value can be in, then place the values one category at a time,
+                  narrowing again after every placement
+    """
+    if engine == "brute":
+        return solve_brute_force(rdf_graph, ns, adaptive)
+    if engine == "encoded":
+        return solve_encoded(rdf_graph, ns)
+    if engine == "propagate":
+        return solve_propagate(rdf_graph, ns)
+    raise ValueError("Unknown engine: " + engine)
+
+def solve_brute_force(rdf_graph, ns, adaptive=False):
+    categories = checkers(rdf_graph, ns).puzzle.categories
+    is_valid = checkers(rdf_graph, ns).adaptive if adaptive else \
+        lambda combination: is_valid_full_combination(combination, rdf_graph, ns)
 
-        # Clue 11: The Chesterfields smoker lives next to the man with the fox.
-        if attributes['cigar'] == 'Chesterfields':
-            if not ((house_index > 0 and combination[houses[house_index - 1]]['pet'] == 'Fox') or 
-                    (house_index < 4 and combination[houses[house_index + 1]]['pet'] == 'Fox')):
-                return False
-
-        # Clue 12: Kools are smoked in the house next to the house where the horse is kept.
-        if attributes['cigar'] == 'Kools':
-            if not ((house_index > 0 and combination[houses[house_index - 1]]['pet'] == 'Horse') or 
-                    (house_index < 4 and combination[houses[house_index + 1]]['pet'] == 'Horse')):
-                return False
-
-        # Clue 13: The Lucky Strike smoker drinks orange juice.
-        if attributes['cigar'] == 'LuckyStrike' and attributes['drink'] != 'OrangeJuice':
-            return False
-
-        # Clue 14: The Japanese smokes Parliaments.
-        if attributes['nationality'] == 'Japanese' and attributes['cigar'] != 'Parliaments':
-            return False
+    # Generate all possible combinations
+    for perms in itertools.product(*(itertools.permutations(values) for values in categories.values())):
+        combination = {
+            "House" + str(i+1): dict(zip(categories, house_values))
+            for i, house_values in enumerate(zip(*perms))
+        }
+
+        if is_valid_partial_combination(combination, ns, rdf_graph) and is_valid(combination):
+            return combination
+    return None
 
-        # Clue 15: The Norwegian lives next to the blue house.
-        if attributes['nationality'] == 'Norwegian':
-            if not ((house_index > 0 and combination[houses[house_index - 1]]['color'] == 'Blue') or 
-                    (house_index < 4 and combination[houses[house_index + 1]]['color'] == 'Blue')):
+def solve_encoded(rdf_graph, ns):
+    puzzle_checkers = checkers(rdf_graph, ns)
+    encoded = puzzle_checkers.encoded_solver()
+    return decode(puzzle_checkers.puzzle, encoded) if encoded is not None else None
+
+def _shift(mask, amount, full):
+    return (mask << amount) & full if amount >= 0 else mask >> -amount
+
+def _narrow(masks, links, n, changed):
+    """
+    Narrow the house masks (see compile_house_masks) to a fixpoint: along the clue links, a value
+    placed in a house is removed from the other values of its category, and a house possible
+    for a single value of a category is given to it. Returns False on a contradiction.
+    """
+    full = (1 << n) - 1
+    while changed:
+        while changed:
+            y = changed.pop()
+            mask = masks[y]
+            for x, amount, both in links[y]:
+                support = _shift(mask, amount, full)
+                if both:
+                    support |= _shift(mask, -amount, full)
+                narrowed = masks[x] & support
+                if narrowed != masks[x]:
+                    if not narrowed:
+                        return False
+                    masks[x] = narrowed
+                    changed.append(x)
+            if mask & (mask - 1) == 0:
+                first = y - y % n
+                for z in range(first, first + n):
+                    if z != y and masks[z] & mask:
+                        masks[z] &= ~mask
+                        if not masks[z]:
+                            return False
+                        changed.append(z)
+        for first in range(0, len(masks), n):
+            once = twice = 0
+            for z in range(first, first + n):
+                twice |= once & masks[z]
+                once |= masks[z]
+            if once != full:
                 return False
-
+            single = once & ~twice
+            for z in range(first, first + n):
+                mask = masks[z]
+                if mask & single and mask & (mask - 1):
+                    narrowed = mask & single
+                    if narrowed & (narrowed - 1):
+                        return False
+                    masks[z] = narrowed
+                    changed.append(z)
     return True
 
-def solve_zebra_puzzle(rdf_graph, ns):
-    # Define possible attributes
-    colors = ['Red', 'Green', 'Ivory', 'Yellow', 'Blue']
-    nationalities = ['Englishman', 'Spaniard', 'Ukrainian', 'Norwegian', 'Japanese']
-    drinks = ['Coffee', 'Tea', 'Milk', 'OrangeJuice', 'Water']
-    cigars = ['OldGold', 'Kools', 'Chesterfields', 'LuckyStrike', 'Parliaments']
-    pets = ['Dog', 'Snails', 'Fox', 'Horse', 'Zebra']
-
-    # Generate all possible combinations
-    for color_perm in itertools.permutations(colors):
-        for nationality_perm in itertools.permutations(nationalities):
-            for drink_perm in itertools.permutations(drinks):
-                for cigar_perm in itertools.permutations(cigars):
-                    for pet_perm in itertools.permutations(pets):
-                        combination = {
-                            "House" + str(i+1): {
-                                'color': color, 
-                                'nationality': nat,
-                                'drink': drink,
-                                'cigar': cigar,
-                                'pet': pet
-                            }
-                            for i, (color, nat, drink, cigar, pet) in enumerate(zip(color_perm, nationality_perm, drink_perm, cigar_perm, pet_perm))
-                        }
-
-                        if is_valid_partial_combination(combination, ns) and \
-                           is_valid_full_combination(combination, rdf_graph, ns):
-                            return combination
-    return None
+def solve_propagate(rdf_graph, ns):
+    puzzle_checkers = checkers(rdf_graph, ns)
+    puzzle = puzzle_checkers.puzzle
+    initial, links = puzzle_checkers.house_masks
+    n = puzzle.houses
+
+    masks = list(initial)
+    if not _narrow(masks, links, n, list(range(len(masks)))):
+        return None
+
+    # The permutation of each category, in binding order, is built lazily one value at a time: the value with
+    # the fewest houses left is placed next, and every placement is narrowed before going deeper
+    order = [puzzle.category_ids[category] for category in puzzle.binding_order()]
+
+    def search(masks):
+        for category in order:
+            open_slots = [z for z in range(category * n, category * n + n) if masks[z] & (masks[z] - 1)]
+            if open_slots:
+                break
+        else:
+            return masks
+        z = min(open_slots, key=lambda z: bin(masks[z]).count('1'))
+        rest = masks[z]
+        while rest:
+            bit = rest & -rest
+            rest &= rest - 1
+            trial = list(masks)
+            trial[z] = bit
+            if _narrow(trial, links, n, [z]):
+                found = search(trial)
+                if found is not None:
+                    return found
+        return None
+
+    masks = search(masks)
+    if masks is None:
+        return None
+    # encoded tuples value id -> house index, in puzzle.categories order
+    encoded = [tuple(masks[z].bit_length() - 1 for z in range(category * n, category * n + n))
+               for category in range(len(puzzle.categories))]
+    return decode(puzzle, encoded)
 
 def main():
-    rdf_graph = create_rdf_graph()
-    ns = Namespace("http://example.org/")
+    parser = argparse.ArgumentParser(description="Solve the Zebra puzzle")
+    parser.add_argument("--engine", choices=["brute", "encoded", "propagate"], default="propagate")
+    parser.add_argument("--store", help="puzzle store (store.py) to open the puzzle from")
+    parser.add_argument("--puzzle", help="puzzle id in the store")
+    args = parser.parse_args()
+
+    if args.store:
+        from store import open_puzzle
+
+        if not args.puzzle:
+            parser.error("--store needs --puzzle")
+        if not os.path.exists(args.store):
+            parser.error(f"no puzzle store {args.store}")
+        try:
+            rdf_graph, ns = open_puzzle(args.store, args.puzzle)
+        except KeyError:
+            parser.error(f"no puzzle {args.puzzle!r} in {args.store}")
+    else:
+        rdf_graph = create_rdf_graph()
+        ns = Namespace("http://example.org/")
 
-    solution = solve_zebra_puzzle(rdf_graph, ns)
+    solution = solve_zebra_puzzle(rdf_graph, ns, engine=args.engine)
 
     if solution:
         print("Solution found:")
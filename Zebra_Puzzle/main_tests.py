@@ -0,0 +1,138 @@
+import pickle
+import random
+import unittest
+
+from rdflib import Graph, Literal, Namespace, OWL, RDF
+
+from clues import local_name
+from main import *
+
+NS = Namespace("http://example.org/")
+
+CLASSIC = {
+    "House1": {'cigar': 'Kool', 'color': 'Yellow', 'drink': 'Water', 'nationality': 'Norwegian', 'pet': 'Fox'},
+    "House2": {'cigar': 'Chesterfield', 'color': 'Blue', 'drink': 'Tea', 'nationality': 'Ukrainian', 'pet': 'Horse'},
+    "House3": {'cigar': 'OldGold', 'color': 'Red', 'drink': 'Milk', 'nationality': 'English', 'pet': 'Snail'},
+    "House4": {'cigar': 'LuckyStrike', 'color': 'White', 'drink': 'OrangeJuice', 'nationality': 'Spanish', 'pet': 'Dog'},
+    "House5": {'cigar': 'Parliament', 'color': 'Green', 'drink': 'Coffee', 'nationality': 'Japanese', 'pet': 'Zebra'},
+}
+
+
+def small_graph():
+    """ Three houses, small enough for the brute-force engine """
+    g = Graph()
+    categories = {NS.House: [NS.House1, NS.House2, NS.House3],
+                  NS.Color: [NS.Red, NS.Green, NS.Blue],
+                  NS.Pet: [NS.Dog, NS.Cat, NS.Fish]}
+    for category, members in categories.items():
+        g.add((category, RDF.type, OWL.Class))
+        for member in members:
+            g.add((member, RDF.type, category))
+    for i, house in enumerate(categories[NS.House]):
+        g.add((house, NS.position, Literal(i + 1)))
+    g.add((NS.Red, NS.same, NS.House1))
+    g.add((NS.Green, NS.offset, NS.Red))
+    g.add((NS.Dog, NS.same, NS.Blue))
+    g.add((NS.Cat, NS.same, NS.House1))
+    return g
+
+def chain_graph(houses, categories, seed=0):
+    """
+    Puzzle with `houses` houses and `categories` categories besides the houses, far past brute force:
+    Color1 is in the first house, each next color right of the previous one, every other value in
+    the same house as a color. Returns the graph and the solution.
+    """
+    rng = random.Random(seed)
+    g = Graph()
+    names = ["Color"] + [f"Category{i}" for i in range(1, categories)]
+    members = {name: [NS[f"{name}{i + 1}"] for i in range(houses)] for name in names}
+    members["House"] = [NS[f"House{i + 1}"] for i in range(houses)]
+    for name, values in members.items():
+        g.add((NS[name], RDF.type, OWL.Class))
+        for value in values:
+            g.add((value, RDF.type, NS[name]))
+    for i, house in enumerate(members["House"]):
+        g.add((house, NS.position, Literal(i + 1)))
+    g.add((members["Color"][0], NS.same, members["House"][0]))
+    for left, right in zip(members["Color"], members["Color"][1:]):
+        g.add((right, NS.offset, left))
+    solution = {f"House{i + 1}": {"color": f"Color{i + 1}"} for i in range(houses)}
+    for name in names[1:]:
+        for i, value in enumerate(rng.sample(members[name], houses)):
+            g.add((value, NS.same, members["Color"][i]))
+            solution[f"House{i + 1}"][name.lower()] = local_name(value)
+    return g, solution
+
+SMALL = {
+    "House1": {'color': 'Red', 'pet': 'Cat'},
+    "House2": {'color': 'Green', 'pet': 'Fish'},
+    "House3": {'color': 'Blue', 'pet': 'Dog'},
+}
+
+
+class EngineTests(unittest.TestCase):
+    def test_propagate_solves_the_classic_puzzle(self):
+        self.assertEqual(solve_zebra_puzzle(create_rdf_graph(), NS, "propagate"), CLASSIC)
+
+    def test_encoded_solves_the_classic_puzzle(self):
+        self.assertEqual(solve_zebra_puzzle(create_rdf_graph(), NS, "encoded"), CLASSIC)
+
+    def test_every_engine_solves_a_small_puzzle(self):
+        for engine in ("brute", "encoded", "propagate"):
+            self.assertEqual(solve_zebra_puzzle(small_graph(), NS, engine), SMALL, engine)
+        self.assertEqual(solve_zebra_puzzle(small_graph(), NS, "brute", adaptive=True), SMALL)
+
+    def test_category_names_are_not_code(self):
+        names = {NS.Color: NS["house-color"], NS.Pet: NS["pet or __import__('os').abort()"]}
+        graph = Graph()
+        for triple in small_graph():
+            graph.add(tuple(names.get(node, node) for node in triple))
+        expected = {house: {"house-color": attrs['color'], "pet or __import__('os').abort()": attrs['pet']}
+                    for house, attrs in SMALL.items()}
+        for engine in ("brute", "encoded", "propagate"):
+            self.assertEqual(solve_zebra_puzzle(graph, NS, engine), expected, engine)
+
+    def test_propagate_scales_past_brute_force(self):
+        graph, solution = chain_graph(9, 6)
+        self.assertEqual(solve_zebra_puzzle(graph, NS, "propagate"), solution)
+
+    def test_checkers_accept_the_solution_only(self):
+        graph = create_rdf_graph()
+        self.assertTrue(is_valid_full_combination(CLASSIC, graph, NS))
+        swapped = {house: dict(attrs) for house, attrs in CLASSIC.items()}
+        swapped["House1"]["pet"], swapped["House2"]["pet"] = "Horse", "Fox"
+        self.assertFalse(is_valid_full_combination(swapped, graph, NS))
+
+    def test_partial_check_defaults_to_the_classic_puzzle(self):
+        self.assertTrue(is_valid_partial_combination(CLASSIC, NS))
+        self.assertTrue(is_valid_partial_combination(SMALL, NS, small_graph()))
+        self.assertFalse(is_valid_partial_combination(dict(reversed(list(CLASSIC.items()))), NS))
+
+    def test_checkers_follow_changes_to_the_graph(self):
+        graph = small_graph()
+        self.assertEqual(solve_zebra_puzzle(graph, NS, "propagate"), SMALL)
+        graph.remove((NS.Cat, NS.same, NS.House1))
+        graph.add((NS.Fish, NS.same, NS.House1))
+        self.assertEqual(solve_zebra_puzzle(graph, NS, "propagate")["House1"]["pet"], "Fish")
+        self.assertFalse(is_valid_full_combination(SMALL, graph, NS))
+
+    def test_solved_graph_is_not_patched_and_pickles(self):
+        graph = small_graph()
+        self.assertEqual(solve_zebra_puzzle(graph, NS, "propagate"), SMALL)
+        self.assertEqual(vars(graph).keys(), vars(small_graph()).keys())
+        copy = pickle.loads(pickle.dumps(graph))
+        self.assertEqual(solve_zebra_puzzle(copy, NS, "encoded"), SMALL)
+
+    def test_contradiction_has_no_solution(self):
+        for engine in ("brute", "encoded", "propagate"):
+            graph = small_graph()
+            graph.add((NS.Cat, NS.same, NS.Blue))
+            self.assertIsNone(solve_zebra_puzzle(graph, NS, engine), engine)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            solve_zebra_puzzle(small_graph(), NS, "quantum")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Binary Zebra puzzles (the format of shared/binary_graph.py) for solver workers: the clue table is read
+straight from the memory-mapped file, without an rdflib Graph.
+
+Usage: python rdf_binary.py zebra.ttl zebra.pzg      (convert)
+       python rdf_binary.py zebra.pzg                 (solve, with --engine propagate|encoded|brute)
+"""
+import argparse
+import os
+import sys
+
+from rdflib import Graph, Namespace
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from binary_graph import as_table, dump, load
+
+
+def load_clue_table(source, ns=None):
+    """
+    Solver table of a binary Zebra graph (path, bytes or TripleTable): the clues.Puzzle clue table,
+    read by Puzzle.from_graph through the TripleTable
+    """
+    from clues import Puzzle
+
+    return Puzzle.from_graph(as_table(source), ns or Namespace("http://example.org/"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a Zebra puzzle graph to the binary form, or solve a binary one")
+    parser.add_argument("source", help="RDF file to convert, or .pzg file to solve")
+    parser.add_argument("target", nargs="?", help="binary file to write")
+    parser.add_argument("--engine", choices=["brute", "encoded", "propagate"], default="propagate")
+    args = parser.parse_args()
+
+    if args.target:
+        dump(Graph().parse(args.source), args.target)
+        return
+
+    from main import solve_zebra_puzzle
+
+    # the engines read the clue table through the same triple patterns as from an rdflib Graph
+    solution = solve_zebra_puzzle(load(args.source), Namespace("http://example.org/"), engine=args.engine)
+    if solution:
+        print("Solution found:")
+        for house, attrs in solution.items():
+            print(f"{house}: {attrs}")
+    else:
+        print("No solution found.")
+
+
+if __name__ == "__main__":
+    main()
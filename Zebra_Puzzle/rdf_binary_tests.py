@@ -0,0 +1,41 @@
+import unittest
+
+from rdflib import Namespace, OWL, RDF, RDFS
+
+from clues import Puzzle
+from main import solve_zebra_puzzle
+from main_tests import CLASSIC, small_graph
+from rdf_binary import load_clue_table
+from rdf_graph import create_rdf_graph
+# shared/, put on the path by rdf_binary
+from binary_graph import dumps, loads
+
+NS = Namespace("http://example.org/")
+
+
+class LoaderTests(unittest.TestCase):
+    def assertSameTable(self, graph):
+        expected = Puzzle.from_graph(graph, NS)
+        found = load_clue_table(dumps(graph), NS)
+        self.assertEqual(found.categories, expected.categories)
+        self.assertEqual(found.clues, expected.clues)
+
+    def test_clue_table_matches_the_graph(self):
+        self.assertSameTable(create_rdf_graph())
+        self.assertSameTable(small_graph())
+
+    def test_categories_typed_other_than_owl_class(self):
+        graph = small_graph()
+        graph.remove((NS.Pet, RDF.type, OWL.Class))
+        graph.add((NS.Pet, RDF.type, RDFS.Class))
+        self.assertSameTable(graph)
+        self.assertIn('pet', load_clue_table(dumps(graph), NS).categories)
+
+    def test_engines_solve_from_the_table(self):
+        data = dumps(create_rdf_graph())
+        for engine in ("encoded", "propagate"):
+            self.assertEqual(solve_zebra_puzzle(loads(data), NS, engine), CLASSIC)
+
+
+if __name__ == '__main__':
+    unittest.main()
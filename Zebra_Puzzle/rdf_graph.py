@@ -12,17 +12,33 @@ def create_rdf_graph():
     drinks = [ns.Coffee, ns.Tea, ns.Milk, ns.OrangeJuice, ns.Water]
     smokes = [ns.OldGold, ns.Kool, ns.Chesterfield, ns.LuckyStrike, ns.Parliament]
 
+    # Categories: every entity is typed with its category class, houses also get their position
+    categories = {
+        ns.House: houses,
+        ns.Color: colors,
+        ns.Nationality: nationalities,
+        ns.Pet: animals,
+        ns.Drink: drinks,
+        ns.Cigar: smokes,
+    }
+    for category, members in categories.items():
+        g.add((category, RDF.type, OWL.Class))
+        for member in members:
+            g.add((member, RDF.type, category))
+    for i, house in enumerate(houses):
+        g.add((house, ns.position, Literal(i + 1)))
+
     # Relationships
     same = URIRef(ns["same"])
-    offset = URIRef(ns["offset"])
-    dist = URIRef(ns["dist"])
+    offset = URIRef(ns["offset"])  # subject is in the house immediately right of the object
+    dist = URIRef(ns["dist"])  # subject and object are in neighbouring houses
 
     # Adding triples based on provided knowledge
     g.add((colors[0], same, nationalities[0]))  # Red - English
     g.add((nationalities[1], same, animals[0]))  # Spanish - Dog
     g.add((colors[1], same, drinks[0]))  # Green - Coffee
     g.add((nationalities[2], same, drinks[1]))  # Ukrainian - Tea
-    g.add((houses[0], offset, colors[2]))  # House 1 - Offset - White - Green
+    g.add((colors[1], offset, colors[2]))  # Green - Offset - White
     g.add((smokes[0], same, animals[1]))  # OldGold - Snail
     g.add((colors[3], same, smokes[1]))  # Yellow - Kool
     g.add((houses[2], same, drinks[2]))  # House 3 - Milk
@@ -35,26 +51,27 @@ def create_rdf_graph():
 
     return g
 
-g = create_rdf_graph()
-
-# Query to find which nationality drinks water
-query_water = """
-PREFIX ns: <http://example.org/>
-SELECT ?nationality WHERE {
-    ?nationality ns:same ns:Water .
-}
-"""
-
-for row in g.query(query_water):
-    print(f"Nationality that drinks water: {row.nationality}")
-
-# Query to find which nationality keeps the zebra
-query_zebra = """
-PREFIX ns: <http://example.org/>
-SELECT ?nationality WHERE {
-    ?nationality ns:same ns:Zebra .
-}
-"""
-
-for row in g.query(query_zebra):
-    print(f"Nationality that keeps the zebra: {row.nationality}")
+if __name__ == "__main__":
+    g = create_rdf_graph()
+
+    # Query to find which nationality drinks water
+    query_water = """
+    PREFIX ns: <http://example.org/>
+    SELECT ?nationality WHERE {
+        ?nationality ns:same ns:Water .
+    }
+    """
+
+    for row in g.query(query_water):
+        print(f"Nationality that drinks water: {row.nationality}")
+
+    # Query to find which nationality keeps the zebra
+    query_zebra = """
+    PREFIX ns: <http://example.org/>
+    SELECT ?nationality WHERE {
+        ?nationality ns:same ns:Zebra .
+    }
+    """
+
+    for row in g.query(query_zebra):
+        print(f"Nationality that keeps the zebra: {row.nationality}")
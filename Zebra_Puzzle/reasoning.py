@@ -1,79 +1,77 @@
-from constraint import Problem
-
-def zebra_puzzle():
+from itertools import islice
+
+from constraint import AllDifferentConstraint, AllEqualConstraint, InSetConstraint, Problem
+from rdflib import Namespace
+from rdf_graph import create_rdf_graph
+from clues import Puzzle, compile_constraints
+
+def load_puzzle(rdf_graph=None, ns=None):
+    ns = ns or Namespace("http://example.org/")
+    return Puzzle.from_graph(rdf_graph if rdf_graph is not None else create_rdf_graph(), ns)
+
+def build_problem(puzzle, clue_order=None):
+    """
+    python-constraint model of the puzzle. Clues are added most selective first, or in `clue_order`
+    (a list of clues, e.g. from AdaptiveChecker.clues after warmup).
+    """
     problem = Problem()
 
-    # Variables (houses 1 through 5)
-    houses = range(1, 6)
-    colors = ['Red', 'Green', 'Ivory', 'Yellow', 'Blue']
-    nationalities = ['Englishman', 'Spaniard', 'Ukrainian', 'Norwegian', 'Japanese']
-    drinks = ['Coffee', 'Tea', 'Milk', 'OrangeJuice', 'Water']
-    cigars = ['OldGold', 'Kools', 'Chesterfields', 'LuckyStrike', 'Parliaments']
-    pets = ['Dog', 'Snails', 'Fox', 'Horse', 'Zebra']
-
-    problem.addVariables(colors + nationalities + drinks + cigars + pets, houses)
+    # Variables (houses 1 through N)
+    houses = range(1, puzzle.houses + 1)
+    for values in puzzle.categories.values():
+        problem.addVariables(values, houses)
 
     # Each house number must be different
-    for group in (colors, nationalities, drinks, cigars, pets):
-        problem.addConstraint(lambda *args: len(set(args)) == 5, group)
-
-    # Clue 2: The Englishman lives in the red house.
-    problem.addConstraint(lambda e, r: e == r, ['Englishman', 'Red'])
-
-    # Clue 3: The Spaniard owns the dog.
-    problem.addConstraint(lambda s, d: s == d, ['Spaniard', 'Dog'])
-
-    # Clue 4: Coffee is drunk in the green house.
-    problem.addConstraint(lambda c, g: c == g, ['Coffee', 'Green'])
-
-    # Clue 5: The Ukrainian drinks tea.
-    problem.addConstraint(lambda u, t: u == t, ['Ukrainian', 'Tea'])
-
-    # Clue 6: The green house is immediately to the right of the ivory house.
-    problem.addConstraint(lambda g, i: g - i == 1, ['Green', 'Ivory'])
-
-    # Clue 7: The Old Gold smoker owns snails.
-    problem.addConstraint(lambda og, s: og == s, ['OldGold', 'Snails'])
-
-    # Clue 8: Kools are smoked in the yellow house.
-    problem.addConstraint(lambda k, y: k == y, ['Kools', 'Yellow'])
-
-    # Clue 9: Milk is drunk in the middle house.
-    problem.addConstraint(lambda m: m == 3, ['Milk'])
-
-    # Clue 10: The Norwegian lives in the first house.
-    problem.addConstraint(lambda n: n == 1, ['Norwegian'])
-
-    # Clue 11: The Chesterfields smoker lives next to the fox owner.
-    problem.addConstraint(lambda c, f: abs(c - f) == 1, ['Chesterfields', 'Fox'])
-
-    # Clue 12: Kools are smoked in the house next to the horse owner.
-    problem.addConstraint(lambda k, h: abs(k - h) == 1, ['Kools', 'Horse'])
-
-    # Clue 13: The Lucky Strike smoker drinks orange juice.
-    problem.addConstraint(lambda ls, oj: ls == oj, ['LuckyStrike', 'OrangeJuice'])
-
-    # Clue 14: The Japanese smokes Parliaments.
-    problem.addConstraint(lambda j, p: j == p, ['Japanese', 'Parliaments'])
-
-    # Clue 15: The Norwegian lives next to the blue house.
-    problem.addConstraint(lambda n, b: abs(n - b) == 1, ['Norwegian', 'Blue'])
-
-    # Solving the puzzle
-    solutions = problem.getSolutions()
-
+    for group in puzzle.categories.values():
+        problem.addConstraint(AllDifferentConstraint(), group)
+
+    # Clues from the clue table, native constraints where there is one so the solver can prune with them
+    clues = puzzle.by_selectivity(puzzle.clues) if clue_order is None else clue_order
+    for clue in clues:
+        if clue.kind == 'same':
+            problem.addConstraint(AllEqualConstraint(), [clue.a[1], clue.b[1]])
+        elif clue.kind == 'position':
+            problem.addConstraint(InSetConstraint([clue.amount + 1]), [clue.a[1]])
+        else:
+            for variables, check in compile_constraints(puzzle, base=1, clues=[clue]):
+                problem.addConstraint(check, variables)
+
+    return problem
+
+def solve(rdf_graph=None, ns=None, mode="first", clue_order=None):
+    """
+    Solve with python-constraint, searching only as far as the mode needs:
+      first - the first solution, or None
+      unique - a list of at most two solutions, the search stops at the second one;
+               a single element means the solution is unique
+      all - a lazy iterator over every solution
+    """
+    solutions = build_problem(load_puzzle(rdf_graph, ns), clue_order).getSolutionIter()
+    if mode == "first":
+        return next(solutions, None)
+    if mode == "unique":
+        return list(islice(solutions, 2))
+    if mode == "all":
+        return solutions
+    raise ValueError("Unknown mode: " + mode)
+
+def zebra_puzzle(rdf_graph=None, ns=None, clue_order=None):
     # Returning the first solution (if exists)
-    return solutions[0] if solutions else None
-
-# Solve the Zebra Puzzle
-solution = zebra_puzzle()
-
-if solution:
-    for key, value in sorted(solution.items()):
-        print(f"{key} is in house {value}")
-    water_drinker = [key for key, value in solution.items() if value == solution["Water"]][0]
-    zebra_owner = [key for key, value in solution.items() if value == solution["Zebra"]][0]
-    print(f"\nThe {water_drinker} drinks water.")
-    print(f"The {zebra_owner} owns the zebra.")
-else:
-    print("No solution found.")
+    return solve(rdf_graph, ns, "first", clue_order)
+
+if __name__ == "__main__":
+    # Solve the Zebra Puzzle
+    solutions = solve(mode="unique")
+
+    if solutions:
+        solution = solutions[0]
+        for key, value in sorted(solution.items()):
+            print(f"{key} is in house {value}")
+        nationalities = load_puzzle().categories['nationality']
+        water_drinker = [key for key in nationalities if solution[key] == solution["Water"]][0]
+        zebra_owner = [key for key in nationalities if solution[key] == solution["Zebra"]][0]
+        print(f"\nThe {water_drinker} drinks water.")
+        print(f"The {zebra_owner} owns the zebra.")
+        print("The solution is unique." if len(solutions) == 1 else "The solution is not unique.")
+    else:
+        print("No solution found.")
@@ -0,0 +1,53 @@
+import unittest
+
+from rdflib import Namespace
+
+from rdf_graph import create_rdf_graph
+from reasoning import *
+
+NS = Namespace("http://example.org/")
+
+
+class SolveModeTests(unittest.TestCase):
+    def test_first_mode_finds_the_classic_answer(self):
+        solution = solve(mode="first")
+        self.assertEqual(solution["Water"], solution["Norwegian"])
+        self.assertEqual(solution["Zebra"], solution["Japanese"])
+        self.assertEqual(zebra_puzzle(), solution)
+
+    def test_unique_mode_counts_one_solution(self):
+        self.assertEqual(len(solve(mode="unique")), 1)
+
+    def test_unique_mode_stops_at_the_second_solution(self):
+        graph = create_rdf_graph()
+        graph.remove((NS.Norwegian, NS.dist, NS.Blue))
+        graph.remove((NS.Japanese, NS.same, NS.Parliament))
+        solutions = solve(graph, NS, mode="unique")
+        self.assertEqual(len(solutions), 2)
+        self.assertNotEqual(solutions[0], solutions[1])
+
+    def test_all_mode_is_lazy_and_complete(self):
+        graph = create_rdf_graph()
+        graph.remove((NS.Norwegian, NS.dist, NS.Blue))
+        solutions = list(solve(graph, NS, mode="all"))
+        self.assertEqual(len({tuple(sorted(solution.items())) for solution in solutions}), len(solutions))
+        self.assertGreater(len(solutions), 1)
+        self.assertIn(solve(mode="first"), solutions)
+
+    def test_contradiction_has_no_solution(self):
+        graph = create_rdf_graph()
+        graph.add((NS.Zebra, NS.same, NS.Dog))
+        self.assertIsNone(solve(graph, NS, mode="first"))
+        self.assertEqual(solve(graph, NS, mode="unique"), [])
+
+    def test_clue_order_does_not_change_the_answer(self):
+        puzzle = load_puzzle()
+        self.assertEqual(solve(mode="first", clue_order=list(reversed(puzzle.clues))), solve(mode="first"))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            solve(mode="best")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+"""
+Zebra puzzles in the puzzle store, shared/puzzle_store.py: one named graph per puzzle in an SQLite file.
+
+Usage: python store.py zebra.db import puzzles/*.ttl     (puzzle id - file name without extension)
+       python store.py zebra.db list
+       python store.py zebra.db export zebra-10x10-1 [--format turtle]
+"""
+import os
+import sys
+
+from rdflib import Namespace
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from puzzle_store import PuzzleStore, graph_identifier, main
+
+
+def open_puzzle(path, puzzle_id, ns=None):
+    """ Zebra puzzle graph from the store, (graph, ns), ready for solve_zebra_puzzle or reasoning.solve """
+    ns = ns or Namespace("http://example.org/")
+    with PuzzleStore(path) as store:
+        return store.get(puzzle_id), ns
+
+
+if __name__ == "__main__":
+    main()
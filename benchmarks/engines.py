@@ -0,0 +1,261 @@
+"""
+Benchmark of every puzzle engine in the repository on a locally generated corpus.
+
+Engines:
+  zebra-brute, zebra-encoded, zebra-propagate - Zebra_Puzzle/main.py, the puzzle read from an RDF graph
+  zebra-constraint - the python-constraint model in Zebra_Puzzle/reasoning.py
+  einstein, einstein-track - the rule-based Solver in Zebra/einstein.py with search (and the entity tracker)
+  knights-brute, knights-vectorized, knights-sat - Knights_and_Knaves, every consistent role assignment
+
+The corpus holds seeded random puzzles of increasing size, all with a unique solution: Zebra puzzles
+(houses x categories) and Knights and Knaves islands with N speakers. It is generated once and
+kept in benchmarks/.corpus/. Each (engine, size) case runs in a fresh interpreter, so the peak RSS
+of the case can be read from the child, and engines whose modules share names do not collide.
+
+Per case: total and median wall time, puzzles per second, solutions found, derived facts
+(einstein engines) and peak RSS. Results are printed (or written with --output) as JSON;
+with --baseline the run is compared against a stored result and regressions fail the run.
+
+Usage: python benchmarks/engines.py [--quick] [--engine einstein ...] [--output results.json]
+                                    [--baseline baseline.json] [--threshold 0.2]
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".corpus")
+FAMILY_DIRS = {"zebra": "Zebra_Puzzle", "einstein": "Zebra", "knights": "Knights_and_Knaves"}
+
+ZEBRA_SIZES = [(3, 3), (4, 4), (5, 5), (5, 6), (6, 6)]
+KNIGHTS_SIZES = [6, 10, 14, 20, 40]
+QUICK_ZEBRA_SIZES = [(3, 3), (4, 4)]
+QUICK_KNIGHTS_SIZES = [6, 10]
+# part of the corpus cache key, changes with the generators
+CORPUS_VERSION = 3
+
+# engine -> (corpus, family, feasible): feasible(size) tells whether the engine is run on a corpus size,
+# a (houses, categories) pair of the zebra corpus or a speaker count of the knights corpus; other sizes are skipped
+ENGINES = {
+    "zebra-brute": ("zebra", "zebra", lambda size: math.factorial(size[0]) ** size[1] <= 10 ** 5),
+    "zebra-encoded": ("zebra", "zebra", lambda size: True),
+    "zebra-propagate": ("zebra", "zebra", lambda size: True),
+    "zebra-constraint": ("zebra", "zebra", lambda size: True),
+    "einstein": ("zebra", "einstein", lambda size: True),
+    "einstein-track": ("zebra", "einstein", lambda size: True),
+    "knights-brute": ("knights", "knights", lambda size: size <= 16),
+    "knights-vectorized": ("knights", "knights", lambda size: size <= 24),
+    "knights-sat": ("knights", "knights", lambda size: True),
+}
+
+
+# Corpus
+
+def zebra_puzzle(houses, categories, seed):
+    """
+    Random Zebra puzzle with a unique solution and no redundant clues, from Zebra/einstein_generate.py.
+    Clues are [kind, [category, value], [category, value] or None, amount] as in Zebra_Puzzle/clues.py.
+    """
+    sys.path.insert(0, os.path.join(ROOT, FAMILY_DIRS["einstein"]))
+    from einstein_generate import generate
+
+    return generate(houses, categories, seed).to_dict()
+
+
+def knights_puzzle(count, seed):
+    """
+    Random Knights and Knaves island with a unique solution, from Knights_and_Knaves/generate.py.
+    """
+    sys.path.insert(0, os.path.join(ROOT, FAMILY_DIRS["knights"]))
+    from generate import generate
+
+    return generate(count, seed)
+
+
+def load_corpus(zebra_sizes, knights_sizes, per_size, seed):
+    key = hashlib.sha256(json.dumps([CORPUS_VERSION, zebra_sizes, knights_sizes, per_size, seed]).encode()).hexdigest()[:16]
+    path = os.path.join(CORPUS_DIR, f"corpus-{key}.json")
+    if os.path.exists(path):
+        with open(path) as file:
+            return path, json.load(file)
+    corpus = {"zebra": {}, "knights": {}}
+    for houses, categories in zebra_sizes:
+        corpus["zebra"][f"{houses}x{categories}"] = [zebra_puzzle(houses, categories, seed + i)
+                                                      for i in range(per_size)]
+    for count in knights_sizes:
+        corpus["knights"][str(count)] = [knights_puzzle(count, seed + i) for i in range(per_size)]
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(corpus, file)
+    return path, corpus
+
+
+# Engines, run in the child process
+
+def generated_zebra(puzzle):
+    """
+    Corpus Zebra puzzle as a Zebra/einstein_generate.py GeneratedPuzzle; its to_rdf() and puzzle()
+    build the graph for the Zebra_Puzzle engines and the rules for the einstein Solver.
+    """
+    # appended, so modules of the family directory come first
+    sys.path.append(os.path.join(ROOT, FAMILY_DIRS["einstein"]))
+    from einstein_generate import GeneratedPuzzle
+
+    return GeneratedPuzzle.from_dict(puzzle)
+
+
+def prepare(engine, puzzle):
+    """ Everything that is not part of solving: building the graph or the Solver. Returns solve() """
+    if engine == "zebra-constraint":
+        from reasoning import solve
+        g, ns = generated_zebra(puzzle).to_rdf()
+        return lambda: ((1 if solve(g, ns, "first") else 0), None)
+    if engine.startswith("zebra-"):
+        from main import solve_zebra_puzzle
+        g, ns = generated_zebra(puzzle).to_rdf()
+        return lambda: ((1 if solve_zebra_puzzle(g, ns, engine[len("zebra-"):]) else 0), None)
+    if engine.startswith("einstein"):
+        solver = generated_zebra(puzzle).puzzle().solver()
+        if engine == "einstein-track":
+            solver.track()
+        return lambda: ((1 if solver.solve(search=True) else 0), len(solver.map))
+
+    from generate import to_graph
+    from reasoning import StatementIndex, is_consistent_roles
+    g, ns, characters = to_graph(puzzle)
+    count = len(characters)
+    if engine == "knights-brute":
+        def solve():
+            compiled = StatementIndex(g, characters, ns).compiled
+            return sum(1 for roles in range(2 ** count) if is_consistent_roles(roles, compiled)), None
+        return solve
+    if engine == "knights-vectorized":
+        from vectorized import solve_vectorized
+        return lambda: (solve_vectorized(StatementIndex(g, characters, ns).compiled, count)[1], None)
+    from sat import solve_sat
+    return lambda: (len(solve_sat(StatementIndex(g, characters, ns).compiled, count, all_models=True)), None)
+
+
+def run_child(engine, corpus_path, corpus_name, size):
+    import resource
+
+    corpus, family, _ = ENGINES[engine]
+    sys.path.insert(0, os.path.join(ROOT, FAMILY_DIRS[family]))
+    with open(corpus_path) as file:
+        puzzles = json.load(file)[corpus_name][size]
+
+    times = []
+    solutions = 0
+    facts = []
+    for puzzle in puzzles:
+        solve = prepare(engine, puzzle)
+        start = time.perf_counter()
+        found, derived = solve()
+        times.append(time.perf_counter() - start)
+        solutions += found
+        if derived is not None:
+            facts.append(derived)
+    print(json.dumps({"times": times, "solutions": solutions,
+                      "facts": statistics.mean(facts) if facts else None,
+                      "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+
+
+# Parent
+
+def run_case(engine, corpus_path, size, timeout):
+    corpus = ENGINES[engine][0]
+    case = {"case": f"{engine}/{size}", "engine": engine, "size": size}
+    try:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", engine, corpus_path,
+                                 corpus, size], check=True, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return dict(case, status="timeout")
+    except subprocess.CalledProcessError as error:
+        return dict(case, status="error", error=error.stderr.strip().splitlines()[-1:])
+    child = json.loads(output.stdout.splitlines()[-1])
+    total = sum(child["times"])
+    return dict(case, status="ok", puzzles=len(child["times"]), time_s=total,
+                median_s=statistics.median(child["times"]),
+                puzzles_per_s=len(child["times"]) / total if total else None,
+                solutions=child["solutions"],
+                solutions_per_s=child["solutions"] / total if total else None,
+                facts=child["facts"], peak_rss_kb=child["peak_rss_kb"])
+
+
+def compare(results, baseline, threshold):
+    """ Cases slower than the baseline by more than `threshold` (0.2 - 20%) """
+    previous = {row["case"]: row for row in baseline["results"] if row.get("status") == "ok"}
+    rows = []
+    for row in results:
+        before = previous.get(row["case"])
+        if before is None or row.get("status") != "ok":
+            continue
+        ratio = row["time_s"] / before["time_s"] if before["time_s"] else float("inf")
+        rows.append({"case": row["case"], "baseline_s": before["time_s"], "time_s": row["time_s"],
+                     "ratio": ratio, "regression": ratio > 1 + threshold})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--child", nargs=4, metavar=("ENGINE", "CORPUS", "NAME", "SIZE"), help=argparse.SUPPRESS)
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES), help="engines to run, all by default")
+    parser.add_argument("--quick", action="store_true", help="only the two smallest sizes")
+    parser.add_argument("--per-size", type=int, default=3, help="puzzles of each size in the corpus")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds per (engine, size) case")
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    if args.child:
+        engine, corpus_path, name, size = args.child
+        run_child(engine, corpus_path, name, size)
+        return
+
+    zebra_sizes = QUICK_ZEBRA_SIZES if args.quick else ZEBRA_SIZES
+    knights_sizes = QUICK_KNIGHTS_SIZES if args.quick else KNIGHTS_SIZES
+    corpus_path, corpus = load_corpus(zebra_sizes, knights_sizes, args.per_size, args.seed)
+
+    results = []
+    for engine in args.engine or list(ENGINES):
+        name, _, feasible = ENGINES[engine]
+        for size in corpus[name]:
+            key = tuple(int(part) for part in size.split("x")) if name == "zebra" else int(size)
+            if not feasible(key):
+                continue
+            row = run_case(engine, corpus_path, size, args.timeout)
+            print(f"{row['case']:<28} {row['status']:<8} "
+                  + (f"{row['median_s'] * 1e3:>10.2f} ms {row['peak_rss_kb'] / 1024:>7.1f} MB"
+                     if row["status"] == "ok" else ""), file=sys.stderr)
+            results.append(row)
+
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                       "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": args.seed, "per_size": args.per_size},
+              "results": results}
+    failed = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            report["comparison"] = compare(results, json.load(file), args.threshold)
+        failed = [row["case"] for row in report["comparison"] if row["regression"]]
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    else:
+        print(text)
+    if failed:
+        sys.exit("slower than baseline: " + ", ".join(failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Startup-time benchmark for the Knights and Knaves solver.
+
+Each measurement runs in a fresh interpreter, so module import cost is counted
+every time. The solver path (rdf_graph + reasoning) must not pull in the
+visualization stack; the visualization path is measured for comparison.
+
+Usage: python benchmarks/startup.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+KNIGHTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Knights_and_Knaves")
+
+HEAVY_MODULES = ["matplotlib", "networkx", "pyvis"]
+
+CASES = {
+    "solver": "import rdf_graph, reasoning; rdf_graph.create_rdf_graph()",
+    "visualize": "import visualize, networkx, matplotlib.pyplot; visualize.to_networkx(visualize.create_rdf_graph())",
+}
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def measure(code, repeat):
+    times = []
+    loaded = ""
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", PROBE.format(code=code, heavy=HEAVY_MODULES)],
+                                cwd=KNIGHTS_DIR, check=True, capture_output=True, text=True).stdout.split()
+        times.append(float(output[0]))
+        loaded = output[1] if len(output) > 1 else ""
+    return {"median_s": statistics.median(times), "min_s": min(times),
+            "heavy_modules": loaded.split(",") if loaded else []}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {name: measure(code, args.repeat) for name, code in CASES.items()}
+    print(json.dumps(results, indent=2))
+    if results["solver"]["heavy_modules"]:
+        sys.exit("solver startup imports " + ", ".join(results["solver"]["heavy_modules"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Compact binary form of a puzzle graph, for shipping puzzles to solver workers.
+
+Layout (little-endian, every array aligned to 8 bytes):
+  header   - magic b"PZGB", version, term count, triple count, string blob size
+  kinds    - uint8 per term: 0 URI, 1 literal, 2 blank node, 3 language tag
+  extra    - int32 per term: for a literal the term id of its datatype or language tag, otherwise -1
+  offsets  - uint32 per term + 1: where the term's UTF-8 text starts in the blob
+  triples  - int32 (subject, predicate, object) term ids
+  blob     - the UTF-8 text of every term
+
+Reading maps the file (or wraps bytes) and views the arrays with numpy.frombuffer, nothing is copied;
+term texts are decoded only when a term is needed. TripleTable answers the triple patterns the
+solvers ask for (triples, subjects, objects, subject_objects, in), so the solver tables are built
+straight from the arrays without an rdflib Graph; to_graph() builds one when it is needed.
+
+Shared by the puzzle families: Knights_and_Knaves/rdf_binary.py and Zebra_Puzzle/rdf_binary.py read
+their solver tables from a TripleTable and solve binary files.
+
+Usage: python binary_graph.py puzzle.ttl puzzle.pzg      (convert)
+       python binary_graph.py puzzle.pzg                 (print the graph as Turtle)
+"""
+import argparse
+import mmap
+import os
+import struct
+
+import numpy as np
+from rdflib import BNode, Graph, Literal, URIRef
+
+MAGIC = b"PZGB"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIQ")
+URI, LITERAL, BLANK, LANGUAGE = 0, 1, 2, 3
+
+
+def _aligned(size):
+    return (size + 7) & ~7
+
+
+def _layout(term_count, triple_count):
+    """ Byte offsets of kinds, extra, offsets, triples and blob """
+    kinds = HEADER.size
+    extra = kinds + _aligned(term_count)
+    offsets = extra + _aligned(4 * term_count)
+    triples = offsets + _aligned(4 * (term_count + 1))
+    blob = triples + _aligned(12 * triple_count)
+    return kinds, extra, offsets, triples, blob
+
+
+def dumps(graph):
+    """ Binary form of an rdflib graph (any iterable of triples) """
+    ids = {}
+    kinds = []
+    extra = []
+    texts = []
+
+    def term_id(term):
+        key = (type(term), term, getattr(term, "datatype", None), getattr(term, "language", None))
+        if key in ids:
+            return ids[key]
+        if isinstance(term, Literal):
+            if term.language:
+                tag = ("lang", term.language)
+                if tag not in ids:
+                    ids[tag] = len(kinds)
+                    kinds.append(LANGUAGE)
+                    extra.append(-1)
+                    texts.append(term.language)
+                link = ids[tag]
+            else:
+                link = term_id(term.datatype) if term.datatype else -1
+            kind = LITERAL
+        else:
+            kind, link = BLANK if isinstance(term, BNode) else URI, -1
+        ids[key] = len(kinds)
+        kinds.append(kind)
+        extra.append(link)
+        texts.append(str(term))
+        return ids[key]
+
+    triples = [(term_id(s), term_id(p), term_id(o)) for s, p, o in graph]
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(text) for text in encoded])
+    blob = b"".join(encoded)
+
+    layout = _layout(len(kinds), len(triples))
+    data = bytearray(layout[-1] + len(blob))
+    HEADER.pack_into(data, 0, MAGIC, VERSION, len(kinds), len(triples), len(blob))
+    for start, array in zip(layout, (np.array(kinds, dtype="u1"), np.array(extra, dtype="<i4"), offsets,
+                                     np.array(triples, dtype="<i4").reshape(-1))):
+        data[start:start + array.nbytes] = array.tobytes()
+    data[layout[-1]:] = blob
+    return bytes(data)
+
+
+def dump(graph, path):
+    with open(path, "wb") as file:
+        file.write(dumps(graph))
+
+
+class TripleTable:
+    """ Read-only triple table over a binary puzzle graph (bytes, memoryview or mmap) """
+    def __init__(self, buffer):
+        if len(buffer) < HEADER.size:
+            raise ValueError("not a binary puzzle graph: shorter than the header")
+        magic, version, term_count, triple_count, blob_size = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a binary puzzle graph")
+        kinds, extra, offsets, triples, blob = _layout(term_count, triple_count)
+        if len(buffer) < blob + blob_size:
+            raise ValueError("not a binary puzzle graph: truncated")
+        self.buffer = buffer
+        self.kinds = np.frombuffer(buffer, dtype="u1", count=term_count, offset=kinds)
+        self.extra = np.frombuffer(buffer, dtype="<i4", count=term_count, offset=extra)
+        self.offsets = np.frombuffer(buffer, dtype="<u4", count=term_count + 1, offset=offsets)
+        self.triple_ids = np.frombuffer(buffer, dtype="<i4", count=3 * triple_count,
+                                        offset=triples).reshape(triple_count, 3)
+        self.blob = memoryview(buffer)[blob:blob + blob_size]
+        self._terms = {}
+        self._found = {}
+        self._ids = None
+        self._indexes = {}
+
+    def text(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def term(self, i):
+        """ rdflib term of a term id, decoded on first use """
+        term = self._terms.get(i)
+        if term is None:
+            kind = self.kinds[i]
+            if kind == URI:
+                term = URIRef(self.text(i))
+            elif kind == BLANK:
+                term = BNode(self.text(i))
+            else:
+                link = self.extra[i]
+                if link < 0:
+                    term = Literal(self.text(i))
+                elif self.kinds[link] == LANGUAGE:
+                    term = Literal(self.text(i), lang=self.text(link))
+                else:
+                    term = Literal(self.text(i), datatype=self.term(link))
+            self._terms[i] = term
+        return term
+
+    def term_id(self, term):
+        """ Term id of an rdflib term, or None if the graph does not use it """
+        if isinstance(term, Literal):
+            # literal equality depends on datatype and language, compare decoded terms
+            if self._ids is None:
+                self._ids = {self.term(i): i for i in range(len(self.kinds)) if self.kinds[i] == LITERAL}
+            return self._ids.get(term)
+        if term in self._found:
+            return self._found[term]
+        # URIs and blank nodes: compare the UTF-8 text of same-length terms of the same kind, nothing is decoded
+        text = str(term).encode("utf-8")
+        kind = BLANK if isinstance(term, BNode) else URI
+        lengths = self.offsets[1:] - self.offsets[:-1]
+        self._found[term] = None
+        for i in np.flatnonzero((lengths == len(text)) & (self.kinds == kind)):
+            if self.blob[self.offsets[i]:self.offsets[i + 1]] == text:
+                self._found[term] = int(i)
+                break
+        return self._found[term]
+
+    def rows(self, pattern):
+        """ (n, 3) array of the term ids of the triples matching a (subject, predicate, object) pattern """
+        rows = None
+        for column, term in enumerate(pattern):
+            if term is None:
+                continue
+            i = self.term_id(term)
+            if i is None:
+                return self.triple_ids[:0]
+            rows = self._column_rows(column, i) if rows is None else rows[rows[:, column] == i]
+        return self.triple_ids if rows is None else rows
+
+    def _column_rows(self, column, i):
+        """ Rows with term i in the column, through a sorted index of the column built on first use """
+        if column not in self._indexes:
+            order = np.argsort(self.triple_ids[:, column], kind="stable")
+            self._indexes[column] = (order, self.triple_ids[order, column])
+        order, keys = self._indexes[column]
+        start, end = np.searchsorted(keys, [i, i + 1])
+        return self.triple_ids[order[start:end]]
+
+    def triples(self, pattern):
+        for s, p, o in self.rows(pattern).tolist():
+            yield self.term(s), self.term(p), self.term(o)
+
+    def subjects(self, predicate=None, object=None):
+        for s, _, _ in self.rows((None, predicate, object)).tolist():
+            yield self.term(s)
+
+    def objects(self, subject=None, predicate=None):
+        for _, _, o in self.rows((subject, predicate, None)).tolist():
+            yield self.term(o)
+
+    def subject_objects(self, predicate=None):
+        for s, _, o in self.rows((None, predicate, None)).tolist():
+            yield self.term(s), self.term(o)
+
+    def __contains__(self, pattern):
+        return len(self.rows(pattern)) > 0
+
+    def __iter__(self):
+        return self.triples((None, None, None))
+
+    def __len__(self):
+        return len(self.triple_ids)
+
+    def to_graph(self):
+        """ The same triples as an rdflib Graph """
+        graph = Graph()
+        graph.addN((s, p, o, graph) for s, p, o in self)
+        return graph
+
+
+def loads(data):
+    return TripleTable(data)
+
+
+def load(path):
+    """ TripleTable over a memory-mapped binary puzzle graph """
+    with open(path, "rb") as file:
+        # an empty file cannot be mapped, it is rejected by TripleTable like any other short file
+        if os.fstat(file.fileno()).st_size == 0:
+            return TripleTable(b"")
+        return TripleTable(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def load_graph(path):
+    return load(path).to_graph()
+
+
+def as_table(source):
+    """ TripleTable of a path (memory-mapped), bytes or an existing TripleTable """
+    if isinstance(source, TripleTable):
+        return source
+    return load(source) if isinstance(source, str) else loads(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a puzzle graph to the binary form, or print a binary one")
+    parser.add_argument("source", help="RDF file to convert, or .pzg file to print")
+    parser.add_argument("target", nargs="?", help="binary file to write")
+    args = parser.parse_args()
+
+    if args.target:
+        dump(Graph().parse(args.source), args.target)
+    else:
+        print(load_graph(args.source).serialize(format="turtle"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rdflib import BNode, Graph, Literal, Namespace, RDF, XSD
+
+from binary_graph import *
+
+NS = Namespace("http://example.org/")
+
+
+def sample_graph():
+    g = Graph()
+    g.add((NS.Larry, NS.says, Literal("Quentin is a knight or I am a knave")))
+    g.add((NS.House1, NS.position, Literal(1)))
+    g.add((NS.House2, NS.position, Literal("1")))
+    g.add((NS.Larry, NS.label, Literal("Larry", lang="en")))
+    g.add((NS.Larry, NS.label, Literal("Ларри", lang="ru")))
+    g.add((NS.Larry, NS.weight, Literal("1.5", datatype=XSD.decimal)))
+    g.add((NS.Larry, RDF.type, NS.Knight))
+    node = BNode()
+    g.add((node, NS.same, NS.Red))
+    g.add((NS.Green, NS.offset, node))
+    return g
+
+
+class RoundTripTests(unittest.TestCase):
+    def test_every_kind_of_term_survives(self):
+        graph = sample_graph()
+        table = loads(dumps(graph))
+        self.assertEqual(len(table), len(graph))
+        self.assertEqual(set(table), set(graph))
+        self.assertEqual(set(table.to_graph()), set(graph))
+
+    def test_literals_keep_datatype_and_language(self):
+        table = loads(dumps(sample_graph()))
+        positions = dict(table.subject_objects(NS.position))
+        self.assertEqual(positions[NS.House1].datatype, XSD.integer)
+        self.assertIsNone(positions[NS.House2].datatype)
+        self.assertEqual({label.language for label in table.objects(NS.Larry, NS.label)}, {"en", "ru"})
+
+    def test_empty_graph(self):
+        table = loads(dumps(Graph()))
+        self.assertEqual(len(table), 0)
+        self.assertEqual(list(table), [])
+        self.assertNotIn((None, None, None), table)
+        self.assertEqual(len(table.to_graph()), 0)
+
+    def test_file_is_memory_mapped(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "puzzle.pzg")
+            graph = sample_graph()
+            dump(graph, path)
+            table = load(path)
+            self.assertEqual(set(table), set(graph))
+            self.assertEqual(set(load_graph(path)), set(graph))
+            self.assertIs(as_table(table), table)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_not_a_binary_graph(self):
+        with self.assertRaises(ValueError):
+            loads(b"@prefix ns: <http://example.org/> .\n" + bytes(64))
+
+    def test_truncated_file(self):
+        data = dumps(sample_graph())
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "puzzle.pzg")
+            for size in (0, 3, HEADER.size - 1, HEADER.size, len(data) // 2, len(data) - 1):
+                with open(path, "wb") as file:
+                    file.write(data[:size])
+                with self.assertRaisesRegex(ValueError, "not a binary puzzle graph", msg=size):
+                    load(path)
+        finally:
+            shutil.rmtree(directory)
+
+
+class PatternTests(unittest.TestCase):
+    def setUp(self):
+        self.graph = sample_graph()
+        self.table = loads(dumps(self.graph))
+
+    def test_patterns_match_rdflib(self):
+        patterns = [(None, None, None), (NS.Larry, None, None), (None, NS.label, None),
+                    (None, None, NS.Red), (NS.Larry, NS.label, None), (None, NS.position, Literal(1)),
+                    (NS.Larry, RDF.type, NS.Knight), (NS.Xan, None, None), (None, NS.position, Literal(2))]
+        for pattern in patterns:
+            self.assertEqual(set(self.table.triples(pattern)), set(self.graph.triples(pattern)), pattern)
+            self.assertEqual(pattern in self.table, pattern in self.graph, pattern)
+
+    def test_subjects_and_objects(self):
+        self.assertEqual(set(self.table.subjects(NS.position, None)), {NS.House1, NS.House2})
+        self.assertEqual(set(self.table.objects(NS.Larry, NS.says)), set(self.graph.objects(NS.Larry, NS.says)))
+
+    def test_term_ids(self):
+        i = self.table.term_id(NS.Larry)
+        self.assertEqual(self.table.term(i), NS.Larry)
+        self.assertIsNone(self.table.term_id(NS.Xan))
+        self.assertNotEqual(self.table.term_id(Literal(1)), self.table.term_id(Literal("1")))
+        self.assertEqual(len(self.table.rows((NS.Larry, NS.label, None))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
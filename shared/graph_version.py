@@ -0,0 +1,68 @@
+"""
+Caches of values computed from a graph, dropped when the graph changes, without patching the graph.
+
+rdflib stores dispatch an event for every added triple, counted by a subscriber on the store's
+dispatcher. Removals dispatch nothing but always change the length of the graph, so
+(len(graph), added triples) changes with every change of the content. Read-only graphs without a
+store, such as binary_graph.TripleTable, are versioned by their length alone.
+
+Entries are kept in a WeakKeyDictionary on the store (or the graph itself, if it has none): nothing is
+set on the graph, so it stays picklable, and the entries go away with the store.
+
+Shared by the puzzle families: Knights_and_Knaves/reasoning.py (StatementIndex) and
+Zebra_Puzzle/main.py (checkers).
+"""
+import functools
+import weakref
+
+from rdflib.store import TripleAddedEvent, TripleRemovedEvent
+
+# store -> _Changes
+_changes = weakref.WeakKeyDictionary()
+
+
+class _Changes:
+    """ Number of triple events dispatched by a store, subscribed once per store """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, event):
+        self.count += 1
+
+    def __reduce__(self):
+        # the dispatcher is pickled with the store: an unpickled graph gets a no-op subscriber, so this
+        # module is not needed to unpickle it, and a fresh counter is subscribed on first use
+        return functools.partial, (id,)
+
+
+def graph_version(graph):
+    """ Value that changes whenever triples are added to or removed from the graph """
+    store = getattr(graph, "store", None)
+    if store is None:
+        return len(graph), 0
+    changes = _changes.get(store)
+    if changes is None:
+        changes = _changes[store] = _Changes()
+        store.dispatcher.subscribe(TripleAddedEvent, changes)
+        store.dispatcher.subscribe(TripleRemovedEvent, changes)
+    return len(graph), changes.count
+
+
+class GraphCache:
+    """ Values computed from graphs, computed again once the graph has changed """
+    def __init__(self):
+        self._entries = weakref.WeakKeyDictionary()
+
+    def get(self, graph, key, compute):
+        """ Value stored for (graph, key) while the graph is unchanged, otherwise compute() """
+        owner = getattr(graph, "store", graph)
+        entries = self._entries.get(owner)
+        if entries is None:
+            entries = self._entries[owner] = {}
+        # graphs of one store differ by identifier, graphs with the same store and identifier share entries
+        key = (getattr(graph, "identifier", None), key)
+        version = graph_version(graph)
+        entry = entries.get(key)
+        if entry is None or entry[0] != version:
+            entry = entries[key] = (version, compute())
+        return entry[1]
@@ -0,0 +1,73 @@
+import pickle
+import unittest
+
+from rdflib import Graph, Literal, Namespace
+
+from binary_graph import dumps, loads
+from graph_version import *
+
+NS = Namespace("http://example.org/")
+
+
+def graph():
+    g = Graph()
+    g.add((NS.a, NS.p, Literal(1)))
+    g.add((NS.b, NS.p, Literal(2)))
+    return g
+
+
+class GraphVersionTests(unittest.TestCase):
+    def test_every_change_gives_a_new_version(self):
+        g = graph()
+        versions = [graph_version(g)]
+        g.add((NS.c, NS.p, Literal(3)))
+        versions.append(graph_version(g))
+        g.remove((NS.c, None, None))
+        versions.append(graph_version(g))
+        # same length as before, different content
+        g.remove((NS.b, None, None))
+        g.add((NS.d, NS.p, Literal(2)))
+        versions.append(graph_version(g))
+        g.set((NS.a, NS.p, Literal(5)))
+        versions.append(graph_version(g))
+        self.assertEqual(len(set(versions)), len(versions))
+        self.assertEqual(graph_version(g), versions[-1])
+
+    def test_graph_is_not_patched_and_pickles(self):
+        g = graph()
+        graph_version(g)
+        self.assertEqual(vars(g).keys(), vars(graph()).keys())
+        copy = pickle.loads(pickle.dumps(g))
+        self.assertEqual(set(copy), set(g))
+        version = graph_version(copy)
+        copy.add((NS.c, NS.p, Literal(3)))
+        self.assertNotEqual(graph_version(copy), version)
+
+    def test_table_without_store(self):
+        table = loads(dumps(graph()))
+        self.assertEqual(graph_version(table), graph_version(loads(dumps(graph()))))
+
+
+class GraphCacheTests(unittest.TestCase):
+    def test_value_is_computed_again_after_a_change(self):
+        cache = GraphCache()
+        g = graph()
+        computed = []
+        compute = lambda: computed.append(len(g)) or len(computed)
+        self.assertEqual(cache.get(g, "key", compute), 1)
+        self.assertEqual(cache.get(g, "key", compute), 1)
+        self.assertEqual(cache.get(g, "other", compute), 2)
+        g.add((NS.c, NS.p, Literal(3)))
+        self.assertEqual(cache.get(g, "key", compute), 3)
+        self.assertEqual(computed, [2, 2, 3])
+
+    def test_graphs_do_not_share_entries(self):
+        cache = GraphCache()
+        first, second = Graph(identifier=NS.puzzle), Graph(identifier=NS.puzzle)
+        second.add((NS.a, NS.p, Literal(1)))
+        self.assertEqual(cache.get(first, "key", lambda: "first"), "first")
+        self.assertEqual(cache.get(second, "key", lambda: "second"), "second")
+
+
+if __name__ == '__main__':
+    unittest.main()
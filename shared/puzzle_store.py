@@ -0,0 +1,134 @@
+"""
+Disk-backed store of puzzle graphs: one named graph per puzzle in an SQLite file.
+
+Puzzles are written once and opened by id. Opening reads only the rows of that puzzle through the
+graph index, so a solver process holds one puzzle in memory rather than the corpus, and nothing is
+parsed or rebuilt: terms are kept as (kind, value, datatype, language) columns and turned back into
+rdflib terms directly.
+
+Shared by the puzzle families: Knights_and_Knaves/store.py and Zebra_Puzzle/store.py add the family's
+open_puzzle and the same command line.
+
+Usage: python store.py puzzles.db import puzzles/*.ttl     (puzzle id - file name without extension)
+       python store.py puzzles.db list
+       python store.py puzzles.db export zebra-10x10-1 [--format turtle]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+from rdflib import BNode, Graph, Literal, URIRef
+
+URI, LITERAL, BLANK = 0, 1, 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS triples (
+    graph TEXT NOT NULL,
+    s TEXT NOT NULL, s_kind INTEGER NOT NULL,
+    p TEXT NOT NULL,
+    o TEXT NOT NULL, o_kind INTEGER NOT NULL, o_datatype TEXT, o_lang TEXT
+);
+CREATE INDEX IF NOT EXISTS triples_graph ON triples (graph);
+"""
+
+
+def graph_identifier(puzzle_id):
+    return URIRef("urn:puzzle:" + puzzle_id)
+
+
+def _encode(term):
+    if isinstance(term, Literal):
+        return str(term), LITERAL, str(term.datatype) if term.datatype else None, term.language
+    return str(term), BLANK if isinstance(term, BNode) else URI, None, None
+
+
+def _decode(value, kind, datatype=None, lang=None):
+    if kind == URI:
+        return URIRef(value)
+    if kind == BLANK:
+        return BNode(value)
+    return Literal(value, datatype=URIRef(datatype) if datatype else None, lang=lang)
+
+
+class PuzzleStore:
+    """ SQLite file of named puzzle graphs; `put` replaces the graph of an id, `get` reads it back """
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def put(self, puzzle_id, graph):
+        self.put_many([(puzzle_id, graph)])
+
+    def put_many(self, items):
+        """ Write (puzzle id, graph) pairs in one transaction """
+        with self.connection:
+            for puzzle_id, graph in items:
+                self.connection.execute("DELETE FROM triples WHERE graph = ?", (puzzle_id,))
+                self.connection.executemany(
+                    "INSERT INTO triples VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((puzzle_id,) + _encode(s)[:2] + (str(p),) + _encode(o) for s, p, o in graph))
+
+    def get(self, puzzle_id):
+        """ Graph of the puzzle, identified by urn:puzzle:<id>; KeyError if the id is not stored """
+        rows = self.connection.execute(
+            "SELECT s, s_kind, p, o, o_kind, o_datatype, o_lang FROM triples WHERE graph = ?", (puzzle_id,))
+        graph = Graph(identifier=graph_identifier(puzzle_id))
+        for s, s_kind, p, o, o_kind, o_datatype, o_lang in rows:
+            graph.add((_decode(s, s_kind), URIRef(p), _decode(o, o_kind, o_datatype, o_lang)))
+        if not len(graph):
+            raise KeyError(puzzle_id)
+        return graph
+
+    def remove(self, puzzle_id):
+        with self.connection:
+            self.connection.execute("DELETE FROM triples WHERE graph = ?", (puzzle_id,))
+
+    def ids(self):
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT graph FROM triples ORDER BY graph")]
+
+    def __contains__(self, puzzle_id):
+        return self.connection.execute("SELECT 1 FROM triples WHERE graph = ? LIMIT 1",
+                                       (puzzle_id,)).fetchone() is not None
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Disk-backed store of puzzle graphs, one named graph per puzzle")
+    parser.add_argument("store", help="SQLite file, created if missing")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="store RDF files, the id is the file name without extension")
+    load.add_argument("files", nargs="+")
+    commands.add_parser("list", help="print the stored puzzle ids")
+    export = commands.add_parser("export", help="print a stored puzzle graph")
+    export.add_argument("puzzle")
+    export.add_argument("--format", default="turtle")
+    args = parser.parse_args()
+    if args.command != "import" and not os.path.exists(args.store):
+        parser.error(f"no puzzle store {args.store}")
+
+    with PuzzleStore(args.store) as store:
+        if args.command == "import":
+            store.put_many((os.path.splitext(os.path.basename(path))[0], Graph().parse(path))
+                           for path in args.files)
+            print(f"{len(args.files)} puzzles stored in {args.store}", file=sys.stderr)
+        elif args.command == "list":
+            for puzzle_id in store.ids():
+                print(puzzle_id)
+        elif args.puzzle not in store:
+            parser.error(f"no puzzle {args.puzzle!r} in {args.store}")
+        else:
+            print(store.get(args.puzzle).serialize(format=args.format))
+
+
+if __name__ == "__main__":
+    main()
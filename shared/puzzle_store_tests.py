@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rdflib import BNode, Graph, Literal, Namespace, XSD
+
+from puzzle_store import *
+
+NS = Namespace("http://example.org/")
+
+
+def sample_graph():
+    g = Graph()
+    g.add((NS.Larry, NS.says, Literal("Justin is a knave")))
+    g.add((NS.House1, NS.position, Literal(1)))
+    g.add((NS.Larry, NS.label, Literal("Larry", lang="en")))
+    g.add((NS.Larry, NS.weight, Literal("1.5", datatype=XSD.decimal)))
+    node = BNode()
+    g.add((node, NS.same, NS.Red))
+    g.add((NS.Green, NS.offset, node))
+    return g
+
+
+class PuzzleStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'puzzles.db')
+        self.store = PuzzleStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.dir)
+
+    def test_round_trip_keeps_every_term(self):
+        graph = sample_graph()
+        self.store.put('p1', graph)
+        stored = self.store.get('p1')
+        self.assertEqual(set(stored), set(graph))
+        self.assertEqual(stored.identifier, graph_identifier('p1'))
+        self.assertEqual(stored.value(NS.House1, NS.position).toPython(), 1)
+
+    def test_graphs_are_kept_apart_and_put_replaces(self):
+        other = Graph()
+        other.add((NS.Xan, NS.says, Literal("Quentin lies")))
+        self.store.put_many([('p1', sample_graph()), ('p2', other)])
+        self.assertEqual(self.store.ids(), ['p1', 'p2'])
+        self.assertEqual(set(self.store.get('p2')), set(other))
+        self.store.put('p1', other)
+        self.assertEqual(len(self.store.get('p1')), 1)
+
+    def test_missing_and_removed_ids(self):
+        self.store.put('p1', sample_graph())
+        self.assertIn('p1', self.store)
+        self.assertNotIn('p2', self.store)
+        with self.assertRaises(KeyError):
+            self.store.get('p2')
+        self.store.remove('p1')
+        self.assertEqual(self.store.ids(), [])
+        with self.assertRaises(KeyError):
+            self.store.get('p1')
+
+    def test_reopened_store_reads_the_same_graph(self):
+        graph = sample_graph()
+        self.store.put('p1', graph)
+        self.store.close()
+        with PuzzleStore(self.path) as store:
+            self.assertEqual(set(store.get('p1')), set(graph))
+        self.store = PuzzleStore(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()